@@ -1,29 +1,46 @@
+import asyncio
+import logging
 import sys
 import os
-from typing import Dict,List, Optional
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict,List, Optional
 
 import numpy as np
 
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
+from fastapi import Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse
 import traceback 
-from engine.broker import Broker
-from engine.portfolio import Portfolio
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware # For CORS
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 
 import pandas as pd 
 from datetime import date, datetime
 
+from utils import data_loader
 from utils.data_loader import load_historical_data
+from utils import strategy_loader
 from utils.strategy_loader import get_available_strategies
 from engine.backtester import Backtester
+from engine.dataset import MarketDataset
 from engine.metrics import Metrics
-from utils.live_data import get_recent_history
+from engine.paper_trading import bar_latency
+from engine.runner import annualization_factor_for, resolve_strategy, run_strategy
+from engine.signals import evaluate_signals
+from engine.trade_analytics import trade_summary
+from engine.robustness import robustness_report
+from utils.live_data import LiveBarCache
+from utils.result_store import ResultStore, canonical_config, result_key
+from utils.shared_store import get_shared_store
+from utils.telemetry import InstrumentedThreadPool, StageTimer, Telemetry, cache_lines, gauge_lines
+from backend.signal_hub import SignalHub
+from backend.warmup import warm_up, warmup_settings
+from utils.event_log import emit
 
 class StrategyParameter(BaseModel):
     key: str
@@ -52,6 +69,8 @@ class BacktestConfig(BaseModel):
     broker_settings: BrokerSettings = Field(default_factory=BrokerSettings)
     portfolio_settings: PortfolioSettings = Field(default_factory=PortfolioSettings)
     strategy: StrategyConfig
+    use_cache: bool = True # Serve identical, previously completed runs from the result store
+    include_events: bool = False # Attach the run's buffered engine events to the response
 
 class AvailableStrategy(BaseModel):
     name: str
@@ -68,6 +87,13 @@ class PerformanceSummary(BaseModel):
     winning_days_pct: Optional[float] = Field(None, alias='Winning Days (%)')
     losing_days_pct: Optional[float] = Field(None, alias='Losing Days (%)')
     trade_count: int = Field(0, alias='Trade Count')
+    round_trips: Optional[int] = Field(None, alias='Round Trips')
+    win_rate_pct: Optional[float] = Field(None, alias='Win Rate (%)')
+    profit_factor: Optional[float] = Field(None, alias='Profit Factor') # null when there are no losing trades
+    expectancy: Optional[float] = Field(None, alias='Expectancy')
+    avg_holding_period_days: Optional[float] = Field(None, alias='Avg Holding Period (days)')
+    avg_mae_pct: Optional[float] = Field(None, alias='Avg MAE (%)')
+    avg_mfe_pct: Optional[float] = Field(None, alias='Avg MFE (%)')
     experiment_name: str = Field("N/A", alias='Experiment Name')
 
     class Config:
@@ -82,6 +108,26 @@ class BacktestRunResponse(BaseModel):
     equity_curve_data: List[Dict] # List of dicts for Date/Value, e.g., [{"Date": "2023-01-01", "Value": 100000}]
     trade_log_data: List[Dict]
     technical_indicators: Dict = Field(default_factory=dict)  # Use generic Dict type # For future indicators
+    events: Optional[List[Dict]] = None # Engine events of the run, only when requested via include_events
+
+class RobustnessRequest(BaseModel):
+    config: BacktestConfig
+    n_resamples: int = Field(10000, gt=0, le=100000)
+    block_size: int = Field(20, gt=0)
+    slippage_sigma_bps: float = Field(5.0, ge=0)
+    confidence: float = Field(0.95, gt=0, lt=1)
+    seed: Optional[int] = None
+
+class RobustnessResponse(BaseModel):
+    success: bool
+    message: str
+    summary: PerformanceSummary
+    n_resamples: int
+    confidence: float
+    # Each maps a summary field to {"observed", "mean", "lower", "upper"}
+    block_bootstrap: Dict[str, Dict[str, Optional[float]]] = Field(default_factory=dict)
+    trade_shuffle: Dict[str, Dict[str, Optional[float]]] = Field(default_factory=dict)
+    slippage: Dict[str, Dict[str, Optional[float]]] = Field(default_factory=dict)
 
 class LiveSignalRequest(BaseModel):
     symbols: List[str] # List of symbols to get signals for
@@ -99,11 +145,97 @@ class LiveSignalResponse(BaseModel):
     message: str = "Signal generated successfully."
     success: bool = True
 
+_result_store: Optional[ResultStore] = None
+# Backtests run on worker threads, so the store is opened under a lock
+_result_store_lock = threading.Lock()
+
+def get_result_store() -> ResultStore:
+    global _result_store
+    with _result_store_lock:
+        if _result_store is None:
+            _result_store = ResultStore()
+    return _result_store
+
+# Recent bars for /api/signal are served from memory and refreshed by a background poller
+live_bar_cache = LiveBarCache(
+    capacity=int(os.environ.get('RETROSPECT_LIVE_BUFFER_BARS', '1000')),
+    poll_interval=float(os.environ.get('RETROSPECT_LIVE_POLL_SECONDS', '60')),
+    idle_ttl=float(os.environ.get('RETROSPECT_LIVE_IDLE_SECONDS', '900'))
+)
+
+# Pushes signals over /ws/signal, evaluating each distinct subscription once per new bar
+signal_hub = SignalHub(
+    live_bar_cache,
+    resolve_strategy,
+    tick_interval=float(os.environ.get('RETROSPECT_SIGNAL_TICK_SECONDS', '5')),
+    idle_ttl=float(os.environ.get('RETROSPECT_SIGNAL_IDLE_SECONDS', '300'))
+)
+
+# Blocking work (data polls, backtests, signal evaluation, robustness runs) goes through asyncio.to_thread,
+# which runs on this pool; lifespan creates it and installs it as the loop's default executor
+_worker_pool: Optional[InstrumentedThreadPool] = None
+
+# Operational metrics, scraped from /metrics
+telemetry = Telemetry()
+
+def _cache_metrics() -> List[str]:
+    stats = {
+        'data': (data_loader.cache_stats['hits'], data_loader.cache_stats['misses']),
+        'strategy': (strategy_loader.cache_stats['hits'], strategy_loader.cache_stats['misses']),
+    }
+    if _result_store is not None:
+        stats['result'] = (_result_store.hits, _result_store.misses)
+    return cache_lines(stats)
+
+def _worker_pool_metrics() -> List[str]:
+    if _worker_pool is None:
+        return []
+    stats = _worker_pool.stats()
+    return (gauge_lines('retrospect_worker_queue_depth', 'Tasks waiting for a worker thread.', {(): stats['queued']})
+            + gauge_lines('retrospect_worker_busy_threads', 'Worker threads running a task.', {(): stats['running']})
+            + gauge_lines('retrospect_worker_max_threads', 'Size of the worker thread pool.', {(): _worker_pool.max_workers}))
+
+def _shared_store_metrics() -> List[str]:
+    store = get_shared_store()
+    if store is None:
+        return []
+    stats = store.stats()
+    return (gauge_lines('retrospect_shared_store_bytes', 'Bytes of bars held in the cross-process shared store.', {(): stats['bytes']})
+            + gauge_lines('retrospect_shared_store_entries', 'Entries in the cross-process shared store, by whether a live process references them.',
+                          {(('referenced', 'true'),): stats['referenced_entries'], (('referenced', 'false'),): stats['entries'] - stats['referenced_entries']}))
+
+telemetry.register_collector(_cache_metrics)
+telemetry.register_collector(_shared_store_metrics)
+telemetry.register_collector(_worker_pool_metrics)
+# Paper-trading sessions running in this process report their bar latency here
+telemetry.register_collector(bar_latency.render)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _worker_pool
+    _worker_pool = InstrumentedThreadPool(max_workers=int(os.environ['RETROSPECT_WORKER_THREADS']) if os.environ.get('RETROSPECT_WORKER_THREADS') else None,
+                                          thread_name_prefix='retrospect-worker')
+    asyncio.get_running_loop().set_default_executor(_worker_pool)
+    live_bar_cache.start()
+    signal_hub.start()
+    settings = warmup_settings()
+    if settings['components']:
+        warmup = asyncio.to_thread(warm_up, settings['components'], settings['symbols'], settings['interval'], settings['days'])
+        if settings['blocking']:
+            await warmup
+        else:
+            # Startup isn't held up; requests arriving meanwhile load what they need themselves
+            app.state.warmup_task = asyncio.create_task(warmup)
+    yield
+    await signal_hub.stop()
+    await live_bar_cache.stop()
+
 # Initialize the FastAPI application
 app = FastAPI(
     title="Quant Backtesting Engine API",
     description="API for running quantitative backtests and retrieving results.",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # --- CORS Configuration ---
@@ -125,6 +257,27 @@ app.add_middleware(
     allow_headers=["*"],
     expose_headers=["*"]
 )
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    # Unknown paths share one series so scanners can't create unbounded label values
+    path = request.url.path if any(getattr(route, 'path', None) == request.url.path for route in app.routes) else 'unmatched'
+    telemetry.track_in_progress(path, 1)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        telemetry.track_in_progress(path, -1)
+        # Label by route template rather than raw path so path parameters don't multiply series
+        route = request.scope.get('route')
+        telemetry.observe_request(request.method, route.path if route is not None else 'unmatched', status, time.perf_counter() - start)
+
+@app.get("/metrics", response_class=PlainTextResponse, summary="Operational metrics in Prometheus text format")
+async def metrics():
+    return PlainTextResponse(telemetry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.options("/api/backtest/run")
 async def options_backtest():
     return {"message": "OK"}
@@ -133,14 +286,17 @@ async def options_backtest():
 async def options_strategies():
     return {"message": "OK"}
 
+@app.options("/api/backtest/robustness")
+async def options_robustness():
+    return {"message": "OK"}
+
 @app.options("/api/signal")
 async def options_signal():
     return {"message": "OK"}
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
-    print(f"Unhandled exception: {exc}")
-    traceback.print_exc()
+    emit(logging.ERROR, 'unhandled_exception', f"Unhandled exception: {exc}", traceback=traceback.format_exc())
     
     response = JSONResponse(
         status_code=500,
@@ -181,107 +337,129 @@ async def get_strategies():
         ))
     return strategies_list
 
-@app.post("/api/backtest/run",response_model=BacktestRunResponse, summary="Run a single backtest experiment")
-async def run_backtest(config_data:BacktestConfig):
-    try:
-        # --- 1. Extract Parameters from Pydantic Model ---
-        experiment_name = config_data.name
+def _backtest_response(config_data: BacktestConfig, timer: StageTimer) -> BacktestRunResponse:
+    """Loads the data, runs (or fetches from the result store) the backtest and serializes the response."""
+    # --- 1. Extract Parameters from Pydantic Model ---
+    experiment_name = config_data.name
 
-        # Data Config
-        symbols = config_data.data.symbols
-        start_date_str = config_data.data.start_date.strftime('%Y-%m-%d') # Convert date object to string
-        end_date_str = config_data.data.end_date.strftime('%Y-%m-%d')
-        interval = config_data.data.interval
+    # Data Config
+    symbols = config_data.data.symbols
+    start_date_str = config_data.data.start_date.strftime('%Y-%m-%d') # Convert date object to string
+    end_date_str = config_data.data.end_date.strftime('%Y-%m-%d')
+    interval = config_data.data.interval
 
-        # Broker Config
-        commission_per_share = config_data.broker_settings.commission_per_share
-        slippage_bps = config_data.broker_settings.slippage_bps
+    # Broker Config
+    commission_per_share = config_data.broker_settings.commission_per_share
+    slippage_bps = config_data.broker_settings.slippage_bps
 
-        # Portfolio Config
-        initial_capital = config_data.portfolio_settings.initial_capital
+    # Portfolio Config
+    initial_capital = config_data.portfolio_settings.initial_capital
 
-        # Strategy Config
-        strategy_name = config_data.strategy.name
-        strategy_params = config_data.strategy.parameters
+    # Strategy Config
+    strategy_name = config_data.strategy.name
+    strategy_params = config_data.strategy.parameters
 
-        # --- 2. Load Market Data ---
+    # --- 2. Load Market Data ---
+    with timer.stage('data_fetch'):
         market_data = load_historical_data(symbols, start_date_str, end_date_str, interval)
-        if market_data.empty:
-            return BacktestRunResponse(
-                success=False,
-                message=f"No data loaded for {symbols} from {start_date_str} to {end_date_str}.",
-                summary=PerformanceSummary(), # Return default empty summary
-                ohcl_data=[],
-                equity_curve_data=[],
-                trade_log_data=[],
-                technical_indicators={}
-            )
-        
-        candlestick_data = []
-        technical_indicators = {}
-        target_symbol = strategy_params.get('target_symbol')
-        if target_symbol and target_symbol in symbols:
-            # We need to get the OHLCV data for the target symbol from the market_data DataFrame.
-            # We must convert the MultiIndex DataFrame to a list of dicts for JSON serialization.
-            ohlcv_df = market_data.loc[(slice(None), target_symbol), :].copy() # Slice out the single symbol's data
-            ohlcv_df.reset_index(level='Symbol', drop=True, inplace=True) # Drop the symbol level
-            try:
-                import pandas_ta as ta
+    if market_data.empty:
+        return BacktestRunResponse(
+            success=False,
+            message=f"No data loaded for {symbols} from {start_date_str} to {end_date_str}.",
+            summary=PerformanceSummary(), # Return default empty summary
+            ohcl_data=[],
+            equity_curve_data=[],
+            trade_log_data=[],
+            technical_indicators={}
+        )
+    
+    # Validate, sort and index the data once; charting and the Backtester share it by reference
+    market_dataset = MarketDataset(market_data)
+
+    candlestick_data = []
+    technical_indicators = {}
+    target_symbol = strategy_params.get('target_symbol')
+    if target_symbol and target_symbol in symbols:
+        # We need to get the OHLCV data for the target symbol from the market_data DataFrame.
+        # We must convert the MultiIndex DataFrame to a list of dicts for JSON serialization.
+        ohlcv_df = market_dataset.symbol_frame(target_symbol) # Shared, Date-indexed view of the symbol's bars
+        try:
+            import pandas_ta as ta
+            
+            if(strategy_name=="RSI"):
+            # Calculate RSI
+                rsi_period = strategy_params.get('period', 14)  # Default to 14
+                rsi_values = ta.rsi(ohlcv_df['Close'], length=rsi_period)
                 
-                if(strategy_name=="RSI"):
-                # Calculate RSI
-                    rsi_period = strategy_params.get('period', 14)  # Default to 14
-                    rsi_values = ta.rsi(ohlcv_df['Close'], length=rsi_period)
-                    
-                    # Create RSI data
-                    rsi_df = pd.DataFrame({
-                        'Date': ohlcv_df.index,
-                        'RSI_Value': rsi_values,
-                    })
-                    rsi_df['Date'] = rsi_df['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                    rsi_df = rsi_df.dropna()  # Remove NaN values
-                    rsi_data = rsi_df.to_dict(orient='records')
-                    technical_indicators['RSI'] = rsi_data
-                    technical_indicators['Overbought_Threshold'] = strategy_params.get('overbought_threshold', 70)
-                    technical_indicators['Oversold_Threshold'] = strategy_params.get('oversold_threshold', 30)
+                # Create RSI data
+                rsi_df = pd.DataFrame({
+                    'Date': ohlcv_df.index,
+                    'RSI_Value': rsi_values,
+                })
+                rsi_df['Date'] = rsi_df['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                rsi_df = rsi_df.dropna()  # Remove NaN values
+                rsi_data = rsi_df.to_dict(orient='records')
+                technical_indicators['RSI'] = rsi_data
+                technical_indicators['Overbought_Threshold'] = strategy_params.get('overbought_threshold', 70)
+                technical_indicators['Oversold_Threshold'] = strategy_params.get('oversold_threshold', 30)
+            
+            elif(strategy_name=="SMA Crossover"):
+                # Calculate SMA crossover (short and long averages)
+                short_period = strategy_params.get('short_window', 10)  # Default short SMA
+                long_period = strategy_params.get('long_window', 20)   # Default long SMA
+
+                short_sma = ta.sma(ohlcv_df['Close'], length=short_period)
+                long_sma = ta.sma(ohlcv_df['Close'], length=long_period)
                 
-                elif(strategy_name=="SMA Crossover"):
-                    # Calculate SMA crossover (short and long averages)
-                    short_period = strategy_params.get('short_window', 10)  # Default short SMA
-                    long_period = strategy_params.get('long_window', 20)   # Default long SMA
-
-                    short_sma = ta.sma(ohlcv_df['Close'], length=short_period)
-                    long_sma = ta.sma(ohlcv_df['Close'], length=long_period)
-                    
-                    # Create SMA crossover data
-                    sma_df = pd.DataFrame({
-                        'Date': ohlcv_df.index,
-                        'Short_SMA': short_sma,
-                        'Long_SMA': long_sma,
-                    })
-                    sma_df['Date'] = sma_df['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                    sma_df = sma_df.dropna()  # Remove NaN values
-                    sma_data = sma_df.to_dict(orient='records')
-                    
-                    # Add to technical indicators dictionary
-                    technical_indicators['SMA_Crossover'] = sma_data
+                # Create SMA crossover data
+                sma_df = pd.DataFrame({
+                    'Date': ohlcv_df.index,
+                    'Short_SMA': short_sma,
+                    'Long_SMA': long_sma,
+                })
+                sma_df['Date'] = sma_df['Date'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                sma_df = sma_df.dropna()  # Remove NaN values
+                sma_data = sma_df.to_dict(orient='records')
                 
-            except Exception as indicator_error:
-                print(f"Error calculating technical indicators: {indicator_error}")
-            ohlcv_df['Date'] = ohlcv_df.index # Make Date a column
-            ohlcv_df['Date'] = ohlcv_df['Date'].dt.strftime('%Y-%m-%d %H:%M:%S') # Format datetime for JSON
-            candlestick_data = ohlcv_df[['Date', 'Open', 'High', 'Low', 'Close']].to_dict(orient='records')
-        # --- 3. Get Strategy Class & Instantiate ---
-        available_strategies = get_available_strategies() # Re-discover in case of changes
-        if strategy_name not in available_strategies:
-            raise ValueError(f"Strategy '{strategy_name}' not found. Available: {list(available_strategies.keys())}")
-
-        strategy_class = available_strategies[strategy_name]
+                # Add to technical indicators dictionary
+                technical_indicators['SMA_Crossover'] = sma_data
+            
+        except Exception as indicator_error:
+            emit(logging.WARNING, 'indicators_failed', f"Error calculating technical indicators: {indicator_error}")
+        candlestick_df = ohlcv_df[['Open', 'High', 'Low', 'Close']].reset_index() # Make Date a column
+        candlestick_df['Date'] = candlestick_df['Date'].dt.strftime('%Y-%m-%d %H:%M:%S') # Format datetime for JSON
+        candlestick_data = candlestick_df[['Date', 'Open', 'High', 'Low', 'Close']].to_dict(orient='records')
+    # --- 3. Get Strategy Class & Instantiate ---
+    available_strategies = get_available_strategies() # Re-discover in case of changes
+    if strategy_name not in available_strategies:
+        raise ValueError(f"Strategy '{strategy_name}' not found. Available: {list(available_strategies.keys())}")
+
+    strategy_class = available_strategies[strategy_name]
+
+    # Identical configs over identical data and strategy source are served from the result store
+    cache_key = None
+    cached_result = None
+    if config_data.use_cache:
+        run_config = canonical_config(symbols, start_date_str, end_date_str, interval, commission_per_share, slippage_bps,
+                                      initial_capital, strategy_name, strategy_params)
+        cache_key = result_key(run_config, market_dataset.version, strategy_class)
+        # Stored results carry no events, so a run that asks for them is always executed
+        if not config_data.include_events:
+            cached_result = get_result_store().get(cache_key)
+
+    events = None
+    if cached_result is not None:
+        equity_curve = cached_result['equity_curve']
+        trades = cached_result['trades']
+        performance_summary_dict = cached_result['summary']
+        if 'Round Trips' not in performance_summary_dict: # Stored before trade analytics existed
+            performance_summary_dict.update(trade_summary(trades, market_dataset.frame))
+    else:
         strategy_instance = strategy_class(**strategy_params) # Instantiate with parameters
 
         # --- 4. Instantiate Backtester and Run ---
         backtester = Backtester(
-            data=market_data,
+            data=market_dataset,
             strategy=strategy_instance.__class__, 
             initial_capital=initial_capital,
             commission_per_share=commission_per_share,
@@ -290,28 +468,37 @@ async def run_backtest(config_data:BacktestConfig):
         )
         backtester.strategy_instance = strategy_instance 
 
-        final_portfolio = backtester.run()
+        with timer.stage('backtest'):
+            final_portfolio = backtester.run()
+        backtest_seconds = timer.timings[-1][1]
+        telemetry.observe_backtest(len(market_dataset.frame), backtest_seconds)
+        if config_data.include_events:
+            events = backtester.event_log.to_list()
 
         # --- 5. Collect and Serialize Results ---
         equity_curve = final_portfolio.get_equity_curve()
+        trades = final_portfolio.trades
 
         # Adjust annualization_factor for metrics calculation
-        if interval == '1d': annualization_factor = 252
-        elif interval == '1h': annualization_factor = 252 * 6.5
-        elif interval == '30m': annualization_factor = 252 * 13
-        else: annualization_factor = 252
-
-        performance_summary_dict = Metrics.performance_summary(
-            equity_curve,
-            risk_free_rate=0.0,
-            annualization_factor=annualization_factor,
-            trade_count=len(final_portfolio.trades)
-        )
-        for key, value in performance_summary_dict.items():
-            if isinstance(value, float) and np.isnan(value):
-                performance_summary_dict[key] = None
-        performance_summary_dict['Experiment Name'] = experiment_name
+        annualization_factor = annualization_factor_for(interval)
+
+        with timer.stage('metrics'):
+            performance_summary_dict = Metrics.performance_summary(
+                equity_curve,
+                risk_free_rate=0.0,
+                annualization_factor=annualization_factor,
+                trade_count=len(trades)
+            )
+            performance_summary_dict.update(trade_summary(trades, market_dataset.frame))
+        if cache_key is not None:
+            get_result_store().put(cache_key, strategy_class, performance_summary_dict, equity_curve, trades)
 
+    for key, value in performance_summary_dict.items():
+        if isinstance(value, float) and not np.isfinite(value):
+            performance_summary_dict[key] = None
+    performance_summary_dict['Experiment Name'] = experiment_name
+
+    with timer.stage('serialization'):
         # Convert Pandas Series/DataFrame to list of dictionaries for JSON serialization
         equity_curve_list = []
         if not equity_curve.empty:
@@ -321,26 +508,112 @@ async def run_backtest(config_data:BacktestConfig):
             equity_curve_list = temp_df.to_dict(orient='records')
 
         trade_log_list = []
-        if final_portfolio.trades:
-            trade_log_df = pd.DataFrame(final_portfolio.trades)
+        if trades:
+            trade_log_df = pd.DataFrame(trades)
             # Format timestamp for JSON
             trade_log_df['timestamp'] = trade_log_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
             trade_log_list = trade_log_df.to_dict(orient='records')
 
-        # --- 6. Return Response ---
-        return BacktestRunResponse(
-            success=True,
-            message=f"Backtest for {experiment_name} completed successfully.",
-            summary=PerformanceSummary(**performance_summary_dict), # Unpack dict into Pydantic model
-            ohcl_data=candlestick_data,
-            equity_curve_data=equity_curve_list,
-            trade_log_data=trade_log_list,
-            technical_indicators=technical_indicators
+    # --- 6. Return Response ---
+    return BacktestRunResponse(
+        success=True,
+        message=f"Backtest for {experiment_name} completed successfully." + (" (cached result)" if cached_result is not None else ""),
+        summary=PerformanceSummary(**performance_summary_dict), # Unpack dict into Pydantic model
+        ohcl_data=candlestick_data,
+        equity_curve_data=equity_curve_list,
+        trade_log_data=trade_log_list,
+        technical_indicators=technical_indicators,
+        events=events
+    )
 
+@app.post("/api/backtest/run",response_model=BacktestRunResponse, summary="Run a single backtest experiment")
+async def run_backtest(config_data:BacktestConfig, response: Response):
+    timer = telemetry.stage_timer("/api/backtest/run")
+    experiment_name = config_data.name
+    try:
+        # Loading, the backtest, metrics and serialization all block; run them off the event loop
+        return await asyncio.to_thread(_backtest_response, config_data, timer)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backtest execution error for '{experiment_name}': {e}")
+    finally:
+        response.headers["Server-Timing"] = timer.server_timing()
+
+def _robustness_analysis(robustness_request: RobustnessRequest) -> Optional[Dict[str, Any]]:
+    """Backtest and robustness_report for a request; None when no data loads."""
+    config_data = robustness_request.config
+    symbols = config_data.data.symbols
+    interval = config_data.data.interval
+    market_data = load_historical_data(symbols, config_data.data.start_date.strftime('%Y-%m-%d'),
+                                       config_data.data.end_date.strftime('%Y-%m-%d'), interval)
+    if market_data.empty:
+        return None
+    final_portfolio = run_strategy(
+        MarketDataset(market_data),
+        config_data.strategy.name,
+        config_data.strategy.parameters,
+        symbols,
+        initial_capital=config_data.portfolio_settings.initial_capital,
+        commission_per_share=config_data.broker_settings.commission_per_share,
+        slippage_bps=config_data.broker_settings.slippage_bps
+    )
+    return robustness_report(
+        final_portfolio,
+        n_resamples=robustness_request.n_resamples,
+        block_size=robustness_request.block_size,
+        slippage_sigma_bps=robustness_request.slippage_sigma_bps,
+        confidence=robustness_request.confidence,
+        annualization_factor=annualization_factor_for(interval),
+        seed=robustness_request.seed
+    )
+
+@app.post("/api/backtest/robustness", response_model=RobustnessResponse, summary="Monte Carlo robustness analysis of a backtest")
+async def run_robustness(robustness_request: RobustnessRequest):
+    config_data = robustness_request.config
+    experiment_name = config_data.name
+    try:
+        symbols = config_data.data.symbols
+        start_date_str = config_data.data.start_date.strftime('%Y-%m-%d')
+        end_date_str = config_data.data.end_date.strftime('%Y-%m-%d')
+
+        # Loading, the backtest and the resampling all block; run them off the event loop so
+        # the live-bar poller, signal ticks and other requests keep being served meanwhile
+        report = await asyncio.to_thread(_robustness_analysis, robustness_request)
+        if report is None:
+            return RobustnessResponse(
+                success=False,
+                message=f"No data loaded for {symbols} from {start_date_str} to {end_date_str}.",
+                summary=PerformanceSummary(),
+                n_resamples=robustness_request.n_resamples,
+                confidence=robustness_request.confidence
+            )
+
+        performance_summary_dict = report['observed']
+        for key, value in performance_summary_dict.items():
+            if isinstance(value, float) and np.isnan(value):
+                performance_summary_dict[key] = None
+        performance_summary_dict['Experiment Name'] = experiment_name
+
+        return RobustnessResponse(
+            success=True,
+            message=f"Robustness analysis for {experiment_name} completed with {report['n_resamples']} resamples.",
+            summary=PerformanceSummary(**performance_summary_dict),
+            n_resamples=report['n_resamples'],
+            confidence=report['confidence'],
+            block_bootstrap=report['block_bootstrap'],
+            trade_shuffle=report['trade_shuffle'],
+            slippage=report['slippage']
         )
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Backtest execution error for '{experiment_name}': {e}")
+        raise HTTPException(status_code=500, detail=f"Robustness analysis error for '{experiment_name}': {e}")
+
+def _live_signals(recent_history: pd.DataFrame, strategy_name: str, strategy_params: Dict[str, Any], symbols: List[str],
+                  lookback_period: int) -> List[LiveSignalResponse]:
+    available_strategies = get_available_strategies()
+    if strategy_name not in available_strategies:
+        raise HTTPException(status_code=400, detail=f"Strategy '{strategy_name}' not found. Available: {list(available_strategies.keys())}")
+    strategy_class = available_strategies[strategy_name]
+    return [LiveSignalResponse(**signal) for signal in evaluate_signals(recent_history, strategy_class, strategy_params, symbols, lookback_period)]
 
 @app.post("/api/signal", response_model=List[LiveSignalResponse], summary="Generate live trading signals for selected symbols/strategy")
 async def generate_live_signal(signal_request: LiveSignalRequest):
@@ -352,104 +625,62 @@ async def generate_live_signal(signal_request: LiveSignalRequest):
         interval = signal_request.interval
         lookback_period = signal_request.lookback_period
 
-        recent_history = get_recent_history(symbols, interval, lookback_period)
+        recent_history = await live_bar_cache.get_history(symbols, interval, lookback_period)
 
         if(recent_history.empty):
             raise HTTPException(status_code=404, detail=f"No recent data loaded for {symbols} ({interval}). Please check symbols/interval or market hours.")
         
-        available_strategies = get_available_strategies()
-        if strategy_name not in available_strategies:
-            raise HTTPException(status_code=400, detail=f"Strategy '{strategy_name}' not found. Available: {list(available_strategies.keys())}")
-        
-        strategy_class = available_strategies[strategy_name]
-
-        for symbol in symbols:
-            single_history = recent_history.loc[(slice(None), symbol), :].copy()
-            if single_history.empty:
-                response_signals.append(LiveSignalResponse(
-                    symbol=symbol,
-                    timestamp=datetime.now().isoformat(),
-                    signal="N/A",
-                    message=f"No recent data available for {symbol}.",
-                    success=False
-                ))
-                continue
-
-            if len(single_history) < lookback_period: # Or strategy's actual min lookback
-                response_signals.append(LiveSignalResponse(
-                    symbol=symbol,
-                    timestamp=single_history.index[-1][0].isoformat() if not single_history.empty else datetime.now().isoformat(),
-                    signal="N/A",
-                    message=f"Insufficient history ({len(single_history)} bars) for {symbol}. Needed {lookback_period}.",
-                    success=False
-                ))
-                continue
-
-            portfolio_monitor = Portfolio(initial_capital=10000000.0) 
-            broker_monitor = Broker(commission_per_share=0.0, slippage_bps=0.0)
-
-            if 'target_symbol' in strategy_class.__init__.__code__.co_varnames:
-                current_strategy_params = strategy_params.copy()
-                current_strategy_params['target_symbol'] = symbol
-                strategy_instance = strategy_class(**current_strategy_params)
-            
-            else:
-                strategy_instance = strategy_class(**strategy_params)
-            
-            current_signal = "HOLD"
-            final_strategy_position = 0
-            latest_bar_price = None
-            latest_bar_timestamp = None
-
-            for current_date_multiindex, row_data_series in single_history.iterrows():
-                latest_bar_timestamp = current_date_multiindex[0] # The date part of the MultiIndex
-                latest_bar_symbol = current_date_multiindex[1]
-                data_for_day = pd.DataFrame([row_data_series])
-                data_for_day.index = pd.Index([latest_bar_symbol], name='Symbol')
-
-                try:
-                    strategy_instance.on_data(latest_bar_timestamp, data_for_day, portfolio_monitor, broker_monitor)
-                    final_strategy_position = strategy_instance.position 
-                    latest_bar_price = row_data_series['Close']
-
-                except Exception as e:
-                    print(f"Error in strategy {strategy_name} on_data for {symbol} at {latest_bar_timestamp}: {e}")
-                    current_signal = "ERROR" 
-                    final_strategy_position = np.nan 
-                    latest_bar_price = np.nan
-                    break
-            
-            if current_signal != "ERROR":
-                if final_strategy_position == 1:
-                    current_signal = "LONG"
-                elif final_strategy_position == 0:
-                    current_signal = "FLAT"
-                elif final_strategy_position == -1:
-                    current_signal = "SHORT"
-                else:
-                    current_signal = "N/A"
-
-            response_signals.append(LiveSignalResponse(
-                symbol=symbol,
-                timestamp=latest_bar_timestamp.isoformat() if latest_bar_timestamp else datetime.now().isoformat(),
-                signal=current_signal,
-                current_price=latest_bar_price,
-                strategy_position=final_strategy_position,
-                message="Signal generated successfully." if current_signal != "ERROR" else "Strategy execution error.",
-                success=True if current_signal != "ERROR" else False
-            ))
+        # Strategy discovery and the vectorized evaluation block; run them off the event loop
+        response_signals = await asyncio.to_thread(_live_signals, recent_history, strategy_name, strategy_params, symbols, lookback_period)
     
+    except HTTPException:
+        raise
     except ValueError as ve: # For specific validation errors from your code
         raise HTTPException(status_code=400, detail=f"Bad Request: {ve}")
     except Exception as e: # Catch any other unexpected errors from your backend logic
-        print(f"An unexpected error occurred in generate_live_signal: {e}")
-        import traceback
-        traceback.print_exc()
+        emit(logging.ERROR, 'signal_request_failed', f"An unexpected error occurred in generate_live_signal: {e}", traceback=traceback.format_exc())
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
 
     return response_signals
 
 
+@app.websocket("/ws/signal")
+async def signal_websocket(websocket: WebSocket):
+    """
+    Push channel for live signals. Clients send
+    {"action": "subscribe", <LiveSignalRequest fields>} or {"action": "unsubscribe", "subscription": key}
+    and receive {"type": "signals", "subscription": key, "signals": [...]} whenever a new bar changes the result.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            message = await websocket.receive_json()
+            action = message.pop('action', 'subscribe')
+            if action == 'subscribe':
+                try:
+                    signal_request = LiveSignalRequest(**message)
+                    key = await signal_hub.subscribe(
+                        websocket,
+                        signal_request.strategy_name,
+                        signal_request.strategy_params,
+                        signal_request.symbols,
+                        signal_request.interval,
+                        signal_request.lookback_period
+                    )
+                    await websocket.send_json({'type': 'subscribed', 'subscription': key})
+                except (ValidationError, ValueError) as e:
+                    await websocket.send_json({'type': 'error', 'detail': f"Bad Request: {e}"})
+                except Exception as e:
+                    # e.g. strategy parameters the strategy's constructor rejects; nothing was subscribed
+                    await websocket.send_json({'type': 'error', 'detail': f"Signal evaluation error: {e}"})
+            elif action == 'unsubscribe':
+                signal_hub.unsubscribe(websocket, message.get('subscription'))
+                await websocket.send_json({'type': 'unsubscribed', 'subscription': message.get('subscription')})
+            else:
+                await websocket.send_json({'type': 'error', 'detail': f"Unknown action '{action}'."})
+    except WebSocketDisconnect:
+        signal_hub.unsubscribe(websocket)
+
 @app.get("/")
 async def read_root():
     return {"message": "Welcome to the Quant Backtesting Engine API!"}
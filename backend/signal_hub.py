@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Type
+
+import numpy as np
+import pandas as pd
+
+from engine.signals import evaluate_signals
+from strategies.base import BaseStrategy
+from utils.event_log import emit
+from utils.live_data import LiveBarCache
+
+class SignalSubscription:
+    """One distinct (strategy, params, symbols, interval, lookback) shared by every client subscribed to it."""
+    def __init__(self, key: str, strategy_class: Type[BaseStrategy], strategy_params: Dict[str, Any], symbols: List[str], interval: str, lookback_period: int):
+        self.key = key
+        self.strategy_class = strategy_class
+        self.strategy_params = strategy_params
+        self.symbols = symbols
+        self.interval = interval
+        self.lookback_period = lookback_period
+        self.subscribers: Set[Any] = set()
+        self.last_bars: Optional[tuple] = None
+        self.last_signals: Optional[List[Dict[str, Any]]] = None
+        self.idle_since: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+def json_safe(signal: Dict[str, Any]) -> Dict[str, Any]:
+    """A signal dict send_json can encode as valid JSON: NumPy scalars as Python values, NaN and infinities as null."""
+    safe = {}
+    for field, value in signal.items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, float) and not math.isfinite(value):
+            value = None
+        safe[field] = value
+    return safe
+
+def subscription_key(strategy_name: str, strategy_params: Dict[str, Any], symbols: List[str], interval: str, lookback_period: int) -> str:
+    return json.dumps([strategy_name, strategy_params, sorted(symbols), interval, lookback_period], sort_keys=True, default=str)
+
+class SignalHub:
+    """
+    Evaluates each distinct live-signal subscription once per new bar and fans the result
+    out to every subscriber, so strategy replays and upstream fetches scale with the
+    number of distinct subscriptions rather than with connected clients.
+
+    Subscribers are any objects with an async send_json method (e.g. FastAPI WebSockets).
+    Subscriptions without subscribers are dropped after idle_ttl seconds.
+    """
+    def __init__(self, bar_cache: LiveBarCache, resolve_strategy: Callable[[str], Type[BaseStrategy]], tick_interval: float = 5.0, idle_ttl: float = 300.0, send_timeout: float = 5.0):
+        self.bar_cache = bar_cache
+        self.resolve_strategy = resolve_strategy
+        self.tick_interval = tick_interval
+        self.idle_ttl = idle_ttl
+        self.send_timeout = send_timeout
+        self.subscriptions: Dict[str, SignalSubscription] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def subscribe(self, subscriber, strategy_name: str, strategy_params: Dict[str, Any], symbols: List[str], interval: str = "1d", lookback_period: int = 250) -> str:
+        if not symbols:
+            raise ValueError("At least one symbol is required.")
+        key = subscription_key(strategy_name, strategy_params, symbols, interval, lookback_period)
+        subscription = self.subscriptions.get(key)
+        if subscription is None:
+            # Evaluated before it is registered, so a strategy that can't be built or run raises
+            # here instead of leaving a subscription that fails on every tick
+            subscription = SignalSubscription(key, self.resolve_strategy(strategy_name), strategy_params, list(symbols), interval, lookback_period)
+            await self._evaluate(subscription)
+            subscription = self.subscriptions.setdefault(key, subscription)
+        subscription.subscribers.add(subscriber)
+        subscription.idle_since = None
+        await self._send(subscriber, subscription, subscription.last_signals)
+        return key
+
+    def unsubscribe(self, subscriber, key: Optional[str] = None):
+        """Removes a subscriber from one subscription, or from all of them when key is None."""
+        subscriptions = [self.subscriptions[key]] if key in self.subscriptions else ([] if key else list(self.subscriptions.values()))
+        for subscription in subscriptions:
+            subscription.subscribers.discard(subscriber)
+            if not subscription.subscribers and subscription.idle_since is None:
+                subscription.idle_since = time.monotonic()
+
+    async def _evaluate(self, subscription: SignalSubscription):
+        async with subscription.lock:
+            history = await self.bar_cache.get_history(subscription.symbols, subscription.interval, subscription.lookback_period)
+            bars = self._bar_signature(history)
+            if bars == subscription.last_bars and subscription.last_signals is not None:
+                return
+            if history.empty:
+                signals = [{'symbol': symbol, 'timestamp': pd.Timestamp.now().isoformat(), 'signal': "N/A",
+                            'message': f"No recent data available for {symbol}.", 'success': False} for symbol in subscription.symbols]
+            else:
+                # Replays are CPU-bound; keep them off the event loop
+                signals = await asyncio.to_thread(evaluate_signals, history, subscription.strategy_class, subscription.strategy_params,
+                                                  subscription.symbols, subscription.lookback_period)
+                signals = [json_safe(signal) for signal in signals]
+            subscription.last_bars = bars
+            subscription.last_signals = signals
+        await asyncio.gather(*(self._send(subscriber, subscription, signals) for subscriber in list(subscription.subscribers)))
+
+    @staticmethod
+    def _bar_signature(history: pd.DataFrame) -> tuple:
+        """Newest bar timestamp per symbol; a change means at least one new bar arrived."""
+        if history.empty:
+            return ()
+        latest = history.reset_index().groupby('Symbol')['Date'].max()
+        return tuple(latest.items())
+
+    async def _send(self, subscriber, subscription: SignalSubscription, signals: List[Dict[str, Any]]):
+        try:
+            await asyncio.wait_for(subscriber.send_json({'type': 'signals', 'subscription': subscription.key, 'signals': signals}), self.send_timeout)
+        except Exception as e:
+            emit(logging.WARNING, 'signal_subscriber_dropped', f"Dropping signal subscriber after failed send: {e}", subscription=subscription.key)
+            self.unsubscribe(subscriber)
+
+    async def tick(self):
+        now = time.monotonic()
+        active = []
+        for key, subscription in list(self.subscriptions.items()):
+            if subscription.subscribers:
+                active.append(subscription)
+            elif subscription.idle_since is not None and now - subscription.idle_since > self.idle_ttl:
+                del self.subscriptions[key]
+        results = await asyncio.gather(*(self._evaluate(subscription) for subscription in active), return_exceptions=True)
+        for subscription, result in zip(active, results):
+            if isinstance(result, Exception):
+                emit(logging.ERROR, 'signal_evaluation_failed', f"Error evaluating signal subscription {subscription.key}: {result}", subscription=subscription.key)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            await self.tick()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,61 @@
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from utils.event_log import emit
+
+WARMUP_COMPONENTS = ('strategies', 'indicators', 'data')
+
+def warmup_settings() -> Dict:
+    """
+    Warm-up configuration from the environment:
+    RETROSPECT_WARMUP         comma-separated components to pre-load (strategies, indicators, data),
+                              'none' to disable; defaults to 'strategies,indicators'
+    RETROSPECT_WARMUP_SYMBOLS comma-separated symbol universe whose bars are pre-loaded by 'data'
+    RETROSPECT_WARMUP_INTERVAL bar interval of the pre-loaded bars (default 1d)
+    RETROSPECT_WARMUP_DAYS    calendar days of history to pre-load, ending today (default 365)
+    RETROSPECT_WARMUP_BLOCKING '1' to finish warming up before the server accepts requests
+    """
+    components = os.environ.get('RETROSPECT_WARMUP', 'strategies,indicators').lower()
+    return {
+        'components': [] if components in ('', 'none', '0') else [c.strip() for c in components.split(',') if c.strip()],
+        'symbols': [s.strip().upper() for s in os.environ.get('RETROSPECT_WARMUP_SYMBOLS', '').split(',') if s.strip()],
+        'interval': os.environ.get('RETROSPECT_WARMUP_INTERVAL', '1d'),
+        'days': int(os.environ.get('RETROSPECT_WARMUP_DAYS', '365')),
+        'blocking': os.environ.get('RETROSPECT_WARMUP_BLOCKING', '0') == '1',
+    }
+
+def warm_up(components: List[str], symbols: Optional[List[str]] = None, interval: str = '1d', days: int = 365) -> Dict[str, float]:
+    """
+    Loads what the first requests would otherwise load on demand: the strategy registry,
+    the indicator library used for charting, and the cached bars of a symbol universe.
+    Returns the seconds spent per component. Failures are logged and never raised, so
+    a warm-up problem cannot keep the server from starting.
+    """
+    timings = {}
+    for component in components:
+        if component not in WARMUP_COMPONENTS:
+            emit(logging.WARNING, 'warmup_unknown_component', f"Unknown warm-up component '{component}'. Expected one of {WARMUP_COMPONENTS}.")
+            continue
+        start = time.perf_counter()
+        try:
+            if component == 'strategies':
+                from engine.runner import resolve_strategy
+                from utils.strategy_loader import get_available_strategies
+                for name in get_available_strategies():
+                    resolve_strategy(name)
+            elif component == 'indicators':
+                import pandas_ta # noqa: F401
+            elif component == 'data' and symbols:
+                import pandas as pd
+                from utils.data_loader import load_historical_data
+                # The range ends tomorrow so requests ending today are covered by the cached range
+                end = pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+                load_historical_data(symbols, (end - pd.Timedelta(days=days)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'), interval)
+        except Exception as e:
+            emit(logging.WARNING, 'warmup_failed', f"Warm-up of {component} failed: {e}", component=component)
+            continue
+        timings[component] = time.perf_counter() - start
+    emit(logging.INFO, 'warmup_complete', f"Warm-up finished: {timings}", **timings)
+    return timings
@@ -1,21 +1,24 @@
+import os
+import pickle
+import tempfile
+import numpy as np
 import pandas as pd
 from strategies.base import BaseStrategy
 from engine.broker import Broker
 from engine.portfolio import Portfolio
-from typing import Type
+from engine.dataset import MarketDataset
+from engine.scheduler import EventScheduler
+from engine.kernels import run_kernel
+from engine.metrics import OnlineMetrics
+from utils.event_log import EventLog
+from typing import Any, Dict, Optional, Type, Union
 
 class Backtester:
-    def __init__(self, data:pd.DataFrame,strategy:Type[BaseStrategy],initial_capital:float,commission_per_share:float,slippage_bps:float,symbols:list[str]):
-        if not isinstance(data, pd.DataFrame) or data.empty:
-            raise ValueError("Input data must be a non-empty Pandas DataFrame.")
-        if not isinstance(data.index, pd.MultiIndex) or 'Date' not in data.index.names or 'Symbol' not in data.index.names:
-            raise ValueError("Data index must be a Pandas MultiIndex with 'Date' and 'Symbol' levels.")
-        if not isinstance(data.index.get_level_values('Date'), pd.DatetimeIndex):
-            raise ValueError("The 'Date' level of the MultiIndex must be a DatetimeIndex.")
-        if not all(col in data.columns for col in ['Open', 'High', 'Low', 'Close', 'Volume']):
-            raise ValueError("Data DataFrame must contain 'Open', 'High', 'Low', 'Close', 'Volume' columns.")
-        
-        self.data = data.sort_index()
+    def __init__(self, data:Union[pd.DataFrame, MarketDataset],strategy:Type[BaseStrategy],initial_capital:float,commission_per_share:float,slippage_bps:float,symbols:list[str],use_kernel:bool = False,
+                 checkpoint_path:Optional[str] = None,checkpoint_every:int = 0,event_log:Optional[EventLog] = None):
+        # Validation, sorting and date indexing happen once per dataset, not once per Backtester
+        self.dataset = MarketDataset.from_frame(data)
+        self.data = self.dataset.frame
 
         if not issubclass(strategy, BaseStrategy):
             raise ValueError("Strategy must be a class inheriting from BaseStrategy.")
@@ -33,35 +36,225 @@ class Backtester:
         self.commission_per_share = commission_per_share
         self.slippage_bps = slippage_bps
         self.symbols = symbols
+        # Run strategies that provide a kernel_spec through engine.kernels (Numba-compiled when installed)
+        self.use_kernel = use_kernel
+        # With a checkpoint_path, run() resumes from that file and rewrites it every checkpoint_every timestamps
+        if checkpoint_every < 0:
+            raise ValueError("Checkpoint interval cannot be negative.")
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
 
         self.portfolio:Portfolio = None
         self.broker:Broker = None
         self.strategy_instance: BaseStrategy = None
+        self.cursor = 0
+        self.metrics = OnlineMetrics()
+        # Warnings, errors and strategy events of this run; a fresh log is created per run unless one is passed in
+        self.event_log = event_log if event_log is not None else EventLog()
+        self._owns_event_log = event_log is None
+        # Last prices carried in from bars before this dataset, set when a saved run is extended
+        self.initial_prices: Dict[str, float] = {}
+        self._initial_strategy_state: Optional[str] = None
 
-    def run(self):
+    def reset(self):
+        """Fresh portfolio and broker with the cursor at the first timestamp."""
         self.portfolio = Portfolio(initial_capital=self.initial_capital)
         self.broker = Broker(commission_per_share=self.commission_per_share,slippage_bps=self.slippage_bps)
+        self.cursor = 0
+        self.metrics = OnlineMetrics()
+        if self._owns_event_log:
+            self.event_log = EventLog()
+        self.initial_prices = {}
+        self._event_scheduler = None
+        self.strategy_instance.bind_dataset(self.dataset)
+        self._initial_strategy_state = repr(sorted(self.strategy_instance.get_state().items()))
+
+    def run(self):
+        self.reset()
         #self.strategy_instance = self.strategy_class()
-        unique_dates = self.data.index.get_level_values('Date').unique().sort_values()
-        for current_date in unique_dates:
-            day_data = self.data.loc[current_date]
-            current_prices = day_data['Close'].to_dict()
-            try:
-                self.strategy_instance.on_data(
-                    current_timestamp=current_date,
-                    data_for_day=day_data,
-                    portfolio=self.portfolio,
-                    broker=self.broker
-                )
-            except Exception as e:
-                print(f"Error in strategy.on_data for {self.symbols} at {current_date}: {e}")
-                break 
-            self.portfolio.record_equity(current_date, current_prices)
-        trade_count = len(self.portfolio.trades)
+        if self.checkpoint_path and self.load_checkpoint(self.checkpoint_path):
+            self.event_log.info('checkpoint_resumed', f"Resuming backtest from {self.checkpoint_path} at {self.cursor}/{len(self.dataset)} timestamps.")
+        elif self.use_kernel:
+            kernel_spec = self.strategy_instance.kernel_spec()
+            result = run_kernel(kernel_spec, self.dataset, self.initial_capital, self.commission_per_share, self.slippage_bps) if kernel_spec else None
+            if result is not None:
+                self.portfolio, self.strategy_instance.position = result
+                self.cursor = len(self.dataset)
+                self.metrics.update_from(self.portfolio.equity_curve_data)
+                return self.portfolio
+        portfolio = self.run_until(len(self.dataset))
+        self.metrics.update_from(portfolio.equity_curve_data)
+        # A finished run has nothing left to resume
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        return portfolio
+
+    def run_until(self, stop: int) -> Portfolio:
+        """
+        Processes timestamps from the current cursor up to (not including) position `stop`
+        and returns the portfolio, so a run can be advanced in stages or resumed from a
+        checkpoint. A strategy error ends the run: the cursor jumps to the end of the data.
+        """
+        if self.portfolio is None:
+            self.reset()
+        stop = min(stop, len(self.dataset))
+        # Symbols only appear on the timestamps they have bars for; positions are valued at each symbol's last close
+        scheduler = self._scheduler
+        with self.event_log.activate():
+            for current_date, day_data in scheduler.iter_steps(self.cursor, stop):
+                try:
+                    self.strategy_instance.on_data(
+                        current_timestamp=current_date,
+                        data_for_day=day_data,
+                        portfolio=self.portfolio,
+                        broker=self.broker
+                    )
+                except Exception as e:
+                    self.event_log.error('strategy_error', f"Error in strategy.on_data for {self.symbols} at {current_date}: {e}",
+                                         timestamp=current_date, exception=type(e).__name__)
+                    self.cursor = len(self.dataset)
+                    break 
+                self.portfolio.record_equity(current_date, scheduler.last_prices)
+                self.cursor += 1
+                if self.checkpoint_path and self.checkpoint_every and self.cursor % self.checkpoint_every == 0 and self.cursor < len(self.dataset):
+                    self.save_checkpoint(self.checkpoint_path)
         return self.portfolio
 
-    
+    @property
+    def _scheduler(self) -> EventScheduler:
+        if getattr(self, '_event_scheduler', None) is None:
+            self._event_scheduler = EventScheduler(self.dataset, initial_prices=self.initial_prices)
+        return self._event_scheduler
 
-        
+    def checkpoint(self) -> Dict[str, Any]:
+        """Picklable snapshot of the run: cursor, portfolio, broker settings and strategy state."""
+        return {
+            'cursor': self.cursor,
+            'portfolio': self.portfolio.get_state(),
+            'broker': {'commission_per_share': self.broker.commission_per_share, 'slippage_bps': self.broker.slippage_bps},
+            'strategy_state': self.strategy_instance.get_state(),
+        }
+
+    def restore(self, checkpoint: Dict[str, Any]):
+        """Continues from a checkpoint() taken on a Backtester over the same dataset and strategy."""
+        self.portfolio = Portfolio.from_state(checkpoint['portfolio'])
+        self.broker = Broker(**checkpoint['broker'])
+        self.cursor = checkpoint['cursor']
+        self.strategy_instance.set_state(checkpoint['strategy_state'])
+        self.strategy_instance.bind_dataset(self.dataset)
+
+    def _checkpoint_fingerprint(self) -> Dict[str, Any]:
+        """Identifies the run a checkpoint file belongs to, so a stale file is never resumed."""
+        return {
+            'data_version': self.dataset.version,
+            'strategy': f"{self.strategy_class.__module__}.{self.strategy_class.__name__}",
+            'strategy_state': self._initial_strategy_state,
+            'initial_capital': self.initial_capital,
+            'commission_per_share': self.commission_per_share,
+            'slippage_bps': self.slippage_bps,
+        }
+
+    def save_checkpoint(self, path: str):
+        """Writes checkpoint() to path atomically: a crash mid-write leaves the previous checkpoint intact."""
+        _atomic_pickle(path, {'fingerprint': self._checkpoint_fingerprint(), 'checkpoint': self.checkpoint()})
+
+    def summary(self, risk_free_rate=0.0, annualization_factor=252) -> Dict[str, Any]:
+        """Performance summary of everything run so far, from the online metrics (no pass over the equity curve)."""
+        self.metrics.update_from(self.portfolio.equity_curve_data)
+        return self.metrics.summary(risk_free_rate=risk_free_rate, annualization_factor=annualization_factor, trade_count=len(self.portfolio.trades))
+
+    def extend(self, new_data: Union[pd.DataFrame, MarketDataset]) -> Portfolio:
+        """
+        Continues a finished (or restored) run over the bars in new_data dated after the last
+        processed timestamp, appending to the same portfolio, trades and online metrics. Only
+        the new bars are processed; positions are valued from the last prices of the previous
+        data until their symbols trade again. Indicators the strategy derives from the bound
+        dataset (e.g. higher_timeframe_bars) only see the new bars.
+        """
+        if self.portfolio is None:
+            raise ValueError("extend() needs a completed run or one restored with from_state().")
+        new_dataset = MarketDataset.from_frame(new_data)
+        last_prices = self._scheduler.prices_before(self.cursor)
+        if self.portfolio.equity_curve_data:
+            last_timestamp = pd.Timestamp(self.portfolio.equity_curve_data[-1][0])
+            start = int(np.searchsorted(new_dataset.dates.asi8, last_timestamp.value, side='right'))
+        else:
+            start = 0
+        if start >= len(new_dataset):
+            return self.portfolio
+
+        self.dataset = new_dataset.slice(start, len(new_dataset)) if start else new_dataset
+        self.data = self.dataset.frame
+        self.initial_prices = last_prices
+        self._event_scheduler = None
+        self.cursor = 0
+        self.strategy_instance.bind_dataset(self.dataset)
+        portfolio = self.run_until(len(self.dataset))
+        self.metrics.update_from(portfolio.equity_curve_data)
+        return portfolio
+
+    def save_state(self, path: str):
+        """Persists a finished run so it can later be continued with from_state() and new bars."""
+        self.metrics.update_from(self.portfolio.equity_curve_data)
+        _atomic_pickle(path, {
+            'strategy': f"{self.strategy_class.__module__}.{self.strategy_class.__name__}",
+            'settings': {
+                'initial_capital': self.initial_capital,
+                'commission_per_share': self.commission_per_share,
+                'slippage_bps': self.slippage_bps,
+                'symbols': self.symbols,
+            },
+            'checkpoint': self.checkpoint(),
+            'last_prices': self._scheduler.prices_before(self.cursor),
+            'metrics': self.metrics.get_state(),
+        })
+
+    @classmethod
+    def from_state(cls, path: str, strategy: Type[BaseStrategy], new_data: Union[pd.DataFrame, MarketDataset]) -> "Backtester":
+        """Loads a run saved with save_state() and extends it with new_data. The result matches a full re-run."""
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        if payload['strategy'] != f"{strategy.__module__}.{strategy.__name__}":
+            raise ValueError(f"Saved state at {path} is for strategy {payload['strategy']}, not {strategy.__name__}.")
+        backtester = cls(new_data, strategy, symbols=payload['settings'].pop('symbols'), **payload['settings'])
+        # The strategy is rebuilt entirely from its saved state rather than from constructor arguments
+        backtester.strategy_instance = strategy.__new__(strategy)
+        backtester.restore(payload['checkpoint'])
+        backtester.metrics = OnlineMetrics.from_state(payload['metrics'])
+        backtester.initial_prices = payload['last_prices']
+        backtester._event_scheduler = None
+        backtester.cursor = 0
+        backtester.extend(new_data)
+        return backtester
+
+    def load_checkpoint(self, path: str) -> bool:
+        """Restores from a checkpoint file if it exists and belongs to this run. Returns True if resumed."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                payload = pickle.load(f)
+        except Exception as e:
+            self.event_log.warning('checkpoint_unreadable', f"Ignoring unreadable checkpoint {path}: {e}")
+            return False
+        if payload.get('fingerprint') != self._checkpoint_fingerprint():
+            self.event_log.warning('checkpoint_mismatch', f"Checkpoint {path} belongs to a different run. Starting from the first bar.")
+            return False
+        self.restore(payload['checkpoint'])
+        return True
 
-        
\ No newline at end of file
+def _atomic_pickle(path: str, payload: Any):
+    """Pickles payload to a temporary file next to path and renames it into place."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
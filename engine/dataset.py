@@ -0,0 +1,152 @@
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Tuple
+
+from utils.data_loader import data_quality_report, quality_columns, resample_ohlcv
+from utils.event_log import emit
+
+REQUIRED_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+class MarketDataset:
+    """
+    A validated, sorted OHLCV panel that is prepared once and shared by reference.
+
+    Validation, sorting and the per-date row boundaries are computed a single time
+    in the constructor, so any number of Backtesters can run over the same dataset
+    without re-checking or copying it. Treat the underlying frame as read-only.
+    Frames that did not come through load_historical_data get the Valid and Mark
+    quality columns added here.
+    """
+    def __init__(self, data: pd.DataFrame):
+        if not isinstance(data, pd.DataFrame) or data.empty:
+            raise ValueError("Input data must be a non-empty Pandas DataFrame.")
+        if not isinstance(data.index, pd.MultiIndex) or 'Date' not in data.index.names or 'Symbol' not in data.index.names:
+            raise ValueError("Data index must be a Pandas MultiIndex with 'Date' and 'Symbol' levels.")
+        if not isinstance(data.index.get_level_values('Date'), pd.DatetimeIndex):
+            raise ValueError("The 'Date' level of the MultiIndex must be a DatetimeIndex.")
+        if not all(col in data.columns for col in REQUIRED_COLUMNS):
+            raise ValueError("Data DataFrame must contain 'Open', 'High', 'Low', 'Close', 'Volume' columns.")
+
+        # load_historical_data already returns sorted data, so only pay for a sort when needed
+        if list(data.index.names) != ['Date', 'Symbol']:
+            data = data.reorder_levels(['Date', 'Symbol'])
+        if data.index.has_duplicates:
+            duplicated = data.index.duplicated(keep='last')
+            emit(logging.WARNING, 'duplicate_bars', f"Dropping {int(duplicated.sum())} duplicate (Date, Symbol) bars, keeping the last of each.",
+                 duplicates=int(duplicated.sum()))
+            data = data[~duplicated]
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index()
+        self._prepare(data)
+
+    @classmethod
+    def from_frame(cls, data) -> "MarketDataset":
+        """Returns data unchanged if it is already a MarketDataset, otherwise prepares it."""
+        if isinstance(data, MarketDataset):
+            return data
+        return cls(data)
+
+    @classmethod
+    def _from_sorted(cls, data: pd.DataFrame) -> "MarketDataset":
+        """Builds a dataset from a frame already known to be valid and sorted (e.g. a slice of one)."""
+        dataset = cls.__new__(cls)
+        dataset._prepare(data)
+        return dataset
+
+    def _prepare(self, data: pd.DataFrame):
+        if 'Valid' not in data.columns or 'Mark' not in data.columns:
+            data = quality_columns(data)
+        self._frame = data
+        date_values = data.index.get_level_values('Date')
+        # Row offsets where each date's block starts, plus the final end offset
+        starts = np.flatnonzero(date_values[1:] != date_values[:-1]) + 1
+        self._bounds = np.concatenate(([0], starts, [len(data)]))
+        self._dates = pd.DatetimeIndex(date_values[self._bounds[:-1]], name='Date')
+        # Per-day slices are taken from a Symbol-indexed view, matching what data.loc[date] returns
+        self._by_symbol = data.droplevel('Date')
+        self._symbols = data.index.get_level_values('Symbol').unique().tolist()
+        self._symbol_frames: Dict[str, pd.DataFrame] = {}
+        self._resampled: Dict[str, "MarketDataset"] = {}
+        self._bar_close_times: Dict[Tuple[str, str], np.ndarray] = {}
+        self._version: str = None
+        self._quality_report: Dict = None
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        return self._frame
+
+    @property
+    def dates(self) -> pd.DatetimeIndex:
+        return self._dates
+
+    @property
+    def symbols(self) -> List[str]:
+        return self._symbols
+
+    @property
+    def version(self) -> str:
+        """Content hash of the index and OHLCV values, used to key caches derived from this data."""
+        if self._version is None:
+            row_hashes = pd.util.hash_pandas_object(self._frame[REQUIRED_COLUMNS], index=True).to_numpy()
+            self._version = hashlib.sha256(row_hashes.tobytes()).hexdigest()[:16]
+        return self._version
+
+    @property
+    def quality_report(self) -> Dict:
+        """utils.data_loader.data_quality_report of this dataset, computed once."""
+        if self._quality_report is None:
+            self._quality_report = data_quality_report(self._frame)
+        return self._quality_report
+
+    @property
+    def empty(self) -> bool:
+        return self._frame.empty
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def day(self, position: int) -> pd.DataFrame:
+        """Bars for the date at the given position, indexed by Symbol."""
+        return self._by_symbol.iloc[self._bounds[position]:self._bounds[position + 1]]
+
+    def iter_days(self, start: int = 0, stop: int = None) -> Iterator[Tuple[pd.Timestamp, pd.DataFrame]]:
+        stop = len(self._dates) if stop is None else stop
+        for position in range(start, stop):
+            yield self._dates[position], self.day(position)
+
+    def symbol_frame(self, symbol: str) -> pd.DataFrame:
+        """Date-indexed OHLCV for a single symbol, computed once and cached."""
+        if symbol not in self._symbol_frames:
+            self._symbol_frames[symbol] = self._frame.xs(symbol, level='Symbol')
+        return self._symbol_frames[symbol]
+
+    def slice(self, start: int, stop: int) -> "MarketDataset":
+        """Dataset restricted to the dates in positions [start, stop), sharing the parent's rows."""
+        if start < 0 or stop > len(self._dates) or start >= stop:
+            raise ValueError(f"Invalid date slice [{start}, {stop}) for dataset with {len(self._dates)} dates.")
+        return MarketDataset._from_sorted(self._frame.iloc[self._bounds[start]:self._bounds[stop]])
+
+    def resample(self, interval: str) -> "MarketDataset":
+        """Coarser bars (e.g. '1h', '1d', '1wk') built from this dataset's bars, computed once per interval."""
+        if interval not in self._resampled:
+            self._resampled[interval] = MarketDataset._from_sorted(resample_ohlcv(self._frame[REQUIRED_COLUMNS], interval))
+        return self._resampled[interval]
+
+    def bars_asof(self, interval: str, symbol: str, timestamp: pd.Timestamp) -> pd.DataFrame:
+        """
+        Completed coarse bars for a symbol as seen at `timestamp` on this dataset's base bars.
+        A coarse bar becomes visible once its last base bar has been reached, so a strategy
+        calling this from on_data never sees a partially formed (look-ahead) bar.
+        """
+        coarse = self.resample(interval).symbol_frame(symbol)
+        key = (interval, symbol)
+        if key not in self._bar_close_times:
+            base_times = self.symbol_frame(symbol).index.asi8
+            bucket = np.searchsorted(coarse.index.asi8, base_times, side='right') - 1
+            # Close time of each coarse bar = timestamp of the last base bar in its bucket
+            last_in_bucket = np.flatnonzero(np.append(bucket[1:] != bucket[:-1], True))
+            self._bar_close_times[key] = base_times[last_in_bucket]
+        visible = np.searchsorted(self._bar_close_times[key], pd.Timestamp(timestamp).value, side='right')
+        return coarse.iloc[:visible]
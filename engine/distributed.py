@@ -0,0 +1,184 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.event_log import emit
+from utils.work_queue import DirectoryWorkQueue
+
+def expand_tasks(config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    One task payload per backtest in an experiments config. An experiment with a 'grid'
+    section (parameter name -> list of values) becomes one task per combination, merged
+    over its strategy parameters and named after the combination.
+    """
+    tasks = []
+    for i, experiment_config in enumerate(config.get('experiments', [])):
+        name = experiment_config.get('name', f"Experiment_{i+1}")
+        strategy_config = experiment_config.get('strategy', {})
+        base = {
+            'data': experiment_config.get('data', {}),
+            'broker_settings': experiment_config.get('broker_settings', {}),
+            'portfolio_settings': experiment_config.get('portfolio_settings', {}),
+        }
+        grid = experiment_config.get('grid') or {}
+        keys = sorted(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            overrides = dict(zip(keys, values))
+            label = f"{name}[{', '.join(f'{key}={value}' for key, value in overrides.items())}]" if overrides else name
+            tasks.append({**base, 'name': label, 'strategy': {'name': strategy_config.get('name'),
+                                                              'parameters': {**strategy_config.get('parameters', {}), **overrides}}})
+    return tasks
+
+def execute_task(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Runs one task's backtest on this host (bars come from its local data cache) and returns the summary row."""
+    from engine.dataset import MarketDataset
+    from engine.metrics import Metrics
+    from engine.runner import annualization_factor_for, run_strategy
+    from engine.trade_analytics import trade_summary
+    from utils.data_loader import load_historical_data
+
+    data_config = payload['data']
+    interval = data_config.get('interval', '1d')
+    market_data = load_historical_data(data_config['symbols'], data_config['start_date'], data_config['end_date'], interval)
+    if market_data.empty:
+        raise ValueError(f"No data loaded for {data_config['symbols']} from {data_config['start_date']} to {data_config['end_date']}.")
+    dataset = MarketDataset(market_data)
+    portfolio = run_strategy(
+        dataset,
+        payload['strategy']['name'],
+        payload['strategy'].get('parameters', {}),
+        data_config['symbols'],
+        initial_capital=payload['portfolio_settings'].get('initial_capital', 100000.0),
+        commission_per_share=payload['broker_settings'].get('commission_per_share', 0.0),
+        slippage_bps=payload['broker_settings'].get('slippage_bps', 0.0)
+    )
+    summary = Metrics.performance_summary(portfolio.get_equity_curve(), risk_free_rate=0, annualization_factor=annualization_factor_for(interval),
+                                          trade_count=len(portfolio.trades))
+    summary.update(trade_summary(portfolio.trades, dataset.frame))
+    summary['Experiment Name'] = payload['name']
+    return summary
+
+def task_version(payload: Dict[str, Any], run: str, resume: bool) -> str:
+    """
+    The part of a task's key that is not its configuration. A fresh run gets its own tasks;
+    a resumed one keys them by the hash of the strategy's source instead, so an edited
+    strategy runs again. A date range reaching today or later can still gain bars, so its
+    tasks are never shared across runs.
+    """
+    if not resume or pd.Timestamp(payload['data']['end_date']) > pd.Timestamp.now().normalize():
+        return run
+    from engine.runner import resolve_strategy
+    from utils.strategy_loader import strategy_source_hash
+    return strategy_source_hash(resolve_strategy(payload['strategy']['name']))
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def run_worker(queue_dir: str, worker_id: Optional[str] = None, poll_interval: float = 1.0, idle_timeout: Optional[float] = None,
+               lease_seconds: float = 300.0, max_attempts: int = 3,
+               execute: Callable[[Dict[str, Any]], Dict[str, Any]] = execute_task) -> int:
+    """
+    Pulls tasks from a DirectoryWorkQueue and runs them with execute (a module-level function,
+    so it can be handed to worker processes) until the queue is closed or nothing has been
+    pending for idle_timeout seconds. While a task runs its lease is renewed in the background;
+    a task that raises is handed back to the queue for a retry. Returns the number of tasks
+    this worker completed.
+    """
+    queue = DirectoryWorkQueue(queue_dir, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    worker_id = worker_id or default_worker_id()
+    completed = 0
+    idle_since = time.monotonic()
+    while True:
+        task = queue.claim(worker_id)
+        if task is None:
+            if queue.closed or (idle_timeout is not None and time.monotonic() - idle_since > idle_timeout):
+                break
+            time.sleep(poll_interval)
+            continue
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=_renew_lease, args=(queue, task['id'], stop_heartbeat), daemon=True)
+        heartbeat.start()
+        start = time.perf_counter()
+        try:
+            summary = execute(task['payload'])
+        except Exception as e:
+            state = queue.fail(task['id'], f"{worker_id}: {type(e).__name__}: {e}")
+            emit(logging.WARNING, 'task_failed', f"Task {task['payload'].get('name')} failed on {worker_id}: {e} (now {state}).",
+                 task=task['id'], worker=worker_id)
+        else:
+            queue.complete(task['id'], {'summary': summary, 'worker': worker_id, 'seconds': time.perf_counter() - start})
+            completed += 1
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        idle_since = time.monotonic()
+    return completed
+
+def _renew_lease(queue: DirectoryWorkQueue, task: str, stop: threading.Event):
+    while not stop.wait(queue.lease_seconds / 3):
+        if not queue.heartbeat(task):
+            return
+
+def run_coordinator(config: Dict[str, Any], queue_dir: str, local_workers: int = 0, poll_interval: float = 1.0,
+                    lease_seconds: float = 300.0, max_attempts: int = 3, timeout: Optional[float] = None,
+                    on_result: Optional[Callable[[Dict[str, Any]], None]] = None, resume: bool = False,
+                    execute: Callable[[Dict[str, Any]], Dict[str, Any]] = execute_task) -> Dict[str, Any]:
+    """
+    Shards a config into tasks on a DirectoryWorkQueue and collects the summaries workers
+    stream back, calling on_result as each one arrives. Workers can be started on any host
+    that sees queue_dir (`main.py worker <queue_dir>`); local_workers more are started here
+    as processes. Expired leases are requeued while waiting. Returns {'results': summary
+    rows in config order, 'failed': {task name: errors}} once every task is done or failed,
+    then closes the queue so workers exit.
+
+    Tasks are keyed per run (see task_version), so results an earlier coordination left in
+    queue_dir are only reused with resume, and then only while the strategy code and the
+    data are unchanged.
+    """
+    queue = DirectoryWorkQueue(queue_dir, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    queue.reopen()
+    run = uuid.uuid4().hex
+    names = {}
+    for payload in expand_tasks(config):
+        task, _ = queue.put({**payload, 'version': task_version(payload, run, resume)})
+        names[task] = payload['name']
+
+    processes = [multiprocessing.Process(target=run_worker, args=(queue_dir, f"{default_worker_id()}-local{i}", poll_interval, None, lease_seconds, max_attempts, execute))
+                 for i in range(local_workers)]
+    for process in processes:
+        process.start()
+
+    results, seen = {}, set()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        while True:
+            for task, result in queue.results(seen):
+                if task in names and task not in results:
+                    results[task] = result['summary']
+                    if on_result is not None:
+                        on_result(result['summary'])
+            failed = {task: record for task, record in queue.failures().items() if task in names}
+            if all(task in results or task in failed for task in names):
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                emit(logging.WARNING, 'coordinator_timeout', f"Stopped waiting with {len(names) - len(results) - len(failed)} tasks unfinished.")
+                break
+            queue.requeue_expired()
+            time.sleep(poll_interval)
+    finally:
+        queue.close()
+        for process in processes:
+            process.join()
+    return {
+        'results': [results[task] for task in names if task in results],
+        'failed': {names[task]: record['errors'] for task, record in failed.items() if record is not None},
+    }
@@ -0,0 +1,295 @@
+import numpy as np
+from typing import Optional, Tuple
+
+from engine.dataset import MarketDataset
+from engine.portfolio import Portfolio
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit: kernels run as plain Python when Numba is not installed."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda function: function
+
+# Kernel outputs: per-bar equity plus one row per recorded trade
+TRADE_BUY, TRADE_SELL = 1, -1
+
+@njit(cache=True)
+def _pairwise_sum(values, start, n):
+    """Sum of values[start:start + n] in exactly the order NumPy's pairwise float64 summation uses."""
+    if n < 8:
+        total = 0.0
+        for i in range(start, start + n):
+            total += values[i]
+        return total
+    elif n <= 128:
+        r0 = values[start]
+        r1 = values[start + 1]
+        r2 = values[start + 2]
+        r3 = values[start + 3]
+        r4 = values[start + 4]
+        r5 = values[start + 5]
+        r6 = values[start + 6]
+        r7 = values[start + 7]
+        i = 8
+        while i < n - (n % 8):
+            r0 += values[start + i]
+            r1 += values[start + i + 1]
+            r2 += values[start + i + 2]
+            r3 += values[start + i + 3]
+            r4 += values[start + i + 4]
+            r5 += values[start + i + 5]
+            r6 += values[start + i + 6]
+            r7 += values[start + i + 7]
+            i += 8
+        total = ((r0 + r1) + (r2 + r3)) + ((r4 + r5) + (r6 + r7))
+        while i < n:
+            total += values[start + i]
+            i += 1
+        return total
+    half = n // 2
+    half -= half % 8
+    return _pairwise_sum(values, start, half) + _pairwise_sum(values, start + half, n - half)
+
+@njit(cache=True)
+def _wilder_averages(prices, start, n, alpha):
+    """
+    Last value of gains/losses .ewm(alpha=alpha, adjust=False).mean() over prices[start:start + n],
+    following pandas' recursion step for step so results match the strategy bit for bit.
+    """
+    decay = 1.0 - alpha
+    avg_gain = np.nan
+    avg_loss = np.nan
+    for i in range(start + 1, start + n):
+        change = prices[i] - prices[i - 1]
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        if i == start + 1:
+            avg_gain = gain
+            avg_loss = loss
+            continue
+        if avg_gain != gain:
+            avg_gain = (decay * avg_gain + alpha * gain) / (decay + alpha)
+        if avg_loss != loss:
+            avg_loss = (decay * avg_loss + alpha * loss) / (decay + alpha)
+    return avg_gain, avg_loss
+
+@njit(cache=True)
+def _fill(side, price, quantity, cash, holding, avg_entry_price, commission_per_share, slippage_factor):
+    """Broker.execute_order + Portfolio.process_trade for one order. Returns the new state and whether a trade was recorded."""
+    if side == TRADE_BUY:
+        fill_price = price * (1 + slippage_factor)
+    else:
+        fill_price = price * (1 - slippage_factor)
+    commission = quantity * commission_per_share
+    trade_value = quantity * fill_price
+    realized_pnl = 0.0
+    if side == TRADE_BUY:
+        cash -= (trade_value + commission)
+        if cash < 0:
+            return cash, holding, avg_entry_price, fill_price, commission, realized_pnl, False
+        holding = quantity
+        avg_entry_price = fill_price
+    else:
+        cash += (trade_value - commission)
+        realized_pnl = (fill_price - avg_entry_price) * quantity
+        cash += realized_pnl
+        holding = 0
+    return cash, holding, avg_entry_price, fill_price, commission, realized_pnl, True
+
+@njit(cache=True)
+def sma_crossover_kernel(close, short_window, long_window, initial_capital, commission_per_share, slippage_bps):
+    """SMACrossoverStrategy over one symbol's closes, including the portfolio accounting."""
+    n = len(close)
+    equity = np.empty(n)
+    trade_bars = np.empty(n, dtype=np.int64)
+    trade_sides = np.empty(n, dtype=np.int64)
+    trade_quantities = np.empty(n, dtype=np.int64)
+    trade_prices = np.empty(n)
+    trade_commissions = np.empty(n)
+    trade_pnls = np.empty(n)
+    n_trades = 0
+
+    prices = np.empty(n)
+    n_prices = 0
+    slippage_factor = slippage_bps / 10000.0
+    cash = initial_capital
+    holding = 0
+    avg_entry_price = 0.0
+    position = 0
+    has_last = False
+    mark = 0.0
+    last_short = 0.0
+    last_long = 0.0
+
+    for i in range(n):
+        price = close[i]
+        if not (np.isnan(price) or price <= 0):
+            mark = price
+            prices[n_prices] = price
+            n_prices += 1
+            if n_prices >= long_window:
+                short_sma = _pairwise_sum(prices, n_prices - short_window, short_window) / short_window
+                long_sma = _pairwise_sum(prices, n_prices - long_window, long_window) / long_window
+                side = 0
+                quantity = 0
+                if short_sma > long_sma and (has_last and last_short <= last_long):
+                    if position == 0:
+                        quantity = int(cash / (price * 1.005))
+                        if quantity > 0:
+                            side = TRADE_BUY
+                            position = 1
+                elif long_sma > short_sma and (has_last and last_long <= last_short):
+                    if position == 1:
+                        quantity = holding
+                        if quantity > 0:
+                            side = TRADE_SELL
+                            position = 0
+                if side != 0:
+                    cash, holding, avg_entry_price, fill_price, commission, realized_pnl, recorded = _fill(
+                        side, price, quantity, cash, holding, avg_entry_price, commission_per_share, slippage_factor)
+                    if recorded:
+                        trade_bars[n_trades] = i
+                        trade_sides[n_trades] = side
+                        trade_quantities[n_trades] = quantity
+                        trade_prices[n_trades] = fill_price
+                        trade_commissions[n_trades] = commission
+                        trade_pnls[n_trades] = realized_pnl
+                        n_trades += 1
+                last_short = short_sma
+                last_long = long_sma
+                has_last = True
+        # Positions are valued at the last valid close, like the dataset's Mark column
+        equity[i] = cash + (0.0 + holding * mark) if holding > 0 else cash
+
+    return (equity, trade_bars[:n_trades], trade_sides[:n_trades], trade_quantities[:n_trades], trade_prices[:n_trades],
+            trade_commissions[:n_trades], trade_pnls[:n_trades], cash, holding, avg_entry_price, position)
+
+@njit(cache=True)
+def rsi_kernel(close, period, oversold_threshold, overbought_threshold, initial_capital, commission_per_share, slippage_bps):
+    """RSIStrategy over one symbol's closes, including the portfolio accounting."""
+    n = len(close)
+    equity = np.empty(n)
+    trade_bars = np.empty(n, dtype=np.int64)
+    trade_sides = np.empty(n, dtype=np.int64)
+    trade_quantities = np.empty(n, dtype=np.int64)
+    trade_prices = np.empty(n)
+    trade_commissions = np.empty(n)
+    trade_pnls = np.empty(n)
+    n_trades = 0
+
+    prices = np.empty(n)
+    n_prices = 0
+    alpha = 1.0 / (1.0 + float(period - 1))
+    slippage_factor = slippage_bps / 10000.0
+    cash = initial_capital
+    holding = 0
+    avg_entry_price = 0.0
+    position = 0
+    has_last = False
+    mark = 0.0
+    last_rsi = 0.0
+
+    for i in range(n):
+        price = close[i]
+        if not (np.isnan(price) or price <= 0):
+            mark = price
+            prices[n_prices] = price
+            n_prices += 1
+            if n_prices >= period + 1:
+                window = min(n_prices, 2 * period)
+                avg_gain, avg_loss = _wilder_averages(prices, n_prices - window, window, alpha)
+                valid = True
+                current_rsi = 0.0
+                if avg_loss == 0 and avg_gain == 0:
+                    valid = False
+                elif avg_loss == 0:
+                    current_rsi = 100.0
+                else:
+                    rs = avg_gain / avg_loss
+                    if rs == np.inf:
+                        current_rsi = 100.0
+                    elif np.isnan(rs):
+                        valid = False
+                    else:
+                        current_rsi = 100 - (100 / (1 + rs))
+                if valid:
+                    side = 0
+                    quantity = 0
+                    if current_rsi > oversold_threshold and (has_last and last_rsi <= oversold_threshold):
+                        if position == 0:
+                            quantity = int(cash / (price * 1.005))
+                            if quantity > 0:
+                                side = TRADE_BUY
+                                position = 1
+                    elif current_rsi < overbought_threshold and (has_last and last_rsi >= overbought_threshold):
+                        if position == 1:
+                            quantity = holding
+                            if quantity > 0:
+                                side = TRADE_SELL
+                                position = 0
+                    if side != 0:
+                        cash, holding, avg_entry_price, fill_price, commission, realized_pnl, recorded = _fill(
+                            side, price, quantity, cash, holding, avg_entry_price, commission_per_share, slippage_factor)
+                        if recorded:
+                            trade_bars[n_trades] = i
+                            trade_sides[n_trades] = side
+                            trade_quantities[n_trades] = quantity
+                            trade_prices[n_trades] = fill_price
+                            trade_commissions[n_trades] = commission
+                            trade_pnls[n_trades] = realized_pnl
+                            n_trades += 1
+                    last_rsi = current_rsi
+                    has_last = True
+        # Positions are valued at the last valid close, like the dataset's Mark column
+        equity[i] = cash + (0.0 + holding * mark) if holding > 0 else cash
+
+    return (equity, trade_bars[:n_trades], trade_sides[:n_trades], trade_quantities[:n_trades], trade_prices[:n_trades],
+            trade_commissions[:n_trades], trade_pnls[:n_trades], cash, holding, avg_entry_price, position)
+
+KERNELS = {
+    'sma_crossover': sma_crossover_kernel,
+    'rsi': rsi_kernel,
+}
+
+def run_kernel(kernel_spec: Tuple[str, str, tuple], dataset: MarketDataset, initial_capital: float,
+               commission_per_share: float, slippage_bps: float) -> Optional[Tuple[Portfolio, int]]:
+    """
+    Runs a strategy's compiled kernel over its target symbol and rebuilds the Portfolio the
+    Python path would have produced: the same trades, cash, positions and an equity point at
+    every dataset timestamp. Returns (portfolio, final strategy position), or None when the
+    kernel cannot be used and the caller should fall back to the Python loop.
+    """
+    name, symbol, params = kernel_spec
+    if name not in KERNELS or symbol not in dataset.symbols:
+        return None
+    bars = dataset.symbol_frame(symbol)
+    close = bars['Close'].to_numpy(dtype=float)
+    (equity, trade_bars, trade_sides, trade_quantities, trade_prices, trade_commissions, trade_pnls,
+     cash, holding, avg_entry_price, position) = KERNELS[name](close, *params, float(initial_capital), float(commission_per_share), float(slippage_bps))
+
+    portfolio = Portfolio(initial_capital=initial_capital)
+    portfolio.cash = float(cash)
+    if holding > 0:
+        portfolio.positions[symbol] = {'quantity': int(holding), 'avg_entry_price': float(avg_entry_price)}
+    bar_times = bars.index
+    portfolio.trades = [{
+        'timestamp': bar_times[bar],
+        'symbol': symbol,
+        'type': 'BUY' if side == TRADE_BUY else 'SELL',
+        'quantity': int(quantity),
+        'price': float(price),
+        'commission': float(commission),
+        'realized_pnl': float(pnl),
+    } for bar, side, quantity, price, commission, pnl in zip(trade_bars, trade_sides, trade_quantities, trade_prices, trade_commissions, trade_pnls)]
+
+    # Between the target symbol's bars its equity carries forward; before its first bar nothing is held
+    latest = np.searchsorted(bar_times.asi8, dataset.dates.asi8, side='right') - 1
+    values = np.where(latest >= 0, equity[np.maximum(latest, 0)], float(initial_capital))
+    portfolio.equity_curve_data = list(zip(dataset.dates, values.tolist()))
+    return portfolio, int(position)
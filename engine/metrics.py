@@ -64,7 +64,6 @@ class Metrics:
         if returns.empty:
             return metrics
         
-        print(returns)
         total_return = ((equity_curve.iloc[-1]/equity_curve.iloc[0])-1)*100
         metrics['Total Return(%)'] = total_return
 
@@ -103,3 +102,91 @@ class Metrics:
 
     
 
+
+class OnlineMetrics:
+    """
+    Running equivalent of Metrics.performance_summary that is updated one equity point at a
+    time, so extending a finished backtest with new bars costs O(new bars). Return mean and
+    variance use Welford's algorithm; drawdown tracks the running peak. Zero and NaN equity
+    values are skipped, as performance_summary drops them.
+    """
+    def __init__(self):
+        self.points_consumed = 0
+        self.first_timestamp = None
+        self.first_value = np.nan
+        self.last_timestamp = None
+        self.last_value = np.nan
+        self.n_returns = 0
+        self.mean_return = 0.0
+        self.m2 = 0.0
+        self.winning = 0
+        self.losing = 0
+        self.peak = np.nan
+        self.min_drawdown = 0.0
+
+    def update(self, timestamp: pd.Timestamp, value: float):
+        if value == 0 or np.isnan(value):
+            return
+        if self.first_timestamp is None:
+            self.first_timestamp, self.first_value, self.peak = timestamp, value, value
+        else:
+            period_return = value / self.last_value - 1
+            self.n_returns += 1
+            delta = period_return - self.mean_return
+            self.mean_return += delta / self.n_returns
+            self.m2 += delta * (period_return - self.mean_return)
+            self.winning += period_return > 0
+            self.losing += period_return < 0
+            self.peak = max(self.peak, value)
+            self.min_drawdown = min(self.min_drawdown, value / self.peak - 1)
+        self.last_timestamp, self.last_value = timestamp, value
+
+    def update_from(self, equity_curve_data: list):
+        """Consumes the (timestamp, value) points appended to a Portfolio's equity buffer since the last call."""
+        for timestamp, value in equity_curve_data[self.points_consumed:]:
+            self.update(timestamp, value)
+        self.points_consumed = len(equity_curve_data)
+
+    def get_state(self) -> dict:
+        return dict(vars(self))
+
+    @classmethod
+    def from_state(cls, state: dict) -> "OnlineMetrics":
+        metrics = cls()
+        vars(metrics).update(state)
+        return metrics
+
+    def summary(self, risk_free_rate=0.0, annualization_factor=252, trade_count: int = 0) -> dict:
+        metrics = {
+            'Total Return(%)': np.nan,
+            'Annualized Return(%)': np.nan,
+            'Annualized Volatility (%)': np.nan,
+            'Sharpe Ratio': np.nan,
+            'Max Drawdown (%)': np.nan,
+            'Winning Days (%)': np.nan,
+            'Losing Days (%)': np.nan,
+            'Trade Count': trade_count
+        }
+        if self.n_returns == 0:
+            return metrics
+
+        total_return = ((self.last_value / self.first_value) - 1) * 100
+        metrics['Total Return(%)'] = total_return
+        time_span_days = (self.last_timestamp - self.first_timestamp).days
+        if time_span_days > 0:
+            years = time_span_days / 365.25
+            metrics['Annualized Return(%)'] = (((1 + (total_return / 100)) ** (1 / years)) - 1) * 100
+
+        std_returns = np.sqrt(self.m2 / (self.n_returns - 1)) if self.n_returns > 1 else np.nan
+        metrics['Annualized Volatility (%)'] = std_returns * np.sqrt(annualization_factor) * 100
+        if risk_free_rate >= -1.0:
+            period_rate = ((1 + risk_free_rate) ** (1 / annualization_factor)) - 1
+        else:
+            period_rate = risk_free_rate / annualization_factor
+        if std_returns != 0 and not np.isnan(std_returns):
+            metrics['Sharpe Ratio'] = ((self.mean_return - period_rate) / std_returns) * np.sqrt(annualization_factor)
+
+        metrics['Max Drawdown (%)'] = self.min_drawdown * 100
+        metrics['Winning Days (%)'] = (self.winning / self.n_returns) * 100
+        metrics['Losing Days (%)'] = (self.losing / self.n_returns) * 100
+        return metrics
@@ -1,5 +1,182 @@
+import hashlib
+import json
+import os
 import pandas as pd
 import numpy as np
-import pandas_ta as ta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Sequence, Union
 
+from engine.dataset import MarketDataset
+
+DEFAULT_FEATURE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.retrospect_cache', 'features')
+
+class FeatureMatrix:
+    """
+    A (dates x symbols x features) float array with its axis labels.
+
+    `state` carries what FeaturePipeline.append needs to extend the matrix with new bars
+    without recomputing history: the trailing raw closes/volumes and the RSI averages.
+    """
+    def __init__(self, values: np.ndarray, dates: pd.DatetimeIndex, symbols: List[str], feature_names: List[str], state: Dict[str, np.ndarray]):
+        self.values = values
+        self.dates = dates
+        self.symbols = list(symbols)
+        self.feature_names = list(feature_names)
+        self.state = state
+        self._symbol_positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._feature_positions = {name: i for i, name in enumerate(self.feature_names)}
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.values.shape
+
+    def feature(self, name: str) -> pd.DataFrame:
+        """A single feature as a (dates x symbols) DataFrame."""
+        return pd.DataFrame(self.values[:, :, self._feature_positions[name]], index=self.dates, columns=self.symbols)
+
+    def at(self, timestamp: pd.Timestamp, symbol: str) -> np.ndarray:
+        """Feature vector for one symbol at one timestamp, for use inside a strategy's on_data."""
+        return self.values[self.dates.get_loc(timestamp), self._symbol_positions[symbol]]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Long (Date, Symbol) x features DataFrame, e.g. for offline training."""
+        index = pd.MultiIndex.from_product([self.dates, self.symbols], names=['Date', 'Symbol'])
+        return pd.DataFrame(self.values.reshape(-1, len(self.feature_names)), index=index, columns=self.feature_names)
+
+    def save(self, file_path: str):
+        np.savez(file_path, values=self.values, dates=self.dates.asi8, symbols=np.array(self.symbols), feature_names=np.array(self.feature_names),
+                 **{f"state_{key}": value for key, value in self.state.items()})
+
+    @classmethod
+    def load(cls, file_path: str) -> "FeatureMatrix":
+        with np.load(file_path, allow_pickle=False) as stored:
+            state = {key[len('state_'):]: stored[key] for key in stored.files if key.startswith('state_')}
+            return cls(stored['values'], pd.DatetimeIndex(stored['dates'], name='Date'), stored['symbols'].tolist(), stored['feature_names'].tolist(), state)
+
+class FeaturePipeline:
+    """
+    Builds ML features for every symbol at once from a MultiIndex OHLCV frame.
+
+    Each feature is computed by one grouped pass over the (dates x symbols) close/volume
+    matrices rather than per symbol: returns over several horizons, rolling volatility of
+    log returns, Wilder RSI, close-to-SMA ratios and volume z-scores. Built matrices are
+    cached on disk keyed by the dataset's content version and the pipeline settings.
+    """
+    def __init__(self, return_horizons: Sequence[int] = (1, 5, 20), volatility_window: int = 20, rsi_period: int = 14,
+                 sma_windows: Sequence[int] = (10, 50), volume_window: int = 20, cache_dir: Optional[str] = None):
+        if any(h <= 0 for h in return_horizons) or any(w <= 0 for w in sma_windows) or min(volatility_window, rsi_period, volume_window) <= 1:
+            raise ValueError("Feature horizons and windows must be positive (rolling windows at least 2).")
+        self.return_horizons = tuple(int(h) for h in return_horizons)
+        self.volatility_window = int(volatility_window)
+        self.rsi_period = int(rsi_period)
+        self.sma_windows = tuple(int(w) for w in sma_windows)
+        self.volume_window = int(volume_window)
+        self.cache_dir = cache_dir or os.environ.get('RETROSPECT_FEATURE_CACHE_DIR', DEFAULT_FEATURE_CACHE_DIR)
+
+    @property
+    def feature_names(self) -> List[str]:
+        return ([f"return_{h}" for h in self.return_horizons]
+                + [f"volatility_{self.volatility_window}", f"rsi_{self.rsi_period}"]
+                + [f"sma_ratio_{w}" for w in self.sma_windows]
+                + [f"volume_z_{self.volume_window}"])
+
+    @property
+    def lookback(self) -> int:
+        """Rows of history needed to compute the newest row of every rolling feature."""
+        return max(max(self.return_horizons), self.volatility_window + 1, max(self.sma_windows), self.volume_window)
+
+    def config_hash(self) -> str:
+        settings = json.dumps([self.return_horizons, self.volatility_window, self.rsi_period, self.sma_windows, self.volume_window])
+        return hashlib.sha256(settings.encode('utf-8')).hexdigest()[:12]
+
+    def build(self, data: Union[pd.DataFrame, MarketDataset], use_cache: bool = True) -> FeatureMatrix:
+        dataset = MarketDataset.from_frame(data)
+        cache_path = os.path.join(self.cache_dir, f"{dataset.version}_{self.config_hash()}.npz")
+        if use_cache and os.path.exists(cache_path):
+            return FeatureMatrix.load(cache_path)
+
+        close = dataset.frame['Close'].unstack('Symbol')
+        volume = dataset.frame['Volume'].unstack('Symbol').astype(float)
+        matrix = self._compute(close, volume, rsi_seed=None)
+
+        if use_cache:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            matrix.save(cache_path)
+        return matrix
+
+    def append(self, matrix: FeatureMatrix, new_data: Union[pd.DataFrame, MarketDataset]) -> FeatureMatrix:
+        """
+        Extends a feature matrix with bars dated after its last date. Only the stored
+        trailing window plus the new rows are processed, so the cost is O(new bars).
+        """
+        dataset = MarketDataset.from_frame(new_data)
+        new_close = dataset.frame['Close'].unstack('Symbol')
+        new_close = new_close[new_close.index > matrix.dates[-1]]
+        if new_close.empty:
+            return matrix
+        unknown = set(new_close.columns) - set(matrix.symbols)
+        if unknown:
+            raise ValueError(f"Cannot append bars for symbols not in the feature matrix: {sorted(unknown)}")
+        new_close = new_close.reindex(columns=matrix.symbols)
+        new_volume = dataset.frame['Volume'].unstack('Symbol').astype(float).reindex(index=new_close.index, columns=matrix.symbols)
+
+        tail_index = pd.DatetimeIndex(matrix.state['tail_dates'], name='Date')
+        close = pd.concat([pd.DataFrame(matrix.state['tail_close'], index=tail_index, columns=matrix.symbols), new_close])
+        volume = pd.concat([pd.DataFrame(matrix.state['tail_volume'], index=tail_index, columns=matrix.symbols), new_volume])
+        extension = self._compute(close, volume, rsi_seed=(matrix.state['rsi_avg_gain'], matrix.state['rsi_avg_loss']), n_new=len(new_close))
+
+        return FeatureMatrix(np.concatenate([matrix.values, extension.values]), matrix.dates.append(extension.dates),
+                             matrix.symbols, matrix.feature_names, extension.state)
+
+    def _compute(self, close: pd.DataFrame, volume: pd.DataFrame, rsi_seed: Optional[Tuple[np.ndarray, np.ndarray]], n_new: Optional[int] = None) -> FeatureMatrix:
+        features = []
+        for horizon in self.return_horizons:
+            features.append(close / close.shift(horizon) - 1)
+
+        log_returns = np.log(close / close.shift(1))
+        features.append(log_returns.rolling(self.volatility_window).std())
+
+        rsi, avg_gain, avg_loss = self._rsi(close, rsi_seed, n_new)
+        features.append(rsi)
+
+        for window in self.sma_windows:
+            features.append(close / close.rolling(window).mean() - 1)
+
+        volume_mean = volume.rolling(self.volume_window).mean()
+        volume_std = volume.rolling(self.volume_window).std().replace(0, np.nan)
+        features.append((volume - volume_mean) / volume_std)
+
+        values = np.stack([f.to_numpy(dtype=float) for f in features], axis=2)
+        dates = close.index
+        if n_new is not None:
+            values, dates = values[-n_new:], dates[-n_new:]
+
+        tail = self.lookback
+        state = {
+            'tail_dates': close.index[-tail:].asi8,
+            'tail_close': close.to_numpy(dtype=float)[-tail:],
+            'tail_volume': volume.to_numpy(dtype=float)[-tail:],
+            'rsi_avg_gain': avg_gain,
+            'rsi_avg_loss': avg_loss,
+        }
+        return FeatureMatrix(values, pd.DatetimeIndex(dates, name='Date'), close.columns.tolist(), self.feature_names, state)
+
+    def _rsi(self, close: pd.DataFrame, seed: Optional[Tuple[np.ndarray, np.ndarray]], n_new: Optional[int]) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        """Wilder RSI for all symbols. When seeded, the EWM recursion continues from the stored averages."""
+        delta = close.diff()
+        gains = delta.clip(lower=0)
+        losses = -delta.clip(upper=0)
+        if seed is not None:
+            # Replace the already-processed rows with a single row holding the previous averages
+            gains = pd.concat([pd.DataFrame([seed[0]], columns=close.columns), gains.iloc[-n_new:]])
+            losses = pd.concat([pd.DataFrame([seed[1]], columns=close.columns), losses.iloc[-n_new:]])
+        alpha = 1.0 / self.rsi_period
+        avg_gain = gains.ewm(alpha=alpha, adjust=False).mean()
+        avg_loss = losses.ewm(alpha=alpha, adjust=False).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+        rsi = rsi.where(avg_loss != 0, 100.0).where(avg_gain.notna() & avg_loss.notna())
+        if seed is not None:
+            rsi = pd.concat([pd.DataFrame(np.nan, index=close.index[:-n_new], columns=close.columns), rsi.iloc[1:].set_axis(close.index[-n_new:])])
+        else:
+            rsi.index = close.index
+        return rsi, avg_gain.iloc[-1].to_numpy(dtype=float), avg_loss.iloc[-1].to_numpy(dtype=float)
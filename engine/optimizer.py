@@ -0,0 +1,162 @@
+import logging
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.runner import resolve_strategy
+from engine.walk_forward import expand_grid, objective_score
+from utils.event_log import emit
+
+# Dataset shared with pool workers. Workers are forked, so they inherit it without copying.
+_worker_dataset: Optional[MarketDataset] = None
+
+def _init_worker(dataset: MarketDataset):
+    global _worker_dataset
+    _worker_dataset = dataset
+
+def rung_lengths(n_dates: int, n_candidates: int, reduction_factor: int, min_dates: int) -> List[int]:
+    """
+    Date-prefix lengths for each rung of successive halving: the last rung is the full
+    dataset and each earlier rung is `reduction_factor` times shorter, down to min_dates.
+    There are enough rungs to cull n_candidates down to a single survivor.
+    """
+    if reduction_factor < 2:
+        raise ValueError("Reduction factor must be at least 2.")
+    n_rungs = max(1, math.ceil(math.log(max(n_candidates, 1), reduction_factor)) + 1)
+    lengths = []
+    for rung in range(n_rungs):
+        length = int(n_dates / reduction_factor ** (n_rungs - 1 - rung))
+        if length >= min_dates and (not lengths or length > lengths[-1]):
+            lengths.append(length)
+    if not lengths or lengths[-1] != n_dates:
+        lengths.append(n_dates)
+    return lengths
+
+def _advance_candidate(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Advances one candidate's backtest to task['stop'], resuming from its checkpoint when
+    it has one, and scores the equity curve so far. Returns the score, the new checkpoint
+    and the number of dates actually processed.
+    """
+    strategy_class = resolve_strategy(task['strategy_name'])
+    try:
+        strategy_instance = strategy_class(**task['params'])
+    except ValueError as e:
+        emit(logging.WARNING, 'candidate_skipped', f"Skipping candidate {task['params']}: {e}")
+        return {'score': -np.inf, 'checkpoint': None, 'bars': 0}
+
+    backtester = Backtester(_worker_dataset, strategy_class, task['initial_capital'], task['commission_per_share'],
+                            task['slippage_bps'], task['symbols'])
+    backtester.strategy_instance = strategy_instance
+    if task['checkpoint'] is not None:
+        backtester.restore(task['checkpoint'])
+    start = backtester.cursor
+    portfolio = backtester.run_until(task['stop'])
+    score = objective_score(portfolio.get_equity_curve(), task['objective'], task['annualization_factor'], len(portfolio.trades))
+    return {'score': score, 'checkpoint': backtester.checkpoint(), 'bars': backtester.cursor - start}
+
+class SuccessiveHalvingOptimizer:
+    """
+    Successive-halving parameter search.
+
+    Every candidate starts on a short prefix of the dates; after each rung only the best
+    1/reduction_factor of them (by `objective`, a Metrics.performance_summary key) go on to
+    a prefix reduction_factor times longer, until the survivors reach the full dataset.
+    Survivors resume from the checkpoint taken at the end of the previous rung, so no date
+    is ever backtested twice for the same candidate.
+    """
+    def __init__(self, data, strategy_name: str, param_grid: Dict[str, List[Any]], symbols: List[str],
+                 fixed_params: Optional[Dict[str, Any]] = None, initial_capital: float = 100000.0,
+                 commission_per_share: float = 0.0, slippage_bps: float = 0.0, objective: str = 'Sharpe Ratio',
+                 annualization_factor: float = 252, reduction_factor: int = 3, min_dates: int = 60,
+                 max_workers: Optional[int] = None):
+        self.dataset = MarketDataset.from_frame(data)
+        self.strategy_name = strategy_name
+        self.candidates = expand_grid(param_grid)
+        self.fixed_params = fixed_params or {}
+        self.symbols = symbols
+        self.initial_capital = initial_capital
+        self.commission_per_share = commission_per_share
+        self.slippage_bps = slippage_bps
+        self.objective = objective
+        self.annualization_factor = annualization_factor
+        self.reduction_factor = reduction_factor
+        self.rungs = rung_lengths(len(self.dataset), len(self.candidates), reduction_factor, min(min_dates, len(self.dataset)))
+        self.max_workers = max_workers
+
+    def _task(self, candidate: int, checkpoint: Optional[Dict[str, Any]], stop: int) -> Dict[str, Any]:
+        return {
+            'strategy_name': self.strategy_name,
+            'params': {**self.fixed_params, **self.candidates[candidate]},
+            'symbols': self.symbols,
+            'checkpoint': checkpoint,
+            'stop': stop,
+            'initial_capital': self.initial_capital,
+            'commission_per_share': self.commission_per_share,
+            'slippage_bps': self.slippage_bps,
+            'objective': self.objective,
+            'annualization_factor': self.annualization_factor,
+        }
+
+    def _run_tasks(self, executor: Optional[ProcessPoolExecutor], tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if executor is None:
+            return [_advance_candidate(task) for task in tasks]
+        return list(executor.map(_advance_candidate, tasks, chunksize=max(1, len(tasks) // (4 * (self.max_workers or 4)))))
+
+    def run(self) -> Dict[str, Any]:
+        alive = list(range(len(self.candidates)))
+        checkpoints: Dict[int, Optional[Dict[str, Any]]] = {c: None for c in alive}
+        scores: Dict[int, float] = {}
+        rung_reports = []
+        bar_evaluations = 0
+
+        executor = None
+        if self.max_workers != 1 and len(self.candidates) > 1:
+            context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+            executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context, initializer=_init_worker, initargs=(self.dataset,))
+        else:
+            _init_worker(self.dataset)
+        try:
+            for rung, stop in enumerate(self.rungs):
+                results = self._run_tasks(executor, [self._task(c, checkpoints[c], stop) for c in alive])
+                for c, result in zip(alive, results):
+                    scores[c] = result['score']
+                    checkpoints[c] = result['checkpoint']
+                    bar_evaluations += result['bars']
+
+                ranked = sorted(alive, key=lambda c: scores[c], reverse=True)
+                last_rung = rung == len(self.rungs) - 1
+                keep = len(ranked) if last_rung else max(1, math.ceil(len(ranked) / self.reduction_factor))
+                rung_reports.append({
+                    'dates': stop,
+                    'end_date': self.dataset.dates[stop - 1],
+                    'candidates': len(alive),
+                    'survivors': keep,
+                    'best_params': {**self.fixed_params, **self.candidates[ranked[0]]},
+                    'best_score': scores[ranked[0]],
+                })
+                # Culled candidates' checkpoints are dropped so memory follows the survivors
+                for c in ranked[keep:]:
+                    checkpoints.pop(c)
+                alive = ranked[:keep]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        best = alive[0]
+        full_grid_evaluations = len(self.candidates) * len(self.dataset)
+        return {
+            'best_params': {**self.fixed_params, **self.candidates[best]},
+            'best_score': scores[best],
+            'best_portfolio': checkpoints[best]['portfolio'] if checkpoints[best] else None,
+            'leaderboard': [({**self.fixed_params, **self.candidates[c]}, scores[c]) for c in alive],
+            'rungs': rung_reports,
+            'bar_evaluations': bar_evaluations,
+            'full_grid_bar_evaluations': full_grid_evaluations,
+            'bar_evaluations_saved': full_grid_evaluations - bar_evaluations,
+        }
@@ -0,0 +1,257 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from engine.broker import Broker
+from engine.dataset import MarketDataset
+from engine.metrics import Metrics
+from engine.portfolio import Portfolio
+from engine.scheduler import EventScheduler
+from strategies.base import BaseStrategy
+from utils.data_loader import quality_columns
+from utils.event_log import EventLog
+from utils.live_data import LiveBarCache
+from utils.telemetry import Histogram
+
+# Decisions take microseconds to milliseconds, far below the request-latency buckets
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Seconds from a bar leaving the feed to the strategy's decision and fills being recorded
+bar_latency = Histogram('retrospect_paper_bar_latency_seconds', 'Paper trading latency from bar receipt to decision and fill.',
+                        ('strategy',), buckets=LATENCY_BUCKETS)
+
+# Bars read beyond history_bars on every live poll, covering timestamps that closed since the previous poll
+LIVE_FEED_CATCH_UP_BARS = 50
+
+# A published bar: (bar timestamp, bars indexed by Symbol, perf_counter() when the feed released it)
+BarEvent = Tuple[pd.Timestamp, pd.DataFrame, float]
+
+class BarFeed(ABC):
+    """
+    Publishes bars to subscribers. Every subscriber gets its own bounded queue of BarEvents,
+    so a slow subscriber holds the feed back rather than missing bars; None marks the end of
+    the feed. Subclasses implement run() and publish through _publish() and _finish().
+    """
+    def __init__(self, queue_size: int = 1000):
+        self.queue_size = queue_size
+        self.bars_published = 0
+        self._queues: List[asyncio.Queue] = []
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._queues.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._queues:
+            self._queues.remove(queue)
+
+    async def _publish(self, timestamp: pd.Timestamp, bars: pd.DataFrame):
+        released_at = time.perf_counter()
+        for queue in list(self._queues):
+            await queue.put((timestamp, bars, released_at))
+        self.bars_published += 1
+
+    async def _finish(self):
+        for queue in list(self._queues):
+            await queue.put(None)
+
+    @abstractmethod
+    async def run(self):
+        """Publishes bars until the feed ends, then calls _finish()."""
+        pass
+
+class ReplayFeed(BarFeed):
+    """
+    Plays a dataset's bars in timestamp order as a live feed, for testing paper trading.
+
+    Bars are released `speed` times faster than the gaps between their timestamps (speed=60
+    plays an hour of 1m bars in a minute); speed None or 0 releases them as fast as the
+    subscribers consume them. Gaps longer than max_gap seconds of real time (nights,
+    weekends) are cut to max_gap.
+    """
+    def __init__(self, data: Union[pd.DataFrame, MarketDataset], speed: Optional[float] = None, max_gap: Optional[float] = None, queue_size: int = 1000):
+        if speed is not None and speed < 0:
+            raise ValueError("Replay speed cannot be negative.")
+        super().__init__(queue_size)
+        self.dataset = MarketDataset.from_frame(data)
+        self.speed = speed
+        self.max_gap = max_gap
+
+    async def run(self):
+        previous_timestamp = None
+        next_release = time.perf_counter()
+        for timestamp, bars in EventScheduler(self.dataset).iter_steps():
+            if self.speed and previous_timestamp is not None:
+                gap = (timestamp - previous_timestamp).total_seconds() / self.speed
+                next_release += min(gap, self.max_gap) if self.max_gap is not None else gap
+                # Sleeping until an absolute release time keeps delays from accumulating
+                await asyncio.sleep(max(0.0, next_release - time.perf_counter()))
+            previous_timestamp = timestamp
+            await self._publish(timestamp, bars)
+            if not self.speed:
+                # Let subscribers run between bars even when nothing makes the feed wait
+                await asyncio.sleep(0)
+        await self._finish()
+
+class LiveBarFeed(BarFeed):
+    """
+    Publishes bars from a LiveBarCache as they arrive, for running strategies forward in real
+    time. The cache is read every poll_interval seconds. A timestamp is published once a newer
+    one has appeared, since the newest bar keeps changing until its interval closes. On the
+    first read the history_bars most recent closed timestamps are published, to prime the
+    strategies' indicators. The feed ends after max_bars timestamps or when stop() is called.
+    """
+    def __init__(self, bar_cache: LiveBarCache, symbols: List[str], interval: str = '1m', poll_interval: float = 60.0,
+                 history_bars: int = 0, max_bars: Optional[int] = None, queue_size: int = 1000):
+        if not symbols:
+            raise ValueError("At least one symbol is required.")
+        if history_bars < 0:
+            raise ValueError("History bars cannot be negative.")
+        super().__init__(queue_size)
+        self.bar_cache = bar_cache
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self.history_bars = history_bars
+        self.max_bars = max_bars
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self._primed = False
+        self._stopped = asyncio.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def poll(self) -> int:
+        """Publishes the closed timestamps not published yet; returns how many."""
+        # The extra bars cover timestamps that closed since the last poll and carry marks forward
+        history = await self.bar_cache.get_history(self.symbols, self.interval, self.history_bars + LIVE_FEED_CATCH_UP_BARS)
+        if history.empty:
+            return 0
+        history = quality_columns(history)
+        closed = history.index.get_level_values('Date').unique().sort_values()[:-1]
+        if not self._primed:
+            self._primed = True
+            # Closed timestamps older than the history_bars most recent ones count as already seen
+            skip = len(closed) - min(self.history_bars, len(closed))
+            if skip > 0:
+                self.last_timestamp = closed[skip - 1]
+        if self.last_timestamp is not None:
+            closed = closed[closed > self.last_timestamp]
+        published = 0
+        for timestamp in closed:
+            if self.max_bars is not None and self.bars_published >= self.max_bars:
+                break
+            await self._publish(timestamp, history.xs(timestamp, level='Date'))
+            self.last_timestamp = timestamp
+            published += 1
+        return published
+
+    async def run(self):
+        # Keeps the cache's buffers fresh between reads; a no-op when its poller already runs
+        self.bar_cache.start()
+        try:
+            while not self._stopped.is_set() and (self.max_bars is None or self.bars_published < self.max_bars):
+                await self.poll()
+                if self.max_bars is not None and self.bars_published >= self.max_bars:
+                    break
+                try:
+                    await asyncio.wait_for(self._stopped.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._finish()
+
+class PaperTrader:
+    """
+    Runs one strategy forward on a bar feed with a persistent Portfolio and Broker.
+
+    Each bar is handed to on_data as it arrives; positions are then marked at the latest
+    valid close of every symbol and an equity point is recorded, as in a backtest. Fills are
+    kept with the latency of the bar that produced them, and every bar's latency (feed
+    release to equity recorded) is observed in the bar_latency histogram. on_data runs on
+    the event loop, so a slow strategy delays the bars queued behind it and that shows up
+    in the latency.
+    """
+    def __init__(self, strategy: BaseStrategy, initial_capital: float, commission_per_share: float = 0.0, slippage_bps: float = 0.0,
+                 event_log: Optional[EventLog] = None, latency_window: int = 10000):
+        self.strategy = strategy
+        self.portfolio = Portfolio(initial_capital=initial_capital)
+        self.broker = Broker(commission_per_share=commission_per_share, slippage_bps=slippage_bps)
+        self.event_log = event_log if event_log is not None else EventLog()
+        self.last_prices: Dict[str, float] = {}
+        self.fills: List[Dict[str, Any]] = []
+        # Latencies of the most recent bars, for percentiles; the histogram keeps the full history
+        self.latencies: deque = deque(maxlen=latency_window)
+        self.bars_processed = 0
+        self.running = False
+
+    def on_bar(self, timestamp: pd.Timestamp, bars: pd.DataFrame, released_at: float) -> float:
+        """Processes one bar and returns its latency in seconds."""
+        trades_before = len(self.portfolio.trades)
+        with self.event_log.activate():
+            self.strategy.on_data(current_timestamp=timestamp, data_for_day=bars, portfolio=self.portfolio, broker=self.broker)
+        marks = bars['Mark'] if 'Mark' in bars.columns else bars['Close'].where(bars['Close'] > 0)
+        self.last_prices.update(marks.dropna().to_dict())
+        self.portfolio.record_equity(timestamp, self.last_prices)
+        latency = time.perf_counter() - released_at
+        self.fills.extend({**trade, 'latency': latency} for trade in self.portfolio.trades[trades_before:])
+        self.latencies.append(latency)
+        bar_latency.observe(latency, strategy=self.strategy.name)
+        self.bars_processed += 1
+        return latency
+
+    async def run(self, feed: BarFeed, queue: Optional[asyncio.Queue] = None):
+        """
+        Consumes bars from a feed subscription (a new one unless queue is given; subscribe
+        before the feed starts to see its first bar) until the feed ends or the strategy fails.
+        """
+        queue = queue if queue is not None else feed.subscribe()
+        self.running = True
+        try:
+            while True:
+                event: Optional[BarEvent] = await queue.get()
+                if event is None:
+                    break
+                try:
+                    self.on_bar(*event)
+                except Exception as e:
+                    self.event_log.error('strategy_error', f"Error in strategy {self.strategy.name} on_data at {event[0]}: {e}",
+                                         timestamp=event[0], exception=type(e).__name__)
+                    break
+        finally:
+            self.running = False
+            feed.unsubscribe(queue)
+            # Frees a feed blocked on this queue being full
+            while not queue.empty():
+                queue.get_nowait()
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Latency percentiles over the most recent bars, in milliseconds."""
+        if not self.latencies:
+            return {'Bars': 0, 'Mean Latency (ms)': np.nan, 'P50 Latency (ms)': np.nan, 'P99 Latency (ms)': np.nan, 'Max Latency (ms)': np.nan}
+        latencies = np.fromiter(self.latencies, dtype=float) * 1000
+        return {
+            'Bars': self.bars_processed,
+            'Mean Latency (ms)': latencies.mean(),
+            'P50 Latency (ms)': np.percentile(latencies, 50),
+            'P99 Latency (ms)': np.percentile(latencies, 99),
+            'Max Latency (ms)': latencies.max(),
+        }
+
+    def summary(self, risk_free_rate=0.0, annualization_factor=252) -> Dict[str, Any]:
+        summary = Metrics.performance_summary(self.portfolio.get_equity_curve(), risk_free_rate=risk_free_rate,
+                                              annualization_factor=annualization_factor, trade_count=len(self.portfolio.trades))
+        summary.update(self.latency_summary())
+        return summary
+
+async def run_paper_trading(feed: BarFeed, traders: List[PaperTrader]) -> List[PaperTrader]:
+    """Subscribes every trader to the feed, plays it to the end and returns the traders."""
+    queues = [feed.subscribe() for _ in traders]
+    await asyncio.gather(feed.run(), *(trader.run(feed, queue) for trader, queue in zip(traders, queues)))
+    return traders
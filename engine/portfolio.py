@@ -1,5 +1,8 @@
 from typing import Any, Dict, List
+import numpy as np
 import pandas as pd
+import logging
+from utils.event_log import emit
 
 class Portfolio:
     def __init__(self,initial_capital: float):
@@ -56,7 +59,7 @@ class Portfolio:
             if (key in current_prices):
                 market_value+=(self.positions[key]['quantity']*current_prices[key])
             else:
-                print(f"Warning: Current price for {key} not available for value calculation.")
+                emit(logging.WARNING, 'missing_price', "Current price not available for value calculation; using average entry price.", symbol=key)
                 market_value+=(self.positions[key]['quantity']*self.positions[key]['avg_entry_price'])
         
         return self.cash+market_value
@@ -68,6 +71,29 @@ class Portfolio:
     def get_position(self, symbol: str) -> float:
         return self.positions.get(symbol, {}).get('quantity', 0.0)
     
+    def get_state(self) -> Dict[str, Any]:
+        """Compact snapshot for checkpoints: the equity buffer is stored as a DatetimeIndex plus a float array."""
+        timestamps, values = zip(*self.equity_curve_data) if self.equity_curve_data else ((), ())
+        return {
+            'initial_capital': self.initial_capital,
+            'cash': self.cash,
+            'positions': {symbol: dict(position) for symbol, position in self.positions.items()},
+            'trades': [dict(trade) for trade in self.trades],
+            'equity_timestamps': pd.DatetimeIndex(timestamps),
+            'equity_values': np.array(values, dtype=float),
+            'current_prices': dict(self.current_prices),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "Portfolio":
+        portfolio = cls(initial_capital=state['initial_capital'])
+        portfolio.cash = state['cash']
+        portfolio.positions = state['positions']
+        portfolio.trades = state['trades']
+        portfolio.equity_curve_data = list(zip(state['equity_timestamps'], state['equity_values'].tolist()))
+        portfolio.current_prices = state['current_prices']
+        return portfolio
+
     def get_equity_curve(self) -> pd.Series:
         if not self.equity_curve_data:
             return pd.Series([], dtype=float) # Return empty series if no data
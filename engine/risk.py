@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from engine.dataset import MarketDataset
+
+# Upper bound on the memory one batch of covariance matrices may take
+COVARIANCE_BATCH_BYTES = 256 * 1024 * 1024
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum over each row and the window - 1 rows before it, for every column, from one cumulative sum."""
+    cumulative = np.cumsum(values, axis=0)
+    sums = cumulative.copy()
+    sums[window:] -= cumulative[:-window]
+    return sums
+
+def _centred(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Values minus their column mean over the valid entries, 0 elsewhere; keeps the cumulative sums well conditioned."""
+    counts = valid.sum(axis=0)
+    means = np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1)
+    return np.where(valid, values - means, 0.0)
+
+def return_matrix(data: Union[pd.DataFrame, MarketDataset]) -> pd.DataFrame:
+    """
+    (dates x symbols) simple returns of each symbol's Mark (last valid close). A date a symbol
+    has no bar on, and the date after it, are NaN.
+    """
+    dataset = MarketDataset.from_frame(data)
+    marks = dataset.frame['Mark'].unstack('Symbol')
+    return marks / marks.shift(1) - 1
+
+def rolling_volatility(returns: pd.DataFrame, window: int = 21, annualization_factor: int = 252) -> pd.DataFrame:
+    """Annualized rolling standard deviation (ddof=1) of every column; NaN until a window of valid returns is available."""
+    if window < 2:
+        raise ValueError("Volatility window must be at least 2.")
+    values = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    centred = _centred(values, valid)
+    count = _window_sums(valid.astype(float), window)
+    first, second = _window_sums(centred, window), _window_sums(centred ** 2, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (second - first ** 2 / count) / (count - 1)
+    volatility = np.where(count >= window, np.sqrt(np.maximum(variance, 0.0)) * np.sqrt(annualization_factor), np.nan)
+    return pd.DataFrame(volatility, index=returns.index, columns=returns.columns)
+
+def rolling_beta(returns: pd.DataFrame, benchmark: pd.Series, window: int = 63) -> pd.DataFrame:
+    """
+    Rolling beta of every column against benchmark returns: cov(r, b) / var(b) over the dates
+    in the window where both are valid; NaN until the window is full.
+    """
+    if window < 2:
+        raise ValueError("Beta window must be at least 2.")
+    values = returns.to_numpy(dtype=float)
+    bench = np.broadcast_to(benchmark.reindex(returns.index).to_numpy(dtype=float)[:, None], values.shape)
+    both = ~np.isnan(values) & ~np.isnan(bench)
+    x, b = _centred(values, both), _centred(bench, both)
+    count = _window_sums(both.astype(float), window)
+    sum_x, sum_b = _window_sums(x, window), _window_sums(b, window)
+    covariance = _window_sums(x * b, window) - sum_x * sum_b / np.maximum(count, 1)
+    variance = _window_sums(b * b, window) - sum_b ** 2 / np.maximum(count, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = np.where((count >= window) & (variance > 0), covariance / variance, np.nan)
+    return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+def rolling_covariance(returns: pd.DataFrame, window: int = 63, step: int = 1) -> Dict[str, Any]:
+    """
+    Covariance and correlation matrices of the columns over a trailing window, every `step`
+    dates and always on the last date. Each batch of windows is centred and multiplied in one
+    batched matmul; a symbol with any missing return in a window has NaN rows in that matrix.
+    Returns {'dates', 'symbols', 'covariance', 'correlation'} with (dates x symbols x symbols)
+    arrays, so keep step large for long runs over many symbols.
+    """
+    if window < 2 or step < 1:
+        raise ValueError("Covariance window must be at least 2 and step at least 1.")
+    values = returns.to_numpy(dtype=float)
+    n_dates, n_symbols = values.shape
+    positions = np.arange(n_dates - 1, window - 2, -step)[::-1]
+    covariance = np.full((len(positions), n_symbols, n_symbols), np.nan)
+    if len(positions):
+        windows = np.lib.stride_tricks.sliding_window_view(values, window, axis=0)
+        batch = max(1, COVARIANCE_BATCH_BYTES // (8 * n_symbols * (n_symbols + window)))
+        for start in range(0, len(positions), batch):
+            block = windows[positions[start:start + batch] - (window - 1)]
+            complete = ~np.isnan(block).any(axis=2)
+            centred = np.where(complete[:, :, None], block - block.mean(axis=2, keepdims=True), 0.0)
+            matrices = centred @ centred.transpose(0, 2, 1) / (window - 1)
+            matrices[~(complete[:, :, None] & complete[:, None, :])] = np.nan
+            covariance[start:start + batch] = matrices
+    std = np.sqrt(np.diagonal(covariance, axis1=1, axis2=2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        correlation = covariance / (std[:, :, None] * std[:, None, :])
+    return {'dates': returns.index[positions], 'symbols': list(returns.columns), 'covariance': covariance, 'correlation': correlation}
+
+def holdings_matrix(trades: List[Dict[str, Any]], dates: pd.DatetimeIndex, symbols: List[str]) -> pd.DataFrame:
+    """(dates x symbols) shares held at the end of each date, rebuilt from a trade log."""
+    if not trades:
+        return pd.DataFrame(0.0, index=dates, columns=symbols)
+    fills = pd.DataFrame(trades)
+    signed = np.where(fills['type'] == 'BUY', 1.0, -1.0) * fills['quantity'].to_numpy(dtype=float)
+    changes = pd.Series(signed, index=pd.MultiIndex.from_arrays([pd.to_datetime(fills['timestamp']), fills['symbol']]))
+    changes = changes.groupby(level=[0, 1]).sum().unstack(fill_value=0.0).sort_index()
+    holdings = changes.reindex(columns=symbols, fill_value=0.0).cumsum()
+    return holdings.reindex(dates, method='ffill').fillna(0.0)
+
+def exposure(holdings: pd.DataFrame, marks: pd.DataFrame, equity: pd.Series) -> pd.DataFrame:
+    """Long, short, gross and net market value of the holdings as a percentage of equity, per date."""
+    values = holdings * marks.reindex(index=holdings.index, columns=holdings.columns).ffill().fillna(0.0)
+    equity = equity.reindex(holdings.index)
+    long_value, short_value = values.clip(lower=0).sum(axis=1), values.clip(upper=0).sum(axis=1).abs()
+    return pd.DataFrame({
+        'Long (%)': long_value / equity * 100,
+        'Short (%)': short_value / equity * 100,
+        'Gross (%)': (long_value + short_value) / equity * 100,
+        'Net (%)': (long_value - short_value) / equity * 100,
+    }, index=holdings.index)
+
+def turnover(trades: List[Dict[str, Any]], equity: pd.Series) -> pd.Series:
+    """Traded notional on each date as a fraction of that date's equity."""
+    if not trades:
+        return pd.Series(0.0, index=equity.index, name='Turnover')
+    fills = pd.DataFrame(trades)
+    notional = (fills['quantity'].astype(float) * fills['price'].astype(float)).groupby(pd.to_datetime(fills['timestamp'])).sum()
+    return (notional.reindex(equity.index, fill_value=0.0) / equity).rename('Turnover')
+
+def risk_report(data: Union[pd.DataFrame, MarketDataset], trades: List[Dict[str, Any]], equity_curve: pd.Series,
+                benchmark: Optional[Union[str, pd.Series]] = None, window: int = 63, annualization_factor: int = 252,
+                covariance_step: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Cross-asset risk of a finished run: rolling per-symbol volatility, rolling covariance and
+    correlation (every covariance_step dates, default one window), exposure, turnover and,
+    given a benchmark (a symbol of the dataset or a price series such as SPY closes), rolling
+    beta of every symbol and of the portfolio. 'summary' holds scalars keyed like
+    Metrics.performance_summary.
+    """
+    dataset = MarketDataset.from_frame(data)
+    returns = return_matrix(dataset)
+    equity = equity_curve[~equity_curve.index.duplicated(keep='last')].reindex(dataset.dates)
+    holdings = holdings_matrix(trades, dataset.dates, dataset.symbols)
+    report = {
+        'volatility': rolling_volatility(returns, window, annualization_factor),
+        'covariance': rolling_covariance(returns, window, covariance_step or window),
+        'exposure': exposure(holdings, dataset.frame['Mark'].unstack('Symbol'), equity),
+        'turnover': turnover(trades, equity),
+        'beta': None,
+    }
+    latest_correlation = report['covariance']['correlation'][-1] if len(report['covariance']['dates']) else np.empty((0, 0))
+    off_diagonal = latest_correlation[~np.eye(len(latest_correlation), dtype=bool)]
+    summary = {
+        'Avg Gross Exposure (%)': report['exposure']['Gross (%)'].mean(),
+        'Avg Net Exposure (%)': report['exposure']['Net (%)'].mean(),
+        'Annualized Turnover': report['turnover'].mean() * annualization_factor,
+        'Avg Pairwise Correlation': np.nanmean(off_diagonal) if np.isfinite(off_diagonal).any() else np.nan,
+        'Portfolio Beta': np.nan,
+    }
+
+    if benchmark is not None:
+        if isinstance(benchmark, str):
+            if benchmark not in returns.columns:
+                raise ValueError(f"Benchmark symbol '{benchmark}' is not in the dataset; pass its prices as a Series instead.")
+            benchmark_returns = returns[benchmark]
+        else:
+            benchmark_returns = benchmark / benchmark.shift(1) - 1
+        portfolio_returns = equity / equity.shift(1) - 1
+        report['beta'] = rolling_beta(returns.assign(Portfolio=portfolio_returns), benchmark_returns, window)
+        both = pd.concat([portfolio_returns, benchmark_returns.reindex(equity.index)], axis=1).dropna()
+        if len(both) > 1 and both.iloc[:, 1].var() > 0:
+            summary['Portfolio Beta'] = both.iloc[:, 0].cov(both.iloc[:, 1]) / both.iloc[:, 1].var()
+    report['summary'] = summary
+    return report
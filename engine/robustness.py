@@ -0,0 +1,178 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from engine.metrics import Metrics
+from engine.portfolio import Portfolio
+
+# Resamples are generated and summarized in chunks so memory stays bounded at (chunk x bars)
+CHUNK_SIZE = 1000
+
+def block_bootstrap_indices(n_periods: int, n_resamples: int, block_size: int, rng: np.random.Generator) -> np.ndarray:
+    """(n_resamples x n_periods) indices of a circular block bootstrap, drawn in one vectorized step."""
+    block_size = max(1, min(block_size, n_periods))
+    n_blocks = -(-n_periods // block_size)
+    starts = rng.integers(0, n_periods, size=(n_resamples, n_blocks, 1))
+    indices = (starts + np.arange(block_size)) % n_periods
+    return indices.reshape(n_resamples, n_blocks * block_size)[:, :n_periods]
+
+def summarize_paths(returns: np.ndarray, initial_value: float, years: float, risk_free_rate: float = 0.0, annualization_factor: float = 252) -> Dict[str, np.ndarray]:
+    """
+    Vectorized equivalent of Metrics.performance_summary applied to every row of a
+    (resamples x periods) return matrix. Returns one array per summary field.
+    """
+    equity = initial_value * np.cumprod(1 + returns, axis=1)
+    equity = np.concatenate([np.full((returns.shape[0], 1), initial_value), equity], axis=1)
+
+    total_return = (equity[:, -1] / initial_value - 1) * 100
+    with np.errstate(invalid='ignore', divide='ignore'):
+        annualized_return = ((1 + total_return / 100) ** (1 / years) - 1) * 100 if years > 0 else np.full(len(returns), np.nan)
+        std = returns.std(axis=1, ddof=1)
+        if risk_free_rate >= -1.0:
+            period_rate = ((1 + risk_free_rate) ** (1 / annualization_factor)) - 1
+        else:
+            period_rate = risk_free_rate / annualization_factor
+        sharpe = np.where(std > 0, (returns - period_rate).mean(axis=1) / std * np.sqrt(annualization_factor), np.nan)
+        max_drawdown = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1) * 100
+
+    return {
+        'Total Return(%)': total_return,
+        'Annualized Return(%)': annualized_return,
+        'Annualized Volatility (%)': std * np.sqrt(annualization_factor) * 100,
+        'Sharpe Ratio': sharpe,
+        'Max Drawdown (%)': max_drawdown,
+        'Winning Days (%)': (returns > 0).mean(axis=1) * 100,
+        'Losing Days (%)': (returns < 0).mean(axis=1) * 100,
+    }
+
+def _bootstrap_chunk(args) -> Dict[str, np.ndarray]:
+    returns, n_resamples, block_size, seed, initial_value, years, risk_free_rate, annualization_factor = args
+    rng = np.random.default_rng(seed)
+    indices = block_bootstrap_indices(len(returns), n_resamples, block_size, rng)
+    return summarize_paths(returns[indices], initial_value, years, risk_free_rate, annualization_factor)
+
+def _trade_shuffle_chunk(args) -> Dict[str, np.ndarray]:
+    segment_returns, n_resamples, seed, initial_value = args
+    rng = np.random.default_rng(seed)
+    order = np.argsort(rng.random((n_resamples, len(segment_returns))), axis=1)
+    equity = initial_value * np.cumprod(1 + segment_returns[order], axis=1)
+    equity = np.concatenate([np.full((n_resamples, 1), initial_value), equity], axis=1)
+    return {
+        'Total Return(%)': (equity[:, -1] / initial_value - 1) * 100,
+        'Max Drawdown (%)': (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1) * 100,
+    }
+
+def _slippage_chunk(args) -> Dict[str, np.ndarray]:
+    equity, trade_bars, trade_notional, n_resamples, slippage_sigma_bps, seed, years, risk_free_rate, annualization_factor = args
+    rng = np.random.default_rng(seed)
+    # Extra slippage is always adverse: |N(0, sigma)| basis points of each fill's notional
+    costs = np.abs(rng.normal(0.0, slippage_sigma_bps, size=(n_resamples, len(trade_bars)))) / 10000.0 * trade_notional
+    cost_by_bar = np.zeros((n_resamples, len(equity)))
+    np.add.at(cost_by_bar, (slice(None), trade_bars), costs)
+    paths = equity - np.cumsum(cost_by_bar, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = paths[:, 1:] / paths[:, :-1] - 1
+    summary = summarize_paths(returns, paths[0, 0], years, risk_free_rate, annualization_factor)
+    # Costs on the first bar are not visible in bar-to-bar returns, so anchor totals on the unperturbed start
+    total_return = (paths[:, -1] / equity[0] - 1) * 100
+    summary['Total Return(%)'] = total_return
+    if years > 0:
+        with np.errstate(invalid='ignore'):
+            summary['Annualized Return(%)'] = ((1 + total_return / 100) ** (1 / years) - 1) * 100
+    return summary
+
+def _run_chunks(worker, chunk_args: List[tuple], n_jobs: Optional[int]) -> Dict[str, np.ndarray]:
+    if n_jobs is not None and n_jobs > 1 and len(chunk_args) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            results = list(executor.map(worker, chunk_args))
+    else:
+        results = [worker(args) for args in chunk_args]
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+def _chunk_sizes(n_resamples: int) -> List[int]:
+    return [min(CHUNK_SIZE, n_resamples - start) for start in range(0, n_resamples, CHUNK_SIZE)]
+
+def confidence_intervals(samples: Dict[str, np.ndarray], observed: Dict[str, Any], confidence: float) -> Dict[str, Dict[str, Optional[float]]]:
+    alpha = (1 - confidence) / 2
+    intervals = {}
+    for key, values in samples.items():
+        values = values[np.isfinite(values)]
+        obs = observed.get(key)
+        intervals[key] = {
+            'observed': None if obs is None or (isinstance(obs, float) and np.isnan(obs)) else float(obs),
+            'mean': float(values.mean()) if len(values) else None,
+            'lower': float(np.quantile(values, alpha)) if len(values) else None,
+            'upper': float(np.quantile(values, 1 - alpha)) if len(values) else None,
+        }
+    return intervals
+
+def robustness_report(portfolio: Portfolio, n_resamples: int = 10000, block_size: int = 20, slippage_sigma_bps: float = 5.0,
+                      confidence: float = 0.95, risk_free_rate: float = 0.0, annualization_factor: float = 252,
+                      seed: Optional[int] = None, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Monte Carlo robustness analysis of a finished backtest.
+
+    Runs three families of resamples, each summarized into confidence intervals for the
+    Metrics.performance_summary fields:
+    - block_bootstrap: circular block bootstrap of the bar returns.
+    - trade_shuffle: the equity change between consecutive exits, in random order. Only total
+      return and max drawdown are meaningful here since the path is at trade resolution.
+    - slippage: every fill pays an extra |N(0, slippage_sigma_bps)| bps of its notional.
+
+    All resamples in a chunk are computed as 2-D arrays; with n_jobs > 1 chunks run in a process pool.
+    """
+    if n_resamples <= 0:
+        raise ValueError("Number of resamples must be positive.")
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence level must be between 0 and 1.")
+
+    equity_curve = portfolio.get_equity_curve()
+    observed = Metrics.performance_summary(equity_curve, risk_free_rate, annualization_factor, len(portfolio.trades))
+    equity_curve = equity_curve.replace(0, np.nan).dropna()
+    if len(equity_curve) < 3:
+        raise ValueError("Equity curve needs at least 3 non-zero points for a robustness analysis.")
+
+    equity = equity_curve.to_numpy(dtype=float)
+    returns = equity[1:] / equity[:-1] - 1
+    years = (equity_curve.index[-1] - equity_curve.index[0]).days / 365.25
+    seeds = np.random.SeedSequence(seed).spawn(3)
+    chunk_sizes = _chunk_sizes(n_resamples)
+
+    report = {'observed': observed, 'n_resamples': n_resamples, 'confidence': confidence}
+
+    bootstrap_seeds = seeds[0].spawn(len(chunk_sizes))
+    samples = _run_chunks(_bootstrap_chunk, [
+        (returns, size, block_size, s, equity[0], years, risk_free_rate, annualization_factor)
+        for size, s in zip(chunk_sizes, bootstrap_seeds)
+    ], n_jobs)
+    report['block_bootstrap'] = confidence_intervals(samples, observed, confidence)
+
+    trades = pd.DataFrame(portfolio.trades)
+    if trades.empty:
+        report['trade_shuffle'] = {}
+        report['slippage'] = {}
+        return report
+
+    trade_bars = np.clip(equity_curve.index.searchsorted(pd.DatetimeIndex(trades['timestamp']), side='left'), 0, len(equity) - 1)
+    exit_bars = np.unique(trade_bars[(trades['type'] == 'SELL').to_numpy()])
+    boundaries = np.unique(np.concatenate(([0], exit_bars, [len(equity) - 1])))
+    segment_returns = equity[boundaries[1:]] / equity[boundaries[:-1]] - 1
+    if len(segment_returns) > 1:
+        shuffle_seeds = seeds[1].spawn(len(chunk_sizes))
+        samples = _run_chunks(_trade_shuffle_chunk, [
+            (segment_returns, size, s, equity[0]) for size, s in zip(chunk_sizes, shuffle_seeds)
+        ], n_jobs)
+        report['trade_shuffle'] = confidence_intervals(samples, observed, confidence)
+    else:
+        report['trade_shuffle'] = {}
+
+    trade_notional = (trades['quantity'] * trades['price']).abs().to_numpy(dtype=float)
+    slippage_seeds = seeds[2].spawn(len(chunk_sizes))
+    samples = _run_chunks(_slippage_chunk, [
+        (equity, trade_bars, trade_notional, size, slippage_sigma_bps, s, years, risk_free_rate, annualization_factor)
+        for size, s in zip(chunk_sizes, slippage_seeds)
+    ], n_jobs)
+    report['slippage'] = confidence_intervals(samples, observed, confidence)
+    return report
@@ -0,0 +1,51 @@
+from typing import Any, Dict, List, Optional, Type, Union
+
+import pandas as pd
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.portfolio import Portfolio
+from strategies.base import BaseStrategy
+from utils.event_log import EventLog
+
+def annualization_factor_for(interval: str) -> float:
+    """Number of bars per year used to annualize metrics for a given bar interval."""
+    if interval == '1d': return 252
+    elif interval == '1h': return 252 * 6.5 # Approx 6.5 trading hours/day
+    elif interval == '30m': return 252 * 13
+    return 252
+
+def resolve_strategy(strategy_name: str) -> Type[BaseStrategy]:
+    """
+    Looks up a strategy class by name through the strategy loader's directory cache, which
+    re-executes strategy modules only after a file changed, so an edited strategy is picked up.
+    Worker processes receive strategy names rather than classes because the
+    dynamically loaded strategy modules cannot be pickled by reference.
+    """
+    from utils.strategy_loader import get_available_strategies
+    strategies = get_available_strategies()
+    if strategy_name not in strategies:
+        raise ValueError(f"Strategy '{strategy_name}' not found. Available: {list(strategies.keys())}")
+    return strategies[strategy_name]
+
+def run_strategy(data: Union[pd.DataFrame, MarketDataset], strategy: Union[str, Type[BaseStrategy]], strategy_params: Dict[str, Any],
+                 symbols: List[str], initial_capital: float = 100000.0, commission_per_share: float = 0.0, slippage_bps: float = 0.0,
+                 use_kernel: bool = False, event_log: Optional[EventLog] = None) -> Portfolio:
+    """
+    Instantiates a strategy and runs a single backtest over data, returning the final Portfolio.
+    Pass an EventLog to keep the run's events for inspection afterwards.
+    """
+    strategy_class = resolve_strategy(strategy) if isinstance(strategy, str) else strategy
+    strategy_instance = strategy_class(**strategy_params)
+    backtester = Backtester(
+        data=data,
+        strategy=strategy_class,
+        initial_capital=initial_capital,
+        commission_per_share=commission_per_share,
+        slippage_bps=slippage_bps,
+        symbols=symbols,
+        use_kernel=use_kernel,
+        event_log=event_log
+    )
+    backtester.strategy_instance = strategy_instance
+    return backtester.run()
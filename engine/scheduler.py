@@ -0,0 +1,91 @@
+import bisect
+import heapq
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from engine.dataset import MarketDataset
+
+class EventScheduler:
+    """
+    Emits bars in timestamp order by k-way merging one bar stream per symbol with a heap.
+
+    Each step yields a timestamp and the bars (indexed by Symbol) of only those symbols
+    that actually have a bar at that timestamp, so symbols on different calendars or
+    intraday grids never need to be reindexed onto a shared dense index. `last_prices`
+    holds the most recent close seen for every symbol, for valuing positions whose symbol
+    did not trade at the current timestamp; it is taken from the dataset's Mark column, so a
+    bar with a missing or non-positive close keeps the last valid price. Cost is O(total bars * log symbols).
+    """
+    def __init__(self, data: Union[pd.DataFrame, MarketDataset], symbols: Optional[List[str]] = None, initial_prices: Optional[Dict[str, float]] = None):
+        self.dataset = MarketDataset.from_frame(data)
+        # Prices carried over from bars before this dataset (e.g. when extending a finished run)
+        self.initial_prices = dict(initial_prices or {})
+        frame = self.dataset.frame
+        self._by_symbol = frame.droplevel('Date')
+        self._date_values = frame.index.get_level_values('Date')
+
+        rows_by_symbol = pd.Series(np.arange(len(frame))).groupby(frame.index.get_level_values('Symbol').to_numpy()).indices
+        # Within a timestamp the frame is sorted by Symbol, so merging in sorted symbol order keeps each step's rows contiguous
+        self.symbols = sorted(s for s in rows_by_symbol if symbols is None or s in symbols)
+        timestamps = self._date_values.asi8
+        mark = frame['Mark'].to_numpy()
+        self._rows = [rows_by_symbol[symbol] for symbol in self.symbols]
+        self._times = [timestamps[rows].tolist() for rows in self._rows]
+        self._mark = [mark[rows] for rows in self._rows]
+        self.last_prices: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        """Total number of bars across all streams."""
+        return sum(len(times) for times in self._times)
+
+    def _bars(self, rows: List[int]) -> pd.DataFrame:
+        if rows[-1] - rows[0] + 1 == len(rows):
+            return self._by_symbol.iloc[rows[0]:rows[-1] + 1]
+        return self._by_symbol.take(rows)
+
+    def _seek(self, start: int) -> Tuple[List[int], Dict[str, float]]:
+        """Per-stream cursors at step `start` and the last price of every symbol seen before it."""
+        cursors = [0] * len(self.symbols)
+        prices = dict(self.initial_prices)
+        if start > 0:
+            start_time = self.dataset.dates[start].value if start < len(self.dataset) else np.iinfo('int64').max
+            for rank, times in enumerate(self._times):
+                cursors[rank] = bisect.bisect_left(times, start_time)
+                if cursors[rank] > 0 and not np.isnan(self._mark[rank][cursors[rank] - 1]):
+                    prices[self.symbols[rank]] = self._mark[rank][cursors[rank] - 1]
+        return cursors, prices
+
+    def prices_before(self, position: int) -> Dict[str, float]:
+        """Last price of every symbol as of the end of step position - 1."""
+        return self._seek(position)[1]
+
+    def __iter__(self) -> Iterator[Tuple[pd.Timestamp, pd.DataFrame]]:
+        return self.iter_steps()
+
+    def iter_steps(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[pd.Timestamp, pd.DataFrame]]:
+        """
+        Yields steps [start, stop), where step i is the dataset's i-th distinct timestamp.
+        Starting mid-way positions every stream with a binary search and restores the last
+        prices seen before `start`, so a resumed run sees exactly what a full run would.
+        """
+        cursors, self.last_prices = self._seek(start)
+        heap = [(times[cursors[rank]], rank) for rank, times in enumerate(self._times) if cursors[rank] < len(times)]
+        heapq.heapify(heap)
+        steps = start
+        while heap and (stop is None or steps < stop):
+            timestamp = heap[0][0]
+            rows = []
+            # Pop every stream whose next bar shares this timestamp; ranks come out in symbol order
+            while heap and heap[0][0] == timestamp:
+                _, rank = heapq.heappop(heap)
+                position = cursors[rank]
+                rows.append(self._rows[rank][position])
+                mark = self._mark[rank][position]
+                if mark == mark: # NaN until the symbol's first valid close
+                    self.last_prices[self.symbols[rank]] = mark
+                cursors[rank] = position + 1
+                if position + 1 < len(self._times[rank]):
+                    heapq.heappush(heap, (self._times[rank][position + 1], rank))
+            steps += 1
+            yield self._date_values[rows[0]], self._bars(rows)
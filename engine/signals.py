@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Type
+
+import pandas as pd
+
+from engine.broker import Broker
+from engine.portfolio import Portfolio
+from strategies.base import BaseStrategy
+from utils.event_log import emit
+
+POSITION_SIGNALS = {1: "LONG", 0: "FLAT", -1: "SHORT"}
+
+def strategy_params_for_symbol(strategy_class: Type[BaseStrategy], strategy_params: Dict[str, Any], symbol: str) -> Dict[str, Any]:
+    """Strategies that trade a single target_symbol get it set to the symbol being evaluated."""
+    if 'target_symbol' in strategy_class.__init__.__code__.co_varnames:
+        return {**strategy_params, 'target_symbol': symbol}
+    return strategy_params
+
+def replay_signal(single_history: pd.DataFrame, strategy_class: Type[BaseStrategy], strategy_params: Dict[str, Any], symbol: str, lookback_period: int) -> Dict[str, Any]:
+    """
+    Replays one symbol's recent bars through a fresh strategy instance and reports the
+    position it ends in. Returns a dict with the fields of the API's LiveSignalResponse.
+    """
+    if single_history.empty:
+        return {
+            'symbol': symbol,
+            'timestamp': datetime.now().isoformat(),
+            'signal': "N/A",
+            'message': f"No recent data available for {symbol}.",
+            'success': False
+        }
+
+    if len(single_history) < lookback_period: # Or strategy's actual min lookback
+        return {
+            'symbol': symbol,
+            'timestamp': single_history.index[-1][0].isoformat(),
+            'signal': "N/A",
+            'message': f"Insufficient history ({len(single_history)} bars) for {symbol}. Needed {lookback_period}.",
+            'success': False
+        }
+
+    portfolio_monitor = Portfolio(initial_capital=10000000.0)
+    broker_monitor = Broker(commission_per_share=0.0, slippage_bps=0.0)
+    strategy_instance = strategy_class(**strategy_params_for_symbol(strategy_class, strategy_params, symbol))
+
+    current_signal = "HOLD"
+    final_strategy_position = 0
+    latest_bar_price = None
+    latest_bar_timestamp = None
+
+    for current_date_multiindex, row_data_series in single_history.iterrows():
+        latest_bar_timestamp = current_date_multiindex[0] # The date part of the MultiIndex
+        latest_bar_symbol = current_date_multiindex[1]
+        data_for_day = pd.DataFrame([row_data_series])
+        data_for_day.index = pd.Index([latest_bar_symbol], name='Symbol')
+
+        try:
+            strategy_instance.on_data(latest_bar_timestamp, data_for_day, portfolio_monitor, broker_monitor)
+            final_strategy_position = strategy_instance.position
+            latest_bar_price = row_data_series['Close']
+
+        except Exception as e:
+            emit(logging.ERROR, 'strategy_error', f"Error in strategy {strategy_instance.name} on_data for {symbol} at {latest_bar_timestamp}: {e}",
+                 symbol=symbol, timestamp=latest_bar_timestamp)
+            current_signal = "ERROR"
+            final_strategy_position = None
+            latest_bar_price = None
+            break
+
+    if current_signal != "ERROR":
+        current_signal = POSITION_SIGNALS.get(final_strategy_position, "N/A")
+
+    return {
+        'symbol': symbol,
+        'timestamp': latest_bar_timestamp.isoformat() if latest_bar_timestamp else datetime.now().isoformat(),
+        'signal': current_signal,
+        'current_price': latest_bar_price,
+        'strategy_position': final_strategy_position,
+        'message': "Signal generated successfully." if current_signal != "ERROR" else "Strategy execution error.",
+        'success': current_signal != "ERROR"
+    }
+
+def vectorized_signals(recent_history: pd.DataFrame, strategy_class: Type[BaseStrategy], strategy_params: Dict[str, Any], symbols: List[str], lookback_period: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    The signals of evaluate_signals from one vectorized_positions call over the (bars x symbols)
+    close matrix, or None if the strategy has no vectorized form.
+    """
+    if recent_history.empty:
+        return None
+    try:
+        strategy_instance = strategy_class(**strategy_params)
+        close = recent_history['Close'].unstack('Symbol').sort_index()
+        positions = strategy_instance.vectorized_positions(close)
+    except Exception as e:
+        emit(logging.WARNING, 'vectorized_signals_failed', f"Vectorized signal evaluation failed, replaying per symbol: {e}")
+        return None
+    if positions is None:
+        return None
+
+    bar_dates = recent_history.index.to_frame(index=False).groupby('Symbol')['Date']
+    counts, last_dates = bar_dates.size(), bar_dates.max()
+    signals = []
+    for symbol in symbols:
+        if symbol not in positions.columns or counts.get(symbol, 0) < lookback_period:
+            # No data or too little of it: the replay reports those without running the strategy
+            single_history = recent_history.xs(symbol, level='Symbol', drop_level=False) if symbol in counts.index else recent_history.iloc[0:0]
+            signals.append(replay_signal(single_history, strategy_class, strategy_params, symbol, lookback_period))
+            continue
+        # Like the replay, report the symbol's last bar whatever its close
+        last_date = last_dates[symbol]
+        position = int(positions.at[last_date, symbol])
+        signals.append({
+            'symbol': symbol,
+            'timestamp': last_date.isoformat(),
+            'signal': POSITION_SIGNALS.get(position, "N/A"),
+            'current_price': close.at[last_date, symbol],
+            'strategy_position': position,
+            'message': "Signal generated successfully.",
+            'success': True
+        })
+    return signals
+
+def evaluate_signals(recent_history: pd.DataFrame, strategy_class: Type[BaseStrategy], strategy_params: Dict[str, Any], symbols: List[str], lookback_period: int) -> List[Dict[str, Any]]:
+    """
+    Signal dicts for every requested symbol from a MultiIndex (Date, Symbol) history frame.
+    Strategies with a vectorized form are evaluated for all symbols in one pass; the rest
+    are replayed bar by bar, symbol by symbol.
+    """
+    signals = vectorized_signals(recent_history, strategy_class, strategy_params, symbols, lookback_period)
+    if signals is not None:
+        return signals
+    available = set(recent_history.index.get_level_values('Symbol')) if not recent_history.empty else set()
+    signals = []
+    for symbol in symbols:
+        single_history = recent_history.xs(symbol, level='Symbol', drop_level=False) if symbol in available else recent_history.iloc[0:0]
+        signals.append(replay_signal(single_history, strategy_class, strategy_params, symbol, lookback_period))
+    return signals
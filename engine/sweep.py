@@ -0,0 +1,127 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engine.dataset import MarketDataset
+from engine.vectorized import settle_near_ties, trailing_means
+
+def rolling_means(values: np.ndarray, windows: Sequence[int]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Trailing simple moving average of a 1-D array for every distinct window, as (means,
+    error) from vectorized.trailing_means: O(len(values)) per window regardless of its
+    length. Positions before a window is full are NaN.
+    """
+    ranks = np.arange(len(values))
+    return {window: trailing_means(values, ranks, window) for window in sorted(set(int(w) for w in windows))}
+
+def settle_pair_ties(values: np.ndarray, pairs: Sequence[Tuple[int, int]], short_sma: np.ndarray, short_error: np.ndarray,
+                     long_sma: np.ndarray, long_error: np.ndarray):
+    """
+    Re-sums exactly, in place, the (pairs x bars) SMAs where a pair's short and long means
+    are within rounding error of each other, so its crossovers match the strategy's.
+    """
+    with np.errstate(invalid='ignore'):
+        near_rows = np.flatnonzero((np.abs(short_sma - long_sma) <= short_error + long_error).any(axis=1))
+    for row in near_rows:
+        short, long = pairs[row]
+        settle_near_ties(values, short_sma[row], short_error[row], short, long_sma[row], long_error[row], long)
+
+def crossover_positions(short_sma: np.ndarray, long_sma: np.ndarray) -> np.ndarray:
+    """
+    SMACrossoverStrategy's position after each bar, for many (short, long) pairs at once.
+
+    Rows are combinations and columns bars. A buy happens when short crosses above long
+    while flat and a sell when long crosses above short while long, so the position is the
+    most recent crossing event carried forward (0 before the first one).
+    """
+    spread = short_sma - long_sma
+    previous = np.full_like(spread, np.nan)
+    previous[:, 1:] = spread[:, :-1]
+    with np.errstate(invalid='ignore'):
+        up = (spread > 0) & (previous <= 0)
+        down = (spread < 0) & (previous >= 0)
+    events = up | down
+    # Index of the latest event at or before each bar, forward-filled with a running maximum
+    latest = np.maximum.accumulate(np.where(events, np.arange(spread.shape[1]), -1), axis=1)
+    rows = np.arange(spread.shape[0])[:, None]
+    return np.where(latest >= 0, up[rows, np.maximum(latest, 0)], False).astype(float)
+
+class SMACrossoverSweep:
+    """
+    Evaluates every (short_window, long_window) pair of an SMA crossover grid on one symbol
+    in a few array operations instead of one Backtester run per pair.
+
+    Each distinct window's SMA is computed once into a shared matrix from running sums;
+    crossover signals, positions and equity curves for all pairs are then derived as 2-D
+    arrays, so the cost is about O(distinct windows x bars + pairs x bars). Only bars where
+    a pair's SMAs nearly tie are re-summed window by window, to match the strategy. Equity is modelled on close-to-close
+    returns with the full capital invested while long and slippage/commission charged on
+    every entry and exit, which makes it a fast screen: confirm finalists with Backtester.
+    """
+    def __init__(self, data, symbol: str, short_windows: Sequence[int], long_windows: Sequence[int],
+                 initial_capital: float = 100000.0, commission_per_share: float = 0.0, slippage_bps: float = 0.0,
+                 annualization_factor: float = 252, chunk_size: int = 1024):
+        self.dataset = MarketDataset.from_frame(data)
+        if symbol not in self.dataset.symbols:
+            raise ValueError(f"Symbol '{symbol}' not found in the data.")
+        self.symbol = symbol
+        self.pairs = [(int(s), int(l)) for s in short_windows for l in long_windows if 0 < int(s) < int(l)]
+        if not self.pairs:
+            raise ValueError("The grid has no valid (short_window < long_window) pairs.")
+        self.initial_capital = initial_capital
+        self.commission_per_share = commission_per_share
+        self.slippage_bps = slippage_bps
+        self.annualization_factor = annualization_factor
+        self.chunk_size = chunk_size
+
+    def run(self) -> pd.DataFrame:
+        close = self.dataset.symbol_frame(self.symbol)['Close']
+        # The strategy ignores missing and non-positive closes, so its SMAs run over the valid ones only
+        close = close[close.notna() & (close > 0)]
+        prices = close.to_numpy(dtype=float)
+        windows = sorted({w for pair in self.pairs for w in pair})
+        sma = rolling_means(prices, windows)
+        sma_matrix = np.vstack([sma[w][0] for w in windows])
+        error_matrix = np.vstack([sma[w][1] for w in windows])
+        window_rows = {w: i for i, w in enumerate(windows)}
+
+        bar_returns = np.zeros(len(prices))
+        bar_returns[1:] = prices[1:] / prices[:-1] - 1
+        cost_per_change = self.slippage_bps / 10000.0 + self.commission_per_share / prices
+
+        reports: List[Dict[str, float]] = []
+        for start in range(0, len(self.pairs), self.chunk_size):
+            chunk = self.pairs[start:start + self.chunk_size]
+            short_rows = [window_rows[s] for s, _ in chunk]
+            long_rows = [window_rows[l] for _, l in chunk]
+            short_sma, long_sma = sma_matrix[short_rows], sma_matrix[long_rows]
+            settle_pair_ties(prices, chunk, short_sma, error_matrix[short_rows], long_sma, error_matrix[long_rows])
+            positions = crossover_positions(short_sma, long_sma)
+
+            held = np.zeros_like(positions)
+            held[:, 1:] = positions[:, :-1]
+            changes = np.abs(np.diff(positions, axis=1, prepend=0.0))
+            returns = held * bar_returns - changes * cost_per_change
+            equity = self.initial_capital * np.cumprod(1 + returns, axis=1)
+            reports.extend(self._summaries(chunk, returns, equity, changes.sum(axis=1)))
+
+        results = pd.DataFrame(reports)
+        return results.sort_values('Sharpe Ratio', ascending=False, na_position='last').reset_index(drop=True)
+
+    def _summaries(self, pairs, returns: np.ndarray, equity: np.ndarray, trade_counts: np.ndarray) -> List[Dict[str, float]]:
+        period_returns = returns[:, 1:]
+        std = period_returns.std(axis=1, ddof=1) if period_returns.shape[1] > 1 else np.full(len(pairs), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = np.where(std > 0, period_returns.mean(axis=1) / std * np.sqrt(self.annualization_factor), np.nan)
+        max_drawdown = (equity / np.maximum.accumulate(equity, axis=1) - 1).min(axis=1)
+        return [{
+            'short_window': s,
+            'long_window': l,
+            'Total Return(%)': (equity[i, -1] / self.initial_capital - 1) * 100,
+            'Annualized Volatility (%)': std[i] * np.sqrt(self.annualization_factor) * 100,
+            'Sharpe Ratio': sharpe[i],
+            'Max Drawdown (%)': max_drawdown[i] * 100,
+            'Trade Count': int(trade_counts[i]),
+            'Final Equity': equity[i, -1],
+        } for i, (s, l) in enumerate(pairs)]
@@ -0,0 +1,155 @@
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+ROUND_TRIP_COLUMNS = ['symbol', 'entry_time', 'exit_time', 'quantity', 'entry_price', 'exit_price', 'commission',
+                      'pnl', 'return_pct', 'holding_period', 'holding_bars', 'mae', 'mfe', 'mae_pct', 'mfe_pct']
+
+def _fills(trades: Union[List[Dict[str, Any]], pd.DataFrame]) -> pd.DataFrame:
+    fills = trades if isinstance(trades, pd.DataFrame) else pd.DataFrame(trades)
+    if fills.empty:
+        return fills
+    fills = fills[fills['quantity'] > 0]
+    # A stable sort keeps same-timestamp fills in the order they were recorded
+    return fills.sort_values(['symbol', 'timestamp'], kind='stable')
+
+def _sparse_table(values: np.ndarray, reduce) -> np.ndarray:
+    """Row k holds reduce() over values[i:i + 2**k], for O(1) range queries."""
+    levels = max(1, int(np.log2(max(len(values), 1))) + 1)
+    table = np.empty((levels, len(values)))
+    table[0] = values
+    for k in range(1, levels):
+        width = 1 << (k - 1)
+        table[k] = table[k - 1]
+        table[k, :len(values) - width] = reduce(table[k - 1, :len(values) - width], table[k - 1, width:])
+    return table
+
+def _range_reduce(table: np.ndarray, starts: np.ndarray, stops: np.ndarray, reduce, empty: float) -> np.ndarray:
+    """reduce() over values[starts[i]:stops[i]] for every i at once; `empty` where the range is empty."""
+    lengths = stops - starts
+    result = np.full(len(starts), empty)
+    valid = lengths > 0
+    k = np.floor(np.log2(np.where(valid, lengths, 1))).astype(int)
+    left = table[k[valid], starts[valid]]
+    right = table[k[valid], stops[valid] - (1 << k[valid])]
+    result[valid] = reduce(left, right)
+    return result
+
+def _match_symbol(symbol: str, buys: pd.DataFrame, sells: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    FIFO matching as interval intersection: lot i of the buys covers the cumulative quantity
+    range [B[i-1], B[i]) and sell j covers [S[j-1], S[j]). Every segment between consecutive
+    breakpoints of both sequences is one matched piece, found with two searchsorted calls.
+    """
+    if buys.empty or sells.empty:
+        return None
+    buy_qty = buys['quantity'].to_numpy(dtype=float)
+    sell_qty = sells['quantity'].to_numpy(dtype=float)
+    cum_buys, cum_sells = np.cumsum(buy_qty), np.cumsum(sell_qty)
+    matched = min(cum_buys[-1], cum_sells[-1])
+    tolerance = 1e-9 * max(matched, 1.0)
+    edges = np.unique(np.concatenate(([0.0], cum_buys, cum_sells)))
+    edges = edges[edges <= matched + tolerance]
+    lower, upper = edges[:-1], edges[1:]
+    quantity = upper - lower
+    keep = quantity > tolerance
+    lower, quantity = lower[keep], quantity[keep]
+    buy_index = np.minimum(np.searchsorted(cum_buys, lower + tolerance, 'left'), len(buy_qty) - 1)
+    sell_index = np.minimum(np.searchsorted(cum_sells, lower + tolerance, 'left'), len(sell_qty) - 1)
+
+    entry_price = buys['price'].to_numpy(dtype=float)[buy_index]
+    exit_price = sells['price'].to_numpy(dtype=float)[sell_index]
+    # Each fill's commission is split across its pieces in proportion to quantity
+    commission = (buys['commission'].to_numpy(dtype=float)[buy_index] * quantity / buy_qty[buy_index]
+                  + sells['commission'].to_numpy(dtype=float)[sell_index] * quantity / sell_qty[sell_index])
+    # Indexing the DatetimeArray (not to_numpy) keeps any timezone without boxing Timestamps
+    entry_time = pd.to_datetime(buys['timestamp']).array[buy_index]
+    exit_time = pd.to_datetime(sells['timestamp']).array[sell_index]
+    return pd.DataFrame({
+        'symbol': symbol,
+        'entry_time': entry_time,
+        'exit_time': exit_time,
+        'quantity': quantity,
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'commission': commission,
+        'pnl': (exit_price - entry_price) * quantity - commission,
+        'return_pct': (exit_price / entry_price - 1) * 100,
+        'holding_period': exit_time - entry_time,
+    })
+
+def _excursions(trips: pd.DataFrame, symbol_bars: pd.DataFrame):
+    """
+    Fills holding_bars, MAE and MFE for one symbol's round trips. The adverse (favourable)
+    excursion is the lowest low (highest high) of the bars after entry up to and including
+    exit, bounded by the exit price, relative to the entry price.
+    """
+    dates = pd.DatetimeIndex(symbol_bars.index).asi8
+    starts = np.searchsorted(dates, pd.DatetimeIndex(trips['entry_time']).asi8, 'right')
+    stops = np.searchsorted(dates, pd.DatetimeIndex(trips['exit_time']).asi8, 'right')
+    lows = _range_reduce(_sparse_table(symbol_bars['Low'].to_numpy(dtype=float), np.fmin), starts, stops, np.fmin, np.inf)
+    highs = _range_reduce(_sparse_table(symbol_bars['High'].to_numpy(dtype=float), np.fmax), starts, stops, np.fmax, -np.inf)
+    entry, exit_, quantity = trips['entry_price'].to_numpy(), trips['exit_price'].to_numpy(), trips['quantity'].to_numpy()
+    worst = np.fmin(lows, exit_)
+    best = np.fmax(highs, exit_)
+    trips['holding_bars'] = stops - starts
+    trips['mae'] = np.minimum(worst - entry, 0.0) * quantity
+    trips['mfe'] = np.maximum(best - entry, 0.0) * quantity
+    trips['mae_pct'] = np.minimum(worst / entry - 1, 0.0) * 100
+    trips['mfe_pct'] = np.maximum(best / entry - 1, 0.0) * 100
+
+def round_trips(trades: Union[List[Dict[str, Any]], pd.DataFrame], bars: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Pairs a trade log (Portfolio.trades or a saved trade log) into FIFO round trips, one row
+    per matched (entry fill, exit fill) piece, in order of symbol and entry. P&L is computed
+    from the fills and net of commissions. With (Date, Symbol) OHLC bars, holding period in
+    bars, MAE and MFE are filled in; otherwise those columns are NaN. Positions still open at
+    the end of the log are not included.
+    """
+    fills = _fills(trades)
+    if fills.empty:
+        return pd.DataFrame(columns=ROUND_TRIP_COLUMNS)
+
+    pieces = []
+    for symbol, symbol_fills in fills.groupby('symbol', sort=True):
+        trips = _match_symbol(symbol, symbol_fills[symbol_fills['type'] == 'BUY'], symbol_fills[symbol_fills['type'] == 'SELL'])
+        if trips is None:
+            continue
+        if bars is not None and symbol in bars.index.get_level_values('Symbol'):
+            _excursions(trips, bars.xs(symbol, level='Symbol').sort_index())
+        pieces.append(trips)
+    if not pieces:
+        return pd.DataFrame(columns=ROUND_TRIP_COLUMNS)
+    return pd.concat(pieces, ignore_index=True).reindex(columns=ROUND_TRIP_COLUMNS)
+
+def trade_statistics(trips: pd.DataFrame) -> Dict[str, float]:
+    """Summary statistics of round_trips() output, keyed like Metrics.performance_summary."""
+    stats = {
+        'Round Trips': len(trips),
+        'Win Rate (%)': np.nan,
+        'Profit Factor': np.nan,
+        'Expectancy': np.nan,
+        'Avg Holding Period (days)': np.nan,
+        'Avg MAE (%)': np.nan,
+        'Avg MFE (%)': np.nan,
+    }
+    if trips.empty:
+        return stats
+    pnl = trips['pnl'].to_numpy(dtype=float)
+    gross_profit = pnl[pnl > 0].sum()
+    gross_loss = -pnl[pnl < 0].sum()
+    stats['Win Rate (%)'] = (pnl > 0).mean() * 100
+    if gross_loss > 0:
+        stats['Profit Factor'] = gross_profit / gross_loss
+    elif gross_profit > 0:
+        stats['Profit Factor'] = np.inf
+    stats['Expectancy'] = pnl.mean()
+    stats['Avg Holding Period (days)'] = pd.to_timedelta(trips['holding_period']).mean() / pd.Timedelta(days=1)
+    stats['Avg MAE (%)'] = trips['mae_pct'].astype(float).mean()
+    stats['Avg MFE (%)'] = trips['mfe_pct'].astype(float).mean()
+    return stats
+
+def trade_summary(trades: Union[List[Dict[str, Any]], pd.DataFrame], bars: Optional[pd.DataFrame] = None) -> Dict[str, float]:
+    """trade_statistics(round_trips(trades, bars))."""
+    return trade_statistics(round_trips(trades, bars))
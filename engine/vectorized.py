@@ -0,0 +1,102 @@
+from typing import Tuple
+
+import numpy as np
+
+def compress_valid(close: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    The closes of a (bars x symbols) matrix that strategies act on (present and positive),
+    flattened column by column. Returns (values, column, rank within the column, row), so a
+    column's valid closes are contiguous and in time order.
+    """
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(close) & (close > 0)
+    columns, rows = np.nonzero(valid.T)
+    values = close[rows, columns]
+    column_starts = np.searchsorted(columns, np.arange(close.shape[1]))
+    ranks = np.arange(len(columns)) - column_starts[columns]
+    return values, columns, ranks, rows
+
+# Running sums restart every SUM_BLOCK values, which bounds their rounding error by the block
+SUM_BLOCK = 4096
+# Rows of windows gathered at once when means are re-summed exactly
+EXACT_SUM_CHUNK = 1 << 20
+
+def trailing_means(values: np.ndarray, ranks: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean of each element and the window - 1 before it in the same column (NaN until the
+    column has `window` values), from running sums in O(len(values)) whatever the window.
+    Returns (means, error): error bounds how far each mean can be from the one the per-bar
+    strategy computes, so comparisons closer than that go through exact_means.
+    """
+    means = np.full(len(values), np.nan)
+    error = np.full(len(values), np.nan)
+    if len(values) < window:
+        return means, error
+    block = max(SUM_BLOCK, window)
+    for begin in range(0, len(values), block):
+        start, end = max(begin - window, 0), min(begin + block, len(values))
+        sums = np.concatenate(([0.0], np.cumsum(values[start:end])))
+        magnitudes = np.cumsum(np.abs(values[start:end]))
+        ends = np.arange(max(begin, window - 1), end)
+        means[ends] = (sums[ends - start + 1] - sums[ends - start + 1 - window]) / window
+        # Sequential cumsum error plus the exact sum's own, with a factor of 2 to spare
+        error[ends] = 2 * (2 * (end - start) + window) * np.finfo(float).eps * magnitudes[ends - start] / window
+    full = ranks >= window - 1
+    means[~full] = np.nan
+    error[~full] = np.nan
+    return means, error
+
+def exact_means(values: np.ndarray, ends: np.ndarray, window: int) -> np.ndarray:
+    """
+    Means of the windows ending at flat indices `ends`, each summed on its own in the same
+    order as Series.iloc[-window:].mean(), so they match the per-bar strategy exactly.
+    """
+    means = np.empty(len(ends))
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    step = max(EXACT_SUM_CHUNK // window, 1)
+    for begin in range(0, len(ends), step):
+        rows = np.ascontiguousarray(windows[ends[begin:begin + step] - (window - 1)])
+        means[begin:begin + step] = rows.sum(axis=1) / window
+    return means
+
+def settle_near_ties(values: np.ndarray, short: np.ndarray, short_error: np.ndarray, short_window: int,
+                     long: np.ndarray, long_error: np.ndarray, long_window: int):
+    """
+    Re-sums in place, with exact_means, the short and long means of trailing_means wherever
+    they are within rounding error of each other, so crossovers land on the same bars as
+    the per-bar strategy's.
+    """
+    with np.errstate(invalid='ignore'):
+        near = np.flatnonzero(np.abs(short - long) <= short_error + long_error)
+    if len(near):
+        short[near] = exact_means(values, near, short_window)
+        long[near] = exact_means(values, near, long_window)
+
+def previous_in_column(defined: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """Flat index of the previous defined element in the same column, or -1."""
+    positions = np.arange(len(defined))
+    latest = np.maximum.accumulate(np.where(defined, positions, -1))
+    previous = np.full(len(defined), -1)
+    previous[1:] = latest[:-1]
+    same_column = previous >= 0
+    same_column[same_column] = columns[previous[same_column]] == columns[same_column]
+    return np.where(same_column, previous, -1)
+
+def event_positions(buy: np.ndarray, sell: np.ndarray, columns: np.ndarray, rows: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """
+    (bars x symbols) positions from flat buy/sell events: 1 after a buy, 0 after a sell,
+    carried forward through bars without a valid close, 0 before a column's first event.
+    """
+    events = buy | sell
+    latest = previous_in_column(events, columns)
+    # previous_in_column looks strictly back; an event on the element itself takes precedence
+    latest = np.where(events, np.arange(len(events)), latest)
+    flat_positions = np.where(latest >= 0, buy[np.maximum(latest, 0)], False).astype(float)
+
+    positions = np.full(shape, np.nan)
+    positions[rows, columns] = flat_positions
+    # Forward-fill each column down the rows through bars that had no valid close
+    filled_rows = np.where(~np.isnan(positions), np.arange(shape[0])[:, None], 0)
+    filled_rows = np.maximum.accumulate(filled_rows, axis=0)
+    positions = positions[filled_rows, np.arange(shape[1])]
+    return np.nan_to_num(positions, nan=0.0)
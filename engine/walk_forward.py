@@ -0,0 +1,234 @@
+import logging
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from engine.dataset import MarketDataset
+from engine.metrics import Metrics
+from engine.runner import run_strategy
+from utils.event_log import emit
+
+# Dataset shared with pool workers. Workers are forked, so they inherit it without copying.
+_worker_dataset: Optional[MarketDataset] = None
+
+def generate_windows(n_dates: int, train_size: int, test_size: int, step: Optional[int] = None, anchored: bool = False) -> List[Tuple[int, int, int, int]]:
+    """
+    Splits n_dates date positions into in-sample/out-of-sample windows.
+
+    :param train_size: Number of dates in each in-sample window (the first one, if anchored).
+    :param test_size: Number of dates in each out-of-sample window.
+    :param step: Dates to advance between windows. Defaults to test_size so OOS windows tile.
+    :param anchored: If True, every in-sample window starts at the first date and grows.
+    :return: List of (train_start, train_stop, test_start, test_stop) position tuples, stop exclusive.
+    """
+    if train_size <= 0 or test_size <= 0:
+        raise ValueError("Train and test window sizes must be positive.")
+    step = test_size if step is None else step
+    if step <= 0:
+        raise ValueError("Window step must be positive.")
+
+    windows = []
+    train_stop = train_size
+    while train_stop + test_size <= n_dates:
+        train_start = 0 if anchored else train_stop - train_size
+        windows.append((train_start, train_stop, train_stop, train_stop + test_size))
+        train_stop += step
+    return windows
+
+def expand_grid(param_grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Cartesian product of a {parameter: [values]} grid as a list of parameter dicts."""
+    if not param_grid:
+        return [{}]
+    keys = list(param_grid.keys())
+    return [dict(zip(keys, values)) for values in itertools.product(*(param_grid[k] for k in keys))]
+
+def objective_score(equity_curve: pd.Series, objective: str, annualization_factor: float, trade_count: int = 0) -> float:
+    summary = Metrics.performance_summary(equity_curve, annualization_factor=annualization_factor, trade_count=trade_count)
+    score = summary.get(objective, np.nan)
+    return -np.inf if score is None or np.isnan(score) else float(score)
+
+def _init_worker(dataset: MarketDataset):
+    global _worker_dataset
+    _worker_dataset = dataset
+
+def _score_candidate(task: Dict[str, Any]) -> List[float]:
+    """
+    Runs one parameter candidate over dates [start, stop) and scores the equity curve
+    at every cut in task['cuts'] (relative positions). Because a backtest over a longer
+    prefix passes through the same states as a shorter one, a single run can score
+    several anchored windows at once.
+    """
+    dataset = _worker_dataset.slice(task['start'], task['stop'])
+    try:
+        portfolio = run_strategy(dataset, task['strategy_name'], task['params'], task['symbols'],
+                                 task['initial_capital'], task['commission_per_share'], task['slippage_bps'])
+    except ValueError as e:
+        emit(logging.WARNING, 'candidate_skipped', f"Skipping candidate {task['params']}: {e}")
+        return [-np.inf] * len(task['cuts'])
+
+    equity_curve = portfolio.get_equity_curve()
+    trade_times = pd.DatetimeIndex([trade['timestamp'] for trade in portfolio.trades])
+    scores = []
+    for cut in task['cuts']:
+        window_curve = equity_curve.iloc[:cut]
+        trade_count = int((trade_times <= window_curve.index[-1]).sum()) if len(window_curve) else 0
+        scores.append(objective_score(window_curve, task['objective'], task['annualization_factor'], trade_count))
+    return scores
+
+class WalkForwardOptimizer:
+    """
+    Rolling or anchored walk-forward optimization.
+
+    For every in-sample window a parameter grid is evaluated and the best candidate by
+    `objective` (a Metrics.performance_summary key) is then run on the following
+    out-of-sample window. OOS equity curves are chained so that each window starts with
+    the previous window's ending equity. All window datasets are row slices of the shared
+    MarketDataset, so no market data is copied per window or per candidate.
+
+    Each OOS run starts warmup_bars dates before its window (default: train_size) so the
+    strategy's indicators are primed and the positions it would hold carry into the window;
+    only the window itself is scored, as returns relative to the equity on its eve. A window
+    where no candidate could be scored is reported with best_params None and skipped.
+    """
+    def __init__(self, data, strategy_name: str, param_grid: Dict[str, List[Any]], symbols: List[str],
+                 train_size: int, test_size: int, step: Optional[int] = None, anchored: bool = False,
+                 fixed_params: Optional[Dict[str, Any]] = None, initial_capital: float = 100000.0,
+                 commission_per_share: float = 0.0, slippage_bps: float = 0.0, objective: str = 'Sharpe Ratio',
+                 annualization_factor: float = 252, max_workers: Optional[int] = None, warmup_bars: Optional[int] = None):
+        self.dataset = MarketDataset.from_frame(data)
+        self.windows = generate_windows(len(self.dataset), train_size, test_size, step, anchored)
+        if not self.windows:
+            raise ValueError(f"Dataset with {len(self.dataset)} dates is too short for train_size={train_size}, test_size={test_size}.")
+
+        if warmup_bars is not None and warmup_bars < 0:
+            raise ValueError("Warm-up bars cannot be negative.")
+        self.warmup_bars = train_size if warmup_bars is None else warmup_bars
+
+        self.strategy_name = strategy_name
+        self.candidates = expand_grid(param_grid)
+        self.fixed_params = fixed_params or {}
+        self.symbols = symbols
+        self.anchored = anchored
+        self.initial_capital = initial_capital
+        self.commission_per_share = commission_per_share
+        self.slippage_bps = slippage_bps
+        self.objective = objective
+        self.annualization_factor = annualization_factor
+        self.max_workers = max_workers
+
+    def _task(self, params: Dict[str, Any], start: int, stop: int, cuts: List[int]) -> Dict[str, Any]:
+        return {
+            'strategy_name': self.strategy_name,
+            'params': {**self.fixed_params, **params},
+            'symbols': self.symbols,
+            'start': start,
+            'stop': stop,
+            'cuts': cuts,
+            'initial_capital': self.initial_capital,
+            'commission_per_share': self.commission_per_share,
+            'slippage_bps': self.slippage_bps,
+            'objective': self.objective,
+            'annualization_factor': self.annualization_factor,
+        }
+
+    def _build_tasks(self) -> Tuple[List[Dict[str, Any]], List[List[Tuple[int, int]]]]:
+        """
+        Returns the tasks to run and, for each task, the (window, candidate) slots its scores fill.
+        Anchored windows share a prefix, so each candidate is run once up to the last in-sample
+        end and scored at every window boundary instead of once per window.
+        """
+        tasks, slots = [], []
+        if self.anchored:
+            last_stop = self.windows[-1][1]
+            cuts = [train_stop for _, train_stop, _, _ in self.windows]
+            for c, params in enumerate(self.candidates):
+                tasks.append(self._task(params, 0, last_stop, cuts))
+                slots.append([(w, c) for w in range(len(self.windows))])
+            return tasks, slots
+
+        for w, (train_start, train_stop, _, _) in enumerate(self.windows):
+            for c, params in enumerate(self.candidates):
+                tasks.append(self._task(params, train_start, train_stop, [train_stop - train_start]))
+                slots.append([(w, c)])
+        return tasks, slots
+
+    def _run_tasks(self, tasks: List[Dict[str, Any]]) -> List[List[float]]:
+        if self.max_workers == 1 or len(tasks) == 1:
+            _init_worker(self.dataset)
+            return [_score_candidate(task) for task in tasks]
+        context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context, initializer=_init_worker, initargs=(self.dataset,)) as executor:
+            return list(executor.map(_score_candidate, tasks, chunksize=max(1, len(tasks) // (4 * (self.max_workers or 4)))))
+
+    def _run_out_of_sample(self, params: Dict[str, Any], test_start: int, test_stop: int, capital: float) -> Tuple[pd.Series, List[Dict[str, Any]]]:
+        """
+        Runs params from warmup_bars dates before test_start to test_stop and returns the
+        equity curve of [test_start, test_stop) rescaled to start from capital, with the
+        trades made in that range.
+        """
+        warm_start = max(0, test_start - self.warmup_bars)
+        portfolio = run_strategy(self.dataset.slice(warm_start, test_stop), self.strategy_name, params, self.symbols,
+                                 capital, self.commission_per_share, self.slippage_bps)
+        equity_curve = portfolio.get_equity_curve()
+        test_begin = self.dataset.dates[test_start]
+        warmup_curve = equity_curve[equity_curve.index < test_begin]
+        base = float(warmup_curve.iloc[-1]) if len(warmup_curve) else capital
+        oos_curve = equity_curve[equity_curve.index >= test_begin]
+        if base > 0:
+            oos_curve = oos_curve * (capital / base)
+        oos_trades = [trade for trade in portfolio.trades if pd.Timestamp(trade['timestamp']) >= test_begin]
+        return oos_curve, oos_trades
+
+    def run(self) -> Dict[str, Any]:
+        tasks, slots = self._build_tasks()
+        results = self._run_tasks(tasks)
+
+        scores = np.full((len(self.windows), len(self.candidates)), -np.inf)
+        for task_slots, task_scores in zip(slots, results):
+            for (w, c), score in zip(task_slots, task_scores):
+                scores[w, c] = score
+
+        # Out-of-sample evaluation is sequential because each window starts from the previous window's equity
+        _init_worker(self.dataset)
+        window_reports = []
+        oos_curves = []
+        capital = self.initial_capital
+        total_trades = 0
+        for w, (train_start, train_stop, test_start, test_stop) in enumerate(self.windows):
+            report = {
+                'train_start': self.dataset.dates[train_start],
+                'train_end': self.dataset.dates[train_stop - 1],
+                'test_start': self.dataset.dates[test_start],
+                'test_end': self.dataset.dates[test_stop - 1],
+            }
+            if not np.isfinite(scores[w]).any():
+                emit(logging.WARNING, 'window_skipped', f"No candidate could be scored in-sample for window {report['train_start']} - {report['train_end']}; "
+                                                        f"skipping its out-of-sample run.")
+                window_reports.append({**report, 'best_params': None, 'in_sample_score': np.nan, 'out_of_sample_score': np.nan, 'trade_count': 0})
+                continue
+            best = int(np.argmax(scores[w]))
+            best_params = {**self.fixed_params, **self.candidates[best]}
+            oos_curve, oos_trades = self._run_out_of_sample(best_params, test_start, test_stop, capital)
+            if not oos_curve.empty:
+                capital = float(oos_curve.iloc[-1])
+                oos_curves.append(oos_curve)
+            total_trades += len(oos_trades)
+            window_reports.append({
+                **report,
+                'best_params': best_params,
+                'in_sample_score': scores[w, best],
+                'out_of_sample_score': objective_score(oos_curve, self.objective, self.annualization_factor, len(oos_trades)),
+                'trade_count': len(oos_trades),
+            })
+
+        oos_equity_curve = pd.concat(oos_curves) if oos_curves else pd.Series([], dtype=float, name='Equity')
+        return {
+            'windows': window_reports,
+            'oos_equity_curve': oos_equity_curve,
+            'summary': Metrics.performance_summary(oos_equity_curve, annualization_factor=self.annualization_factor, trade_count=total_trades),
+            'backtests_run': len(tasks),
+        }
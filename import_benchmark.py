@@ -0,0 +1,42 @@
+# import_benchmark.py
+# Measures API cold start: wall-clock time to import backend.app in fresh interpreters,
+# the slowest modules in that import, and how long each warm-up component takes afterwards.
+# Usage: python import_benchmark.py [runs] [top_modules]
+import os
+import subprocess
+import sys
+import statistics
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+IMPORT_SNIPPET = "import time; start = time.perf_counter(); import backend.app; print(time.perf_counter() - start)"
+WARMUP_SNIPPET = ("import backend.app; from backend.warmup import warm_up; "
+                  "print(warm_up(['strategies', 'indicators']))")
+
+def run_python(args, env_overrides=None) -> subprocess.CompletedProcess:
+    env = {**os.environ, 'RETROSPECT_WARMUP': 'none', **(env_overrides or {})}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+def import_profile(top: int):
+    """(module, self seconds, cumulative seconds) of the slowest imports, from -X importtime."""
+    rows = []
+    for line in run_python(['-X', 'importtime', '-c', 'import backend.app']).stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    seconds = [float(run_python(['-c', IMPORT_SNIPPET]).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    print(f"import backend.app over {runs} fresh interpreters: median {statistics.median(seconds):.3f}s, "
+          f"min {min(seconds):.3f}s, max {max(seconds):.3f}s")
+
+    print("\nSlowest imports (cumulative):")
+    for module, self_seconds, cumulative_seconds in import_profile(top):
+        print(f"  {cumulative_seconds:7.3f}s  (self {self_seconds:6.3f}s)  {module}")
+
+    print(f"\nWarm-up after import: {run_python(['-c', WARMUP_SNIPPET]).stdout.strip().splitlines()[-1]}")
@@ -0,0 +1,58 @@
+# kernel_benchmark.py
+# Compares Backtester's per-bar Python loop with the engine.kernels path on synthetic data.
+# Usage: python kernel_benchmark.py [n_bars] [python_bars]
+import sys
+import io
+import time
+import contextlib
+import numpy as np
+import pandas as pd
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.kernels import NUMBA_AVAILABLE
+from strategies.library.sma_crossover import SMACrossoverStrategy
+from strategies.library.rsi import RSIStrategy
+
+def synthetic_bars(n_bars: int, symbol: str = 'SYN', seed: int = 0) -> MarketDataset:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, n_bars)))
+    index = pd.MultiIndex.from_arrays([pd.date_range('2000-01-03', periods=n_bars, freq='min', name='Date'), [symbol] * n_bars], names=['Date', 'Symbol'])
+    frame = pd.DataFrame({'Open': close, 'High': close * 1.001, 'Low': close * 0.999, 'Close': close, 'Volume': 1000}, index=index)
+    return MarketDataset(frame)
+
+def timed_run(dataset: MarketDataset, strategy_class, params: dict, use_kernel: bool):
+    backtester = Backtester(dataset, strategy_class, 100000.0, 0.005, 1.0, ['SYN'], use_kernel=use_kernel)
+    backtester.strategy_instance = strategy_class(**params)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        portfolio = backtester.run()
+    return portfolio, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n_bars = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    python_bars = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    print(f"Numba available: {NUMBA_AVAILABLE}")
+
+    cases = [
+        (SMACrossoverStrategy, {'short_window': 50, 'long_window': 200, 'target_symbol': 'SYN'}),
+        (RSIStrategy, {'period': 14, 'target_symbol': 'SYN'}),
+    ]
+    full = synthetic_bars(n_bars)
+    subset = full.slice(0, min(python_bars, n_bars))
+    for strategy_class, params in cases:
+        # Warm-up compiles the kernel (or loads it from Numba's cache) outside the timing
+        timed_run(subset.slice(0, min(1000, len(subset))), strategy_class, params, use_kernel=True)
+
+        python_portfolio, python_seconds = timed_run(subset, strategy_class, params, use_kernel=False)
+        kernel_portfolio, _ = timed_run(subset, strategy_class, params, use_kernel=True)
+        identical = (python_portfolio.trades == kernel_portfolio.trades
+                     and python_portfolio.equity_curve_data == kernel_portfolio.equity_curve_data)
+
+        _, kernel_seconds = timed_run(full, strategy_class, params, use_kernel=True)
+        python_rate = len(subset) / python_seconds
+        kernel_rate = n_bars / kernel_seconds
+        print(f"\n{strategy_class.__name__}")
+        print(f"  Python loop : {len(subset):>9,} bars in {python_seconds:8.2f}s ({python_rate:12,.0f} bars/s)")
+        print(f"  Kernel      : {n_bars:>9,} bars in {kernel_seconds:8.2f}s ({kernel_rate:12,.0f} bars/s)")
+        print(f"  Speed-up    : {kernel_rate / python_rate:.1f}x, identical results on {len(subset):,} bars: {identical}")
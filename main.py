@@ -1,18 +1,32 @@
+import asyncio
 import typer, yaml, os, traceback
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from typing import Optional
 
 from utils.data_loader import load_historical_data
+from utils.live_data import LiveBarCache
 from utils.strategy_loader import get_available_strategies
 from engine.backtester import Backtester
+from engine.distributed import run_coordinator, run_worker
+from engine.dataset import MarketDataset
 from engine.metrics import Metrics
+from engine.runner import annualization_factor_for
+from engine.walk_forward import WalkForwardOptimizer
+from engine.optimizer import SuccessiveHalvingOptimizer
+from engine.paper_trading import LiveBarFeed, PaperTrader, ReplayFeed, bar_latency, run_paper_trading
+from engine.sweep import SMACrossoverSweep
+from engine.risk import risk_report
+from engine.trade_analytics import trade_summary
+from utils.result_io import ExperimentResultWriter, experiment_dir_name, write_risk_report
+from utils.result_store import ResultStore, canonical_config, result_key
 #from utils.plotter import plot_equity_curves, plot_drawdowns
 
 app = typer.Typer(help="Quantitative Backtesting Engine")
 
 @app.command()
-def run_backtests(config_file: str , output_dir: str):
+def run_backtests(config_file: str , output_dir: str, use_cache: bool = True, checkpoint_every: int = 0):
     print(f"--- Starting Backtest Engine (Non-Typer Mode) ---")
     print(f"--- Loading configuration from: {config_file} ---")
 
@@ -40,8 +54,9 @@ def run_backtests(config_file: str , output_dir: str):
     else:
         print(f"Found {len(available_strategies)} strategies: {list(available_strategies.keys())}")
     
-    equity_curves = {}
-    drawdown_curves = {}
+    result_store = ResultStore() if use_cache else None
+    # Curves and trade logs are written as each experiment finishes; only the small summary rows stay in memory
+    result_writer = ExperimentResultWriter(output_dir)
     performance_summaries = []
 
     for i, experiment_config in enumerate(config['experiments']):
@@ -72,7 +87,8 @@ def run_backtests(config_file: str , output_dir: str):
             if market_data.empty:
                 print(f"Warning: No data loaded for '{experiment_name}'. Skipping.")
                 continue
-            print(f"Data loaded: {market_data.shape[0]} rows, {len(market_data.index.get_level_values('Symbol').unique())} symbols.")
+            market_dataset = MarketDataset(market_data)
+            print(f"Data loaded: {market_data.shape[0]} rows, {len(market_dataset.symbols)} symbols.")
         except Exception as e:
             print(f"Error loading data for '{experiment_name}': {e}.")
             traceback.print_exc()
@@ -100,34 +116,68 @@ def run_backtests(config_file: str , output_dir: str):
 
         # --- Instantiate Strategy & Backtester and Run ---
         try:
-            print(f"Instantiating strategy '{strategy_name}' with params: {strategy_parameters}")
-            strategy_instance = strategy_class(**strategy_parameters) # Instantiate with parameters from config
-
-            print(f"Running backtest for '{experiment_name}'...")
-            backtester = Backtester(data=market_data,strategy=strategy_instance.__class__,initial_capital=initial_capital,commission_per_share=commission_per_share,slippage_bps=slippage_bps,symbols=symbols)
-            backtester.strategy_instance = strategy_instance
-            final_portfolio = backtester.run()
-            print(f"Backtest for '{experiment_name}' completed.")
-            equity_curve = final_portfolio.get_equity_curve()
-
-            if interval == '1d': annualization_factor = 252
-            elif interval == '1h': annualization_factor = 252 * 6.5 # Approx 6.5 trading hours/day
-            elif interval == '30m': annualization_factor = 252 * 13
-            else: annualization_factor = 252
-
-            performance_summary = Metrics.performance_summary(equity_curve,risk_free_rate=0,annualization_factor = annualization_factor,trade_count=len(final_portfolio.trades))
+            annualization_factor = annualization_factor_for(interval)
+            cache_key = None
+            cached_result = None
+            if result_store is not None:
+                run_config = canonical_config(symbols, start_date, end_date, interval, commission_per_share, slippage_bps,
+                                              initial_capital, strategy_name, strategy_parameters)
+                cache_key = result_key(run_config, market_dataset.version, strategy_class)
+                cached_result = result_store.get(cache_key)
+
+            if cached_result is not None:
+                print(f"Using cached result for '{experiment_name}'.")
+                equity_curve = cached_result['equity_curve']
+                trades = cached_result['trades']
+                performance_summary = cached_result['summary']
+                if 'Round Trips' not in performance_summary: # Stored before trade analytics existed
+                    performance_summary.update(trade_summary(trades, market_dataset.frame))
+            else:
+                print(f"Instantiating strategy '{strategy_name}' with params: {strategy_parameters}")
+                strategy_instance = strategy_class(**strategy_parameters) # Instantiate with parameters from config
+
+                print(f"Running backtest for '{experiment_name}'...")
+                # With checkpoint_every > 0 an interrupted run picks up from its last checkpoint on the next invocation
+                checkpoint_path = os.path.join(output_dir, 'checkpoints', f"{experiment_dir_name(experiment_name)}.ckpt") if checkpoint_every > 0 else None
+                backtester = Backtester(data=market_dataset,strategy=strategy_instance.__class__,initial_capital=initial_capital,commission_per_share=commission_per_share,slippage_bps=slippage_bps,symbols=symbols,
+                                        checkpoint_path=checkpoint_path,checkpoint_every=checkpoint_every)
+                backtester.strategy_instance = strategy_instance
+                final_portfolio = backtester.run()
+                print(f"Backtest for '{experiment_name}' completed.")
+                equity_curve = final_portfolio.get_equity_curve()
+                trades = final_portfolio.trades
+
+                performance_summary = Metrics.performance_summary(equity_curve,risk_free_rate=0,annualization_factor = annualization_factor,trade_count=len(trades))
+                performance_summary.update(trade_summary(trades, market_dataset.frame))
+                if cache_key is not None:
+                    result_store.put(cache_key, strategy_class, performance_summary, equity_curve, trades)
+
             performance_summary['Experiment Name'] = experiment_name
             performance_summaries.append(performance_summary)
-            equity_curves[experiment_name] = equity_curve
 
-            current_drawdown = Metrics.calculate_drawdowns(equity_curve)
-            drawdown_curves[experiment_name] = current_drawdown
+            current_drawdown = Metrics.calculate_drawdowns(equity_curve) if not equity_curve.empty else pd.Series([], dtype=float)
+            experiment_dir = result_writer.write_experiment(experiment_name, performance_summary, equity_curve, current_drawdown, trades)
+            print(f"Results for '{experiment_name}' written to {experiment_dir}")
+
+            risk_config = experiment_config.get('risk')
+            if risk_config and not equity_curve.empty:
+                benchmark = risk_config.get('benchmark')
+                if benchmark and benchmark not in market_dataset.symbols:
+                    # A benchmark outside the traded universe only contributes its prices
+                    benchmark_data = load_historical_data([benchmark], start_date, end_date, interval)
+                    benchmark = benchmark_data.xs(benchmark, level='Symbol')['Mark'] if not benchmark_data.empty else None
+                report = risk_report(market_dataset, trades, equity_curve, benchmark=benchmark, window=risk_config.get('window', 63),
+                                     annualization_factor=annualization_factor, covariance_step=risk_config.get('covariance_step'))
+                write_risk_report(report, experiment_dir)
+                print(f"Risk summary for '{experiment_name}': {report['summary']}")
 
         except Exception as e:
             print(f"Error running backtest for '{experiment_name}': {e}")
             traceback.print_exc()
             continue # Continue to next experiment even if one fails
 
+    result_writer.close()
+
     # --- 4. Final Reporting ---
     print("\n========================================================")
     print("                Backtest Summary Report                 ")
@@ -142,7 +192,8 @@ def run_backtests(config_file: str , output_dir: str):
     # Define desired column order for readability
     display_cols = ['Experiment Name', 'Total Return(%)', 'Annualized Return(%)', 
                     'Sharpe Ratio', 'Max Drawdown (%)', 'Annualized Volatility (%)',
-                    'Winning Days (%)', 'Losing Days (%)', 'Trade Count']
+                    'Winning Days (%)', 'Losing Days (%)', 'Trade Count', 'Round Trips', 'Win Rate (%)',
+                    'Profit Factor', 'Expectancy', 'Avg Holding Period (days)', 'Avg MAE (%)', 'Avg MFE (%)']
     
     # Filter to only display columns that actually exist in the summary_df, to prevent KeyError
     summary_df = summary_df[[col for col in display_cols if col in summary_df.columns]]
@@ -150,8 +201,253 @@ def run_backtests(config_file: str , output_dir: str):
     
     print("\nPerformance Metrics Comparison:")
     print(summary_df.to_markdown(index=False))
+    print(f"\nResults written to {result_writer.output_dir} (load with utils.result_io.load_experiment_results)")
     print("\n--- Backtest Engine Finished ---")
 
+@app.command()
+def walk_forward(config_file: str):
+    """Runs walk-forward optimization for every experiment with a 'walk_forward' section."""
+    with open(config_file, 'r') as f:
+        config = yaml.safe_load(f)
+
+    for i, experiment_config in enumerate(config.get('experiments', [])):
+        wf_config = experiment_config.get('walk_forward')
+        if not wf_config:
+            continue
+        experiment_name = experiment_config.get('name', f"Experiment_{i+1}")
+        data_config = experiment_config.get('data', {})
+        broker_settings_config = experiment_config.get('broker_settings', {})
+        portfolio_settings_config = experiment_config.get('portfolio_settings', {})
+        strategy_config = experiment_config.get('strategy', {})
+        interval = data_config.get('interval', '1d')
+
+        print(f"\n--- Walk-forward: {experiment_name} ---")
+        try:
+            market_data = load_historical_data(data_config['symbols'], data_config['start_date'], data_config['end_date'], interval)
+            if market_data.empty:
+                print(f"Warning: No data loaded for '{experiment_name}'. Skipping.")
+                continue
+            optimizer = WalkForwardOptimizer(
+                MarketDataset(market_data),
+                strategy_name=strategy_config.get('name'),
+                param_grid=wf_config.get('param_grid', {}),
+                symbols=data_config['symbols'],
+                train_size=wf_config['train_size'],
+                test_size=wf_config['test_size'],
+                step=wf_config.get('step'),
+                anchored=wf_config.get('anchored', False),
+                fixed_params=strategy_config.get('parameters', {}),
+                initial_capital=portfolio_settings_config.get('initial_capital', 100000.0),
+                commission_per_share=broker_settings_config.get('commission_per_share', 0.0),
+                slippage_bps=broker_settings_config.get('slippage_bps', 0.0),
+                objective=wf_config.get('objective', 'Sharpe Ratio'),
+                annualization_factor=annualization_factor_for(interval),
+                max_workers=wf_config.get('max_workers'),
+                warmup_bars=wf_config.get('warmup_bars')
+            )
+            result = optimizer.run()
+        except Exception as e:
+            print(f"Error running walk-forward for '{experiment_name}': {e}")
+            traceback.print_exc()
+            continue
+
+        windows_df = pd.DataFrame(result['windows'])
+        print(windows_df.to_markdown(index=False))
+        print(f"Out-of-sample summary: {result['summary']}")
+
+@app.command()
+def optimize(config_file: str):
+    """Runs a successive-halving parameter search for every experiment with an 'optimize' section."""
+    with open(config_file, 'r') as f:
+        config = yaml.safe_load(f)
+
+    for i, experiment_config in enumerate(config.get('experiments', [])):
+        opt_config = experiment_config.get('optimize')
+        if not opt_config:
+            continue
+        experiment_name = experiment_config.get('name', f"Experiment_{i+1}")
+        data_config = experiment_config.get('data', {})
+        broker_settings_config = experiment_config.get('broker_settings', {})
+        portfolio_settings_config = experiment_config.get('portfolio_settings', {})
+        strategy_config = experiment_config.get('strategy', {})
+        interval = data_config.get('interval', '1d')
+
+        print(f"\n--- Successive halving: {experiment_name} ---")
+        try:
+            market_data = load_historical_data(data_config['symbols'], data_config['start_date'], data_config['end_date'], interval)
+            if market_data.empty:
+                print(f"Warning: No data loaded for '{experiment_name}'. Skipping.")
+                continue
+            optimizer = SuccessiveHalvingOptimizer(
+                MarketDataset(market_data),
+                strategy_name=strategy_config.get('name'),
+                param_grid=opt_config.get('param_grid', {}),
+                symbols=data_config['symbols'],
+                fixed_params=strategy_config.get('parameters', {}),
+                initial_capital=portfolio_settings_config.get('initial_capital', 100000.0),
+                commission_per_share=broker_settings_config.get('commission_per_share', 0.0),
+                slippage_bps=broker_settings_config.get('slippage_bps', 0.0),
+                objective=opt_config.get('objective', 'Sharpe Ratio'),
+                annualization_factor=annualization_factor_for(interval),
+                reduction_factor=opt_config.get('reduction_factor', 3),
+                min_dates=opt_config.get('min_dates', 60),
+                max_workers=opt_config.get('max_workers')
+            )
+            result = optimizer.run()
+        except Exception as e:
+            print(f"Error running optimization for '{experiment_name}': {e}")
+            traceback.print_exc()
+            continue
+
+        print(pd.DataFrame(result['rungs']).to_markdown(index=False))
+        saved_pct = 100.0 * result['bar_evaluations_saved'] / result['full_grid_bar_evaluations'] if result['full_grid_bar_evaluations'] else 0.0
+        print(f"Best parameters: {result['best_params']} ({opt_config.get('objective', 'Sharpe Ratio')}: {result['best_score']:.4f})")
+        print(f"Bar evaluations: {result['bar_evaluations']:,} of {result['full_grid_bar_evaluations']:,} for the full grid ({saved_pct:.1f}% saved)")
+
+@app.command()
+def sweep(config_file: str, top: int = 20):
+    """Screens SMA crossover window grids for every experiment with a 'sweep' section, all pairs at once."""
+    with open(config_file, 'r') as f:
+        config = yaml.safe_load(f)
+
+    for i, experiment_config in enumerate(config.get('experiments', [])):
+        sweep_config = experiment_config.get('sweep')
+        if not sweep_config:
+            continue
+        experiment_name = experiment_config.get('name', f"Experiment_{i+1}")
+        data_config = experiment_config.get('data', {})
+        broker_settings_config = experiment_config.get('broker_settings', {})
+        portfolio_settings_config = experiment_config.get('portfolio_settings', {})
+        interval = data_config.get('interval', '1d')
+
+        print(f"\n--- SMA crossover sweep: {experiment_name} ---")
+        try:
+            market_data = load_historical_data(data_config['symbols'], data_config['start_date'], data_config['end_date'], interval)
+            if market_data.empty:
+                print(f"Warning: No data loaded for '{experiment_name}'. Skipping.")
+                continue
+            dataset = MarketDataset(market_data)
+            for symbol in sweep_config.get('symbols', data_config['symbols']):
+                results = SMACrossoverSweep(
+                    dataset,
+                    symbol=symbol,
+                    short_windows=sweep_config['short_windows'],
+                    long_windows=sweep_config['long_windows'],
+                    initial_capital=portfolio_settings_config.get('initial_capital', 100000.0),
+                    commission_per_share=broker_settings_config.get('commission_per_share', 0.0),
+                    slippage_bps=broker_settings_config.get('slippage_bps', 0.0),
+                    annualization_factor=annualization_factor_for(interval)
+                ).run()
+                print(f"\n{symbol}: {len(results)} window pairs")
+                print(results.head(top).to_markdown(index=False))
+        except Exception as e:
+            print(f"Error running sweep for '{experiment_name}': {e}")
+            traceback.print_exc()
+
+@app.command()
+def paper_trade(config_file: str, experiment: Optional[str] = None, speed: float = 0.0, max_gap: Optional[float] = None,
+                metrics_file: Optional[str] = None, live: bool = False, poll_interval: float = 60.0, history_bars: int = 0,
+                max_bars: Optional[int] = None):
+    """
+    Runs experiments forward bar by bar on a replay of their historical data, as a paper-trading
+    session would run on a live feed. speed is how many seconds of bar time pass per second
+    (0 replays as fast as possible); metrics_file receives the bar latency histogram in
+    Prometheus text format. With --live the experiment's symbols are instead traded on bars
+    as they close upstream, polled every poll_interval seconds, until max_bars bars or Ctrl-C;
+    history_bars recent bars are played first to prime indicators.
+    """
+    with open(config_file, 'r') as f:
+        config = yaml.safe_load(f)
+    available_strategies = get_available_strategies()
+
+    for i, experiment_config in enumerate(config.get('experiments', [])):
+        experiment_name = experiment_config.get('name', f"Experiment_{i+1}")
+        if experiment is not None and experiment_name != experiment:
+            continue
+        data_config = experiment_config.get('data', {})
+        broker_settings_config = experiment_config.get('broker_settings', {})
+        portfolio_settings_config = experiment_config.get('portfolio_settings', {})
+        strategy_config = experiment_config.get('strategy', {})
+        interval = data_config.get('interval', '1d')
+
+        print(f"\n--- Paper trading {'live' if live else 'replay'}: {experiment_name} ---")
+        try:
+            if strategy_config.get('name') not in available_strategies:
+                print(f"Error: Strategy '{strategy_config.get('name')}' not found. Skipping.")
+                continue
+            if live:
+                feed = LiveBarFeed(LiveBarCache(poll_interval=poll_interval), data_config['symbols'], interval, poll_interval=poll_interval,
+                                   history_bars=history_bars, max_bars=max_bars)
+            else:
+                market_data = load_historical_data(data_config['symbols'], data_config['start_date'], data_config['end_date'], interval)
+                if market_data.empty:
+                    print(f"Warning: No data loaded for '{experiment_name}'. Skipping.")
+                    continue
+                feed = ReplayFeed(MarketDataset(market_data), speed=speed or None, max_gap=max_gap)
+            trader = PaperTrader(
+                available_strategies[strategy_config['name']](**strategy_config.get('parameters', {})),
+                initial_capital=portfolio_settings_config.get('initial_capital', 100000.0),
+                commission_per_share=broker_settings_config.get('commission_per_share', 0.0),
+                slippage_bps=broker_settings_config.get('slippage_bps', 0.0)
+            )
+            try:
+                asyncio.run(run_paper_trading(feed, [trader]))
+            except KeyboardInterrupt:
+                print("Paper trading stopped.")
+        except Exception as e:
+            print(f"Error running paper trading for '{experiment_name}': {e}")
+            traceback.print_exc()
+            continue
+
+        print(pd.DataFrame([trader.summary(annualization_factor=annualization_factor_for(interval))]).to_markdown(index=False))
+        print(f"Fills: {len(trader.fills)}")
+
+    if metrics_file:
+        with open(metrics_file, 'w') as f:
+            f.write("\n".join(bar_latency.render()) + "\n")
+        print(f"Latency metrics written to {metrics_file}")
+
+@app.command()
+def coordinate(config_file: str, queue_dir: str, output_dir: Optional[str] = None, local_workers: int = 0, lease_seconds: float = 300.0,
+               max_attempts: int = 3, poll_interval: float = 1.0, resume: bool = False):
+    """
+    Runs a config's experiments (and any 'grid' parameter sweeps) on workers sharing queue_dir,
+    printing each summary as it comes back. Start workers on other hosts with
+    `main.py worker <queue_dir>`; local_workers starts that many on this host as well.
+    With --resume, results an earlier run left in queue_dir are reused while the strategy
+    code is unchanged and the date range is in the past.
+    """
+    with open(config_file, 'r') as f:
+        config = yaml.safe_load(f)
+
+    def report(summary):
+        print(f"Finished '{summary['Experiment Name']}': Total Return {summary.get('Total Return(%)')}%, Sharpe {summary.get('Sharpe Ratio')}")
+
+    outcome = run_coordinator(config, queue_dir, local_workers=local_workers, poll_interval=poll_interval, lease_seconds=lease_seconds,
+                              max_attempts=max_attempts, on_result=report, resume=resume)
+    for experiment_name, errors in outcome['failed'].items():
+        print(f"Error: '{experiment_name}' failed after {len(errors)} attempts: {errors[-1]}")
+    if not outcome['results']:
+        print("No backtests were successfully run.")
+        return
+
+    summary_df = pd.DataFrame(outcome['results'])
+    summary_df = summary_df[['Experiment Name'] + [col for col in summary_df.columns if col != 'Experiment Name']]
+    print("\nPerformance Metrics Comparison:")
+    print(summary_df.to_markdown(index=False))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        summary_df.to_parquet(os.path.join(output_dir, 'distributed_summary.parquet'), index=False)
+        print(f"\nSummary written to {os.path.join(output_dir, 'distributed_summary.parquet')}")
+
+@app.command()
+def worker(queue_dir: str, worker_id: Optional[str] = None, poll_interval: float = 1.0, idle_timeout: Optional[float] = None,
+           lease_seconds: float = 300.0, max_attempts: int = 3):
+    """Runs backtests from a coordinator's queue_dir until the coordinator closes it (or idle_timeout seconds pass with no work)."""
+    completed = run_worker(queue_dir, worker_id=worker_id, poll_interval=poll_interval, idle_timeout=idle_timeout,
+                           lease_seconds=lease_seconds, max_attempts=max_attempts)
+    print(f"Worker finished after completing {completed} tasks.")
+
 if __name__ == "__main__":
     config_file_path = "config/experiments_template.yaml" # Default config file for this script
     output_directory_path = "results"
@@ -8,6 +8,59 @@ class BaseStrategy(ABC):
     def __init__(self, name: str = "BaseStrategy", **kwargs):
         self.name = name
         self.params = kwargs
+        self.dataset = None
+
+    def bind_dataset(self, dataset):
+        """Called by the Backtester before the first bar with the MarketDataset being run."""
+        self.dataset = dataset
+
+    def higher_timeframe_bars(self, interval: str, symbol: str, current_timestamp: pd.Timestamp) -> pd.DataFrame:
+        """
+        Completed bars of a coarser interval (e.g. '1d' while running on '1h' data) up to
+        current_timestamp. Resampled once per run from the bound dataset; no downloads.
+        """
+        if getattr(self, 'dataset', None) is None:
+            raise RuntimeError(f"Strategy {self.name} is not bound to a dataset.")
+        return self.dataset.bars_asof(interval, symbol, current_timestamp)
+
+    @staticmethod
+    def valid_close(data_for_day: pd.DataFrame, symbol: str):
+        """
+        The symbol's close if its bar is usable, else None. Bars from a MarketDataset carry the
+        loader's precomputed Valid column; other frames fall back to checking the close is
+        present and positive.
+        """
+        if 'Valid' in data_for_day.columns:
+            return data_for_day.at[symbol, 'Close'] if data_for_day.at[symbol, 'Valid'] else None
+        close = data_for_day.at[symbol, 'Close']
+        return None if pd.isna(close) or close <= 0 else close
+
+    def get_state(self) -> dict:
+        """
+        Everything on_data needs to continue from where it stopped, for checkpoints. The
+        default captures the instance attributes except the bound dataset; strategies holding
+        unpicklable objects (clients, open files) should override this and set_state.
+        """
+        return {key: value for key, value in vars(self).items() if key != 'dataset'}
+
+    def set_state(self, state: dict):
+        vars(self).update(state)
+
+    def kernel_spec(self):
+        """
+        (kernel name, symbol, params) naming an engine.kernels implementation equivalent to
+        this strategy's on_data, or None if the strategy only runs through on_data.
+        """
+        return None
+
+    def vectorized_positions(self, close: pd.DataFrame):
+        """
+        Position (1 long, 0 flat) after every bar for each column of a (bars x symbols)
+        close matrix, equal to what a fresh instance's on_data would reach replaying that
+        column alone with every order filled. None if the strategy has no vectorized form;
+        callers then replay on_data symbol by symbol.
+        """
+        return None
     
     @abstractmethod
     def on_data(self,current_timestamp:pd.Timestamp, data: pd.DataFrame, portfolio: Portfolio, broker: Broker):
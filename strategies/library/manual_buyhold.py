@@ -1,7 +1,9 @@
+import logging
 import pandas as pd
 from engine.portfolio import Portfolio
 from engine.broker import Broker
 from strategies.base import BaseStrategy
+from utils.event_log import emit
 
 class ManualBuyAndHoldStrategy(BaseStrategy): # Renamed: no leading underscore
     """
@@ -20,11 +22,12 @@ class ManualBuyAndHoldStrategy(BaseStrategy): # Renamed: no leading underscore
             # print(f"DEBUG: Skipping day {current_date.date()} for {self.target_symbol} - no data or target not set.")
             return
 
-        current_price = data_for_day.loc[self.target_symbol, 'Close']
+        current_price = self.valid_close(data_for_day, self.target_symbol)
 
         # Basic validation for price before attempting trade
-        if pd.isna(current_price) or current_price <= 0:
-            print(f"Skipping {self.target_symbol} on {current_timestamp.date()}: Invalid price {current_price:.2f}")
+        if current_price is None:
+            emit(logging.DEBUG, 'invalid_price', "Skipping bar with an invalid price.",
+                 symbol=self.target_symbol, timestamp=current_timestamp, price=data_for_day.at[self.target_symbol, 'Close'])
             return
 
         shares_to_buy = 10 # Example fixed quantity to buy
@@ -33,7 +36,8 @@ class ManualBuyAndHoldStrategy(BaseStrategy): # Renamed: no leading underscore
 
         # Trading logic: Buy once if not already bought and sufficient cash
         if not self.bought and portfolio.cash >= cost_of_trade: 
-            print(f"Attempting to BUY {shares_to_buy} {self.target_symbol} at {current_price:.2f} on {current_timestamp.date()}")
             broker.execute_order(current_timestamp, portfolio, self.target_symbol, 'BUY', shares_to_buy, current_price)
             self.bought = True # Mark as bought so it doesn't buy again
-            print(f"Executed BUY {self.target_symbol}. New cash: {portfolio.cash:.2f}, Position {self.target_symbol}: {portfolio.get_position(self.target_symbol)}")
\ No newline at end of file
+            emit(logging.INFO, 'order_submitted', f"Submitted BUY of {shares_to_buy} {self.target_symbol} at {current_price:.2f}.",
+                 symbol=self.target_symbol, timestamp=current_timestamp, cash=portfolio.cash,
+                 position=portfolio.get_position(self.target_symbol))
\ No newline at end of file
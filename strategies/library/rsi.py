@@ -4,6 +4,9 @@ from strategies.base import BaseStrategy
 from engine.broker import Broker
 from engine.portfolio import Portfolio
 from typing import Optional,Dict
+import logging
+from utils.event_log import emit
+from engine.vectorized import compress_valid, event_positions, previous_in_column
 
 class RSIStrategy(BaseStrategy):
     def __init__(self, name = "RSI", period:int = 14,oversold_threshold:float = 30, overbought_threshold:float = 70,target_symbol:str = None, **kwargs):
@@ -24,14 +27,60 @@ class RSIStrategy(BaseStrategy):
         self.oversold_threshold = oversold_threshold
         self.overbought_threshold = overbought_threshold
 
+    def kernel_spec(self):
+        # Subclasses overriding on_data and instances that already hold state take the Python path
+        if type(self).on_data is not RSIStrategy.on_data or self.prices is not None or self.target_symbol is None or not float(self.period).is_integer():
+            return None
+        return ('rsi', self.target_symbol, (int(self.period), float(self.oversold_threshold), float(self.overbought_threshold)))
+
+    def vectorized_positions(self, close: pd.DataFrame):
+        if type(self).on_data is not RSIStrategy.on_data or self.prices is not None or not float(self.period).is_integer():
+            return None
+        # API and sweep parameters arrive as floats such as 14.0
+        period = int(self.period)
+        values, columns, ranks, rows = compress_valid(close.to_numpy(dtype=float))
+        changes = np.full(len(values), np.nan)
+        changes[1:] = values[1:] - values[:-1]
+        gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+
+        # Each bar's RSI is an EWM over the diffs of its last min(count, 2 * period) prices,
+        # right-aligned in a matrix and advanced one column at a time with pandas' recursion
+        width = 2 * period - 1
+        computed = np.flatnonzero(ranks >= period)
+        n_diffs = np.minimum(ranks[computed], width)
+        offsets = np.arange(width) - (width - 1)
+        index = np.maximum(computed[:, None] + offsets, 0)
+        alpha = 1.0 / (1.0 + (period - 1))
+        decay = 1.0 - alpha
+        avg_gain = np.full(len(computed), np.nan)
+        avg_loss = np.full(len(computed), np.nan)
+        for k in range(width):
+            first = k == width - n_diffs
+            active = k > width - n_diffs
+            gain, loss = gains[index[:, k]], losses[index[:, k]]
+            avg_gain = np.where(first, gain, np.where(active & (avg_gain != gain), (decay * avg_gain + alpha * gain) / (decay + alpha), avg_gain))
+            avg_loss = np.where(first, loss, np.where(active & (avg_loss != loss), (decay * avg_loss + alpha * loss) / (decay + alpha), avg_loss))
+
+        rsi = np.full(len(values), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi[computed] = np.where(avg_loss == 0, 100.0, 100 - (100 / (1 + avg_gain / avg_loss)))
+        rsi[computed[(avg_loss == 0) & (avg_gain == 0)]] = np.nan
+        defined = ~np.isnan(rsi)
+        previous = previous_in_column(defined, columns)
+        has_previous = defined & (previous >= 0)
+        last_rsi = rsi[np.maximum(previous, 0)]
+        buy = has_previous & (rsi > self.oversold_threshold) & (last_rsi <= self.oversold_threshold)
+        sell = has_previous & ~buy & (rsi < self.overbought_threshold) & (last_rsi >= self.overbought_threshold)
+        positions = event_positions(buy, sell, columns, rows, close.shape)
+        return pd.DataFrame(positions, index=close.index, columns=close.columns)
+
     def on_data(self, current_timestamp:pd.Timestamp,data_for_day:pd.DataFrame,portfolio:Portfolio, broker:Broker):
         if self.target_symbol is None or self.target_symbol not in data_for_day.index:
-            print("The data for the ticker you're looking for is not available")
+            emit(logging.DEBUG, 'symbol_missing', "No bar for the target symbol at this timestamp.", symbol=self.target_symbol, timestamp=current_timestamp)
             return
         
-        current_closing_price = data_for_day.loc[self.target_symbol,'Close']
-
-        if pd.isna(current_closing_price) or current_closing_price<=0:
+        current_closing_price = self.valid_close(data_for_day, self.target_symbol)
+        if current_closing_price is None:
             return
         
         if self.prices is None:
@@ -77,7 +126,7 @@ class RSIStrategy(BaseStrategy):
                     self.position = 1
 
             else:
-                print(f"BUY signal is already long for {self.target_symbol} at the time of {current_timestamp}")
+                emit(logging.DEBUG, 'signal_ignored', "BUY signal while already long.", symbol=self.target_symbol, timestamp=current_timestamp)
         
         #Logic for selling
         elif current_rsi<self.overbought_threshold and (self.last_rsi is not None and self.last_rsi>=self.overbought_threshold):
@@ -88,7 +137,7 @@ class RSIStrategy(BaseStrategy):
                     self.position = 0
 
             else:
-                print(f"SELL signal is already flat for {self.target_symbol} at the time of {current_timestamp}")
+                emit(logging.DEBUG, 'signal_ignored', "SELL signal while already flat.", symbol=self.target_symbol, timestamp=current_timestamp)
             
         self.last_rsi = current_rsi
         
\ No newline at end of file
@@ -4,6 +4,9 @@ from strategies.base import BaseStrategy
 from engine.broker import Broker
 from engine.portfolio import Portfolio
 from typing import Optional,Dict
+import logging
+from utils.event_log import emit
+from engine.vectorized import compress_valid, event_positions, previous_in_column, settle_near_ties, trailing_means
 
 class SMACrossoverStrategy(BaseStrategy):
     def __init__(self, name="SMA Crossover", short_window:int=50, long_window:int=200, target_symbol:str = None,**kwargs):
@@ -25,14 +28,35 @@ class SMACrossoverStrategy(BaseStrategy):
         self.last_short:Optional[float] = None
         self.last_long:Optional[float] = None
     
+    def kernel_spec(self):
+        # Subclasses overriding on_data and instances that already hold state take the Python path
+        if type(self).on_data is not SMACrossoverStrategy.on_data or self.prices is not None or self.target_symbol is None:
+            return None
+        return ('sma_crossover', self.target_symbol, (self.short_window, self.long_window))
+
+    def vectorized_positions(self, close: pd.DataFrame):
+        if type(self).on_data is not SMACrossoverStrategy.on_data or self.prices is not None:
+            return None
+        values, columns, ranks, rows = compress_valid(close.to_numpy(dtype=float))
+        short_sma, short_error = trailing_means(values, ranks, self.short_window)
+        long_sma, long_error = trailing_means(values, ranks, self.long_window)
+        settle_near_ties(values, short_sma, short_error, self.short_window, long_sma, long_error, self.long_window)
+        defined = ranks >= self.long_window - 1
+        previous = previous_in_column(defined, columns)
+        has_previous = defined & (previous >= 0)
+        last_short, last_long = short_sma[np.maximum(previous, 0)], long_sma[np.maximum(previous, 0)]
+        buy = has_previous & (short_sma > long_sma) & (last_short <= last_long)
+        sell = has_previous & ~buy & (long_sma > short_sma) & (last_long <= last_short)
+        positions = event_positions(buy, sell, columns, rows, close.shape)
+        return pd.DataFrame(positions, index=close.index, columns=close.columns)
+
     def on_data(self, current_timestamp : pd.Timestamp, data_for_day:pd.DataFrame, portfolio:Portfolio, broker:Broker):
         if self.target_symbol is None or self.target_symbol not in data_for_day.index:
-            print("The data for the ticker you're looking for is not available")
+            emit(logging.DEBUG, 'symbol_missing', "No bar for the target symbol at this timestamp.", symbol=self.target_symbol, timestamp=current_timestamp)
             return
         
-        current_closing_price = data_for_day.loc[self.target_symbol,'Close']
-
-        if pd.isna(current_closing_price) or current_closing_price<=0:
+        current_closing_price = self.valid_close(data_for_day, self.target_symbol)
+        if current_closing_price is None:
             return
         
         if self.prices is None:
@@ -63,7 +87,7 @@ class SMACrossoverStrategy(BaseStrategy):
                     self.position = 1
 
             else:
-                print(f"BUY signal is already long for {self.target_symbol} at the time of {current_timestamp}")
+                emit(logging.DEBUG, 'signal_ignored', "BUY signal while already long.", symbol=self.target_symbol, timestamp=current_timestamp)
         
         #Logic for selling
         elif long_sma>short_sma and (self.last_long is not None and self.last_long<=self.last_short):
@@ -74,7 +98,7 @@ class SMACrossoverStrategy(BaseStrategy):
                     self.position = 0
 
             else:
-                print(f"SELL signal is already flat for {self.target_symbol} at the time of {current_timestamp}")
+                emit(logging.DEBUG, 'signal_ignored', "SELL signal while already flat.", symbol=self.target_symbol, timestamp=current_timestamp)
         
         self.last_short = short_sma
         self.last_long = long_sma
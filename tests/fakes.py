@@ -0,0 +1,42 @@
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+class FakeBarFeed:
+    """
+    Deterministic in-memory bar source standing in for YFinanceBarFeed. Bars are revealed up
+    to a cursor that advance() moves forward; fetch() ignores the period and returns at most
+    `max_bars` of the visible bars, counting calls so tests can assert on upstream traffic.
+    """
+    def __init__(self, bars: Dict[str, pd.DataFrame], visible: int, max_bars: Optional[int] = None, delay: float = 0.0):
+        self.bars = bars
+        self.visible = visible
+        self.max_bars = max_bars
+        self.delay = delay
+        self.fetch_count = 0
+
+    def advance(self, n: int = 1):
+        self.visible += n
+
+    def fetch(self, symbol: str, interval: str, period: str) -> pd.DataFrame:
+        self.fetch_count += 1
+        if self.delay:
+            time.sleep(self.delay)
+        bars = self.bars.get(symbol, pd.DataFrame())
+        visible = bars.iloc[:self.visible]
+        return visible.iloc[-self.max_bars:] if self.max_bars else visible
+
+def synthetic_bars(symbols=('AAA', 'BBB'), n=400, seed=0, start='2020-01-01', freq='B') -> pd.DataFrame:
+    """(Date, Symbol) OHLCV bars following seeded random walks."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=n, freq=freq, name='Date')
+    frames = []
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+        open_ = close * (1 + rng.normal(0, 0.005, n))
+        frames.append(pd.DataFrame({'Date': dates, 'Symbol': symbol, 'Open': open_, 'High': np.maximum(open_, close) * 1.01,
+                                    'Low': np.minimum(open_, close) * 0.99, 'Close': close,
+                                    'Volume': rng.integers(1000, 100000, n).astype(float)}))
+    return pd.concat(frames).set_index(['Date', 'Symbol']).sort_index()
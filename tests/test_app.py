@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.app as app_module
+from fakes import synthetic_bars
+
+BACKTEST = {
+    'name': 'probe',
+    'data': {'symbols': ['AAA'], 'start_date': '2020-01-01', 'end_date': '2021-06-01', 'interval': '1d'},
+    'strategy': {'name': 'SMA Crossover', 'parameters': {'short_window': 5, 'long_window': 20, 'target_symbol': 'AAA'}},
+    'broker_settings': {}, 'portfolio_settings': {}, 'use_cache': False,
+}
+
+@pytest.fixture
+def loads(monkeypatch):
+    threads = []
+
+    def fake_load(symbols, start_date, end_date, interval='1d', **kwargs):
+        threads.append(threading.current_thread())
+        return synthetic_bars(tuple(symbols), n=300)
+
+    monkeypatch.setattr(app_module, 'load_historical_data', fake_load)
+    return threads
+
+def test_backtest_runs_on_the_worker_pool(loads):
+    with TestClient(app_module.app) as client:
+        response = client.post('/api/backtest/run', json=BACKTEST)
+        assert response.status_code == 200
+        assert response.json()['success']
+        assert 'backtest;dur=' in response.headers['server-timing']
+        assert loads and loads[0] is not threading.main_thread()
+        assert loads[0].name.startswith('retrospect-worker')
+
+def test_unknown_strategy_is_reported(loads):
+    with TestClient(app_module.app) as client:
+        response = client.post('/api/backtest/run', json={**BACKTEST, 'strategy': {'name': 'Missing', 'parameters': {}}})
+        assert response.status_code == 500
+        assert "Strategy 'Missing' not found" in response.json()['detail']
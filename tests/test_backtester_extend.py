@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.metrics import Metrics
+from engine.runner import resolve_strategy
+from fakes import synthetic_bars
+
+STRATEGIES = [
+    ('SMA Crossover', {'short_window': 10, 'long_window': 40, 'target_symbol': 'AAA'}),
+    ('RSI', {'period': 10, 'target_symbol': 'BBB'}),
+]
+
+@pytest.fixture(scope='module')
+def dataset():
+    return MarketDataset(synthetic_bars(('AAA', 'BBB'), n=900, seed=3))
+
+def run(data, strategy_class, parameters, use_kernel):
+    backtester = Backtester(data, strategy_class, 100000.0, 0.01, 1.0, ['AAA', 'BBB'], use_kernel=use_kernel)
+    backtester.strategy_instance = strategy_class(**parameters)
+    backtester.run()
+    return backtester
+
+def assert_same_run(extended, full):
+    extended_curve = extended.portfolio.get_equity_curve()
+    full_curve = full.portfolio.get_equity_curve()
+    assert list(extended_curve.index) == list(full_curve.index)
+    np.testing.assert_allclose(extended_curve.to_numpy(), full_curve.to_numpy(), rtol=1e-12)
+    assert len(extended.portfolio.trades) == len(full.portfolio.trades)
+    for extended_trade, full_trade in zip(extended.portfolio.trades, full.portfolio.trades):
+        assert extended_trade['timestamp'] == full_trade['timestamp']
+        assert extended_trade['symbol'] == full_trade['symbol']
+        assert extended_trade['type'] == full_trade['type']
+        assert extended_trade['quantity'] == full_trade['quantity']
+        assert extended_trade['price'] == pytest.approx(full_trade['price'], rel=1e-12)
+    summary = extended.summary(annualization_factor=252)
+    reference = Metrics.performance_summary(full_curve, annualization_factor=252, trade_count=len(full.portfolio.trades))
+    for key, value in reference.items():
+        if np.isnan(value):
+            assert np.isnan(summary[key])
+        else:
+            assert summary[key] == pytest.approx(value, rel=1e-9, abs=1e-9), key
+
+@pytest.mark.parametrize('use_kernel', [False, True], ids=['python', 'kernel'])
+@pytest.mark.parametrize('name,parameters', STRATEGIES, ids=[name for name, _ in STRATEGIES])
+def test_extend_from_state_matches_full_run(tmp_path, dataset, name, parameters, use_kernel):
+    strategy_class = resolve_strategy(name)
+    full = run(dataset, strategy_class, parameters, use_kernel)
+    assert full.portfolio.trades
+
+    prefix = run(dataset.slice(0, 600), strategy_class, parameters, use_kernel)
+    prefix.save_state(str(tmp_path / 'state.pkl'))
+    # New data may overlap bars already processed; only the later ones are run
+    extended = Backtester.from_state(str(tmp_path / 'state.pkl'), strategy_class, dataset.slice(590, len(dataset)))
+    assert_same_run(extended, full)
+
+@pytest.mark.parametrize('name,parameters', STRATEGIES, ids=[name for name, _ in STRATEGIES])
+def test_repeated_extensions_match_full_run(tmp_path, dataset, name, parameters):
+    strategy_class = resolve_strategy(name)
+    full = run(dataset, strategy_class, parameters, False)
+
+    prefix = run(dataset.slice(0, 400), strategy_class, parameters, False)
+    prefix.save_state(str(tmp_path / 'first.pkl'))
+    middle = Backtester.from_state(str(tmp_path / 'first.pkl'), strategy_class, dataset.slice(400, 650))
+    middle.save_state(str(tmp_path / 'second.pkl'))
+    extended = Backtester.from_state(str(tmp_path / 'second.pkl'), strategy_class, dataset)
+    assert_same_run(extended, full)
+
+    # In-memory extend on a finished run gives the same result
+    in_memory = run(dataset.slice(0, 400), strategy_class, parameters, False)
+    in_memory.extend(dataset.slice(400, len(dataset)))
+    assert_same_run(in_memory, full)
+
+def test_from_state_rejects_other_strategy(tmp_path, dataset):
+    prefix = run(dataset.slice(0, 200), resolve_strategy('RSI'), {'period': 10, 'target_symbol': 'AAA'}, False)
+    prefix.save_state(str(tmp_path / 'state.pkl'))
+    with pytest.raises(ValueError):
+        Backtester.from_state(str(tmp_path / 'state.pkl'), resolve_strategy('SMA Crossover'), dataset)
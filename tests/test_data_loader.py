@@ -0,0 +1,92 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.data_loader as data_loader
+from utils.data_loader import clean_bars, load_historical_data, resample_ohlcv
+
+class FakeDownloads:
+    """Replaces yfinance downloads with synthetic hourly or daily bars, recording every request."""
+    def __init__(self, empty_intervals=()):
+        self.calls = []
+        self.empty_intervals = set(empty_intervals)
+
+    def __call__(self, ticker, start_date, end_date, interval):
+        self.calls.append((ticker, interval))
+        if interval in self.empty_intervals:
+            return pd.DataFrame()
+        freq = {'1h': 'h', '1d': 'D'}[interval]
+        dates = pd.date_range(pd.Timestamp(start_date), pd.Timestamp(end_date), freq=freq, inclusive='left', name='Date')
+        close = 100 + np.arange(len(dates), dtype=float)
+        frame = pd.DataFrame({'Date': dates, 'Symbol': ticker, 'Open': close, 'High': close + 1, 'Low': close - 1,
+                              'Close': close, 'Volume': 10.0})
+        return frame.set_index(['Date', 'Symbol'])
+
+@pytest.fixture
+def downloads(monkeypatch):
+    data_loader.clear_data_cache()
+    fake = FakeDownloads()
+    monkeypatch.setattr(data_loader, '_download', fake)
+    monkeypatch.setattr(data_loader, 'get_shared_store', lambda: None)
+    yield fake
+    data_loader.clear_data_cache()
+
+def test_repeated_request_is_served_from_cache(downloads):
+    first = load_historical_data(['AAA'], '2024-01-01', '2024-02-01', '1d')
+    second = load_historical_data(['AAA'], '2024-01-05', '2024-01-20', '1d')
+    assert downloads.calls == [('AAA', '1d')]
+    assert len(first) == 31 and len(second) == 15
+    assert {'Valid', 'Mark'} <= set(second.columns)
+
+def test_bar_cache_evicts_least_recently_used(downloads, monkeypatch):
+    monkeypatch.setattr(data_loader, 'DATA_CACHE_MAX_ENTRIES', 2)
+    load_historical_data(['AAA'], '2024-01-01', '2024-02-01', '1d')
+    load_historical_data(['BBB'], '2024-01-01', '2024-02-01', '1d')
+    load_historical_data(['AAA'], '2024-01-01', '2024-02-01', '1d') # AAA is now the most recently used
+    load_historical_data(['CCC'], '2024-01-01', '2024-02-01', '1d')
+    assert list(data_loader._bar_cache) == [('AAA', '1d'), ('CCC', '1d')]
+    load_historical_data(['AAA'], '2024-01-01', '2024-02-01', '1d')
+    assert downloads.calls.count(('AAA', '1d')) == 1
+
+def test_resampled_cache_is_bounded(downloads, monkeypatch):
+    monkeypatch.setattr(data_loader, 'RESAMPLED_CACHE_MAX_ENTRIES', 2)
+    load_historical_data(['AAA'], '2024-01-01', '2024-03-01', '1d', base_interval='1h')
+    for day in range(2, 12):
+        daily = load_historical_data(['AAA'], f'2024-01-{day:02d}', '2024-02-01', '1d')
+        assert len(daily) == 32 - day
+    assert downloads.calls == [('AAA', '1h')]
+    assert len(data_loader._resampled_cache) == 2
+    assert [key[3] for key in data_loader._resampled_cache] == [pd.Timestamp('2024-01-10'), pd.Timestamp('2024-01-11')]
+
+def test_resampled_bars_match_direct_resample(downloads):
+    daily = load_historical_data(['AAA'], '2024-01-01', '2024-01-10', '1d', base_interval='1h')
+    hourly = downloads('AAA', '2024-01-01', '2024-01-10', '1h')
+    expected, _ = clean_bars(resample_ohlcv(hourly, '1d'))
+    pd.testing.assert_frame_equal(daily, expected)
+
+def test_empty_base_interval_falls_back_to_requested_interval(downloads):
+    downloads.empty_intervals.add('1h')
+    daily = load_historical_data(['AAA'], '2024-01-01', '2024-02-01', '1d', base_interval='1h')
+    assert downloads.calls == [('AAA', '1h'), ('AAA', '1d')]
+    assert len(daily) == 31
+    assert list(data_loader._bar_cache) == [('AAA', '1d')]
+
+def test_concurrent_loads_never_lose_bars(downloads, monkeypatch):
+    monkeypatch.setattr(data_loader, 'DATA_CACHE_MAX_ENTRIES', 3)
+    monkeypatch.setattr(data_loader, 'RESAMPLED_CACHE_MAX_ENTRIES', 2)
+    sys.setswitchinterval(1e-6)
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+
+    def load(i):
+        day = 2 + i % 9
+        return len(load_historical_data(tickers[i % 5:i % 5 + 2], f'2024-01-{day:02d}', '2024-02-01', '1d', base_interval='1h'))
+
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            lengths = list(pool.map(load, range(200)))
+    finally:
+        sys.setswitchinterval(0.005)
+    assert lengths == [(32 - (2 + i % 9)) * len(tickers[i % 5:i % 5 + 2]) for i in range(200)]
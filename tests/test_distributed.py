@@ -0,0 +1,143 @@
+import json
+import os
+import time
+
+import pytest
+
+from engine.distributed import expand_tasks, run_coordinator
+from utils.work_queue import DirectoryWorkQueue
+
+def stub_execute(payload):
+    """Stands in for execute_task in worker processes, logging every execution to the task's log directory."""
+    parameters = payload['strategy']['parameters']
+    with open(os.path.join(parameters['log'], f"{payload['name']}.{os.getpid()}.{time.time_ns()}"), 'w'):
+        pass
+    time.sleep(parameters.get('seconds', 0.05))
+    mode = parameters.get('mode', 'ok')
+    if mode == 'crash_once':
+        marker = os.path.join(parameters['log'], f"{payload['name']}.crashed")
+        if not os.path.exists(marker):
+            open(marker, 'w').close()
+            os._exit(1) # The worker process dies mid-task, leaving its lease to expire
+    if mode == 'fail':
+        raise RuntimeError("stub failure")
+    return {'Experiment Name': payload['name'], 'Total Return(%)': parameters.get('value', 0.0)}
+
+def executions(log_dir, name):
+    return [entry for entry in os.listdir(log_dir) if entry.startswith(f"{name}.") and not entry.endswith('.crashed')]
+
+def experiment(name, log_dir, **parameters):
+    return {'name': name, 'data': {'symbols': ['AAA'], 'start_date': '2020-01-01', 'end_date': '2021-01-01'},
+            'strategy': {'name': 'SMA Crossover', 'parameters': {'log': log_dir, **parameters}}}
+
+def test_expand_tasks_expands_grid():
+    config = {'experiments': [{**experiment('sma', '/tmp'), 'grid': {'short': [1, 2], 'long': [5, 6, 7]}}, experiment('plain', '/tmp')]}
+    tasks = expand_tasks(config)
+    assert len(tasks) == 7
+    assert tasks[0]['name'] == 'sma[long=5, short=1]'
+    assert tasks[0]['strategy']['parameters']['short'] == 1
+    assert tasks[-1]['name'] == 'plain'
+
+def test_coordinator_collects_each_result_exactly_once(tmp_path):
+    log_dir = str(tmp_path / 'log')
+    os.makedirs(log_dir)
+    config = {'experiments': [experiment(f"task{i}", log_dir, value=float(i)) for i in range(12)]}
+    streamed = []
+    outcome = run_coordinator(config, str(tmp_path / 'queue'), local_workers=3, poll_interval=0.05,
+                              on_result=lambda summary: streamed.append(summary['Experiment Name']), execute=stub_execute)
+
+    assert [row['Experiment Name'] for row in outcome['results']] == [f"task{i}" for i in range(12)]
+    assert [row['Total Return(%)'] for row in outcome['results']] == [float(i) for i in range(12)]
+    assert sorted(streamed) == sorted(f"task{i}" for i in range(12))
+    assert outcome['failed'] == {}
+    for i in range(12):
+        assert len(executions(log_dir, f"task{i}")) == 1
+    queue = DirectoryWorkQueue(str(tmp_path / 'queue'))
+    assert queue.counts() == {'pending': 0, 'running': 0, 'done': 12, 'failed': 0}
+    assert queue.closed
+    workers = {json.load(open(tmp_path / 'queue' / 'done' / entry))['result']['worker'] for entry in os.listdir(tmp_path / 'queue' / 'done')}
+    assert len(workers) > 1
+
+def test_new_coordination_reruns_and_resume_reuses_unchanged_work(tmp_path, monkeypatch):
+    log_dir = str(tmp_path / 'log')
+    os.makedirs(log_dir)
+    queue_dir = str(tmp_path / 'queue')
+    config = {'experiments': [experiment(f"task{i}", log_dir, value=float(i)) for i in range(3)]
+              + [{**experiment('open_ended', log_dir), 'data': {'symbols': ['AAA'], 'start_date': '2020-01-01', 'end_date': '2999-01-01'}}]}
+    names = ['task0', 'task1', 'task2', 'open_ended']
+
+    def run(**kwargs):
+        outcome = run_coordinator(config, queue_dir, local_workers=2, poll_interval=0.05, execute=stub_execute, **kwargs)
+        assert [row['Experiment Name'] for row in outcome['results']] == names
+        return [len(executions(log_dir, name)) for name in names]
+
+    assert run() == [1, 1, 1, 1]
+    # A plain coordination never picks up the previous run's results
+    assert run() == [2, 2, 2, 2]
+    assert run(resume=True) == [3, 3, 3, 3]
+    # Resuming reuses finished work, except ranges that can still gain bars
+    assert run(resume=True) == [3, 3, 3, 4]
+    # Editing the strategy's source invalidates what was stored for it
+    monkeypatch.setattr('utils.strategy_loader.strategy_source_hash', lambda strategy_class: 'edited')
+    assert run(resume=True) == [4, 4, 4, 5]
+
+def test_task_of_killed_worker_is_requeued_after_lease_expiry(tmp_path):
+    log_dir = str(tmp_path / 'log')
+    os.makedirs(log_dir)
+    config = {'experiments': [experiment('crashes', log_dir, mode='crash_once', value=1.0),
+                              experiment('steady', log_dir, value=2.0)]}
+    outcome = run_coordinator(config, str(tmp_path / 'queue'), local_workers=2, poll_interval=0.05, lease_seconds=0.5,
+                              timeout=30, execute=stub_execute)
+
+    assert [row['Experiment Name'] for row in outcome['results']] == ['crashes', 'steady']
+    assert outcome['failed'] == {}
+    assert len(executions(log_dir, 'crashes')) == 2
+    assert len(executions(log_dir, 'steady')) == 1
+
+def test_task_moves_to_failed_after_max_attempts(tmp_path):
+    log_dir = str(tmp_path / 'log')
+    os.makedirs(log_dir)
+    config = {'experiments': [experiment('broken', log_dir, mode='fail'), experiment('fine', log_dir)]}
+    outcome = run_coordinator(config, str(tmp_path / 'queue'), local_workers=2, poll_interval=0.05, max_attempts=3,
+                              timeout=30, execute=stub_execute)
+
+    assert [row['Experiment Name'] for row in outcome['results']] == ['fine']
+    assert list(outcome['failed']) == ['broken']
+    assert len(outcome['failed']['broken']) == 3
+    assert all('stub failure' in error for error in outcome['failed']['broken'])
+    assert len(executions(log_dir, 'broken')) == 3
+    queue = DirectoryWorkQueue(str(tmp_path / 'queue'))
+    assert queue.counts()['failed'] == 1
+
+def test_queue_keeps_first_result_and_ignores_late_failure(tmp_path):
+    queue = DirectoryWorkQueue(str(tmp_path), lease_seconds=0.1)
+    task, created = queue.put({'x': 1})
+    assert created
+    assert queue.put({'x': 1}) == (task, False)
+    assert queue.claim('A')['id'] == task
+    time.sleep(0.2)
+    assert queue.requeue_expired() == [task]
+    claimed = queue.claim('B')
+    assert claimed['attempts'] == 1
+    assert queue.complete(task, {'by': 'B'})
+    assert not queue.complete(task, {'by': 'A'})
+    assert list(queue.results()) == [(task, {'by': 'B'})]
+    assert queue.fail(task, 'late') is None
+    assert queue.counts() == {'pending': 0, 'running': 0, 'done': 1, 'failed': 0}
+
+def test_queue_completes_without_hard_links(tmp_path, monkeypatch):
+    def no_links(source, target):
+        raise PermissionError("Operation not permitted")
+
+    monkeypatch.setattr(os, 'link', no_links)
+    queue = DirectoryWorkQueue(str(tmp_path))
+    task, _ = queue.put({'x': 1})
+    queue.claim('A')
+    assert queue.complete(task, {'by': 'A'})
+    assert not queue.complete(task, {'by': 'B'})
+    assert list(queue.results()) == [(task, {'by': 'A'})]
+    assert queue.counts() == {'pending': 0, 'running': 0, 'done': 1, 'failed': 0}
+
+def test_queue_rejects_zero_attempts(tmp_path):
+    with pytest.raises(ValueError):
+        DirectoryWorkQueue(str(tmp_path), max_attempts=0)
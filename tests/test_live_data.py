@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fakes import FakeBarFeed
+from utils.live_data import OHLCV_COLUMNS, BarRingBuffer, LiveBarCache
+
+def make_bars(n, start='2024-01-02 09:30', freq='1min', tz='America/New_York', seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({
+        'Date': pd.date_range(start, periods=n, freq=freq, tz=tz),
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'Volume': rng.integers(100, 1000, n).astype(float),
+    })
+
+def test_ring_buffer_wraps_around_keeping_newest_bars():
+    bars = make_bars(25)
+    buffer = BarRingBuffer(10)
+    assert buffer.extend(bars.iloc[:7]) == 7
+    assert buffer.extend(bars.iloc[7:]) == 18
+    assert len(buffer) == 10
+    pd.testing.assert_frame_equal(buffer.to_frame(), bars.iloc[-10:].reset_index(drop=True))
+    assert buffer.last_timestamp == bars['Date'].iloc[-1]
+
+def test_ring_buffer_keeps_timezone():
+    bars = make_bars(5, tz='America/New_York')
+    buffer = BarRingBuffer(10)
+    buffer.extend(bars)
+    assert str(buffer.to_frame()['Date'].dt.tz) == 'America/New_York'
+    naive = BarRingBuffer(10)
+    naive.extend(make_bars(5, tz=None))
+    assert naive.to_frame()['Date'].dt.tz is None
+
+def test_ring_buffer_replaces_bar_with_same_timestamp():
+    bars = make_bars(5)
+    buffer = BarRingBuffer(10)
+    buffer.extend(bars)
+    update = bars.iloc[[-1]].copy()
+    update['Close'] = 999.0
+    assert buffer.extend(update) == 0
+    frame = buffer.to_frame()
+    assert len(frame) == 5
+    assert frame['Close'].iloc[-1] == 999.0
+    # Bars older than the newest one are ignored
+    assert buffer.extend(bars.iloc[:2]) == 0
+    assert len(buffer.to_frame()) == 5
+
+def test_ring_buffer_empty_extend_does_not_refresh():
+    buffer = BarRingBuffer(10)
+    buffer.extend(pd.DataFrame(columns=['Date'] + OHLCV_COLUMNS))
+    assert buffer.last_update == 0.0
+    buffer.extend(make_bars(3))
+    assert buffer.last_update > 0
+
+def test_concurrent_requests_share_one_fetch():
+    feed = FakeBarFeed({'AAA': make_bars(300)}, visible=300, delay=0.05)
+    cache = LiveBarCache(feed, capacity=100)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_history(['AAA'], '1m', 50) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert feed.fetch_count == 1
+    for history in results:
+        assert len(history) == 50
+        pd.testing.assert_frame_equal(history, results[0])
+
+def test_history_is_limited_to_lookback():
+    bars = make_bars(300)
+    cache = LiveBarCache(FakeBarFeed({'AAA': bars}, visible=300), capacity=1000)
+    history = asyncio.run(cache.get_history(['AAA'], '1m', 40))
+    assert len(history) == 40
+    assert history.index.get_level_values('Date')[-1] == bars['Date'].iloc[-1]
+    assert str(history.index.get_level_values('Date').tz) == 'America/New_York'
+
+def test_poller_tops_up_buffer():
+    feed = FakeBarFeed({'AAA': make_bars(300)}, visible=200, max_bars=None)
+    cache = LiveBarCache(feed, capacity=100)
+
+    async def scenario():
+        await cache.get_history(['AAA'], '1m', 50)
+        feed.max_bars = 5 # Polls only see the newest bars
+        feed.advance(3)
+        await cache.poll_once()
+        return await cache.get_history(['AAA'], '1m', 50)
+
+    history = asyncio.run(scenario())
+    assert feed.fetch_count == 2
+    assert history.index.get_level_values('Date')[-1] == feed.bars['AAA']['Date'].iloc[202]
+    assert len(history) == 50
+
+def test_idle_and_unknown_symbols_are_not_polled():
+    feed = FakeBarFeed({'AAA': make_bars(100)}, visible=100)
+    cache = LiveBarCache(feed, capacity=100, idle_ttl=60)
+
+    async def scenario():
+        history = await cache.get_history(['AAA', 'TYPO'], '1m', 20)
+        assert set(history.index.get_level_values('Symbol')) == {'AAA'}
+        assert ('TYPO', '1m') not in cache.buffers
+        cache.last_access[('AAA', '1m')] = time.monotonic() - 120
+        fetches = feed.fetch_count
+        await cache.poll_once()
+        assert feed.fetch_count == fetches
+        assert cache.buffers == {}
+
+    asyncio.run(scenario())
+
+def test_failed_poll_leaves_buffer_stale():
+    feed = FakeBarFeed({'AAA': make_bars(100)}, visible=100)
+    cache = LiveBarCache(feed, capacity=100)
+
+    async def scenario():
+        await cache.get_history(['AAA'], '1m', 20)
+        buffer = cache.buffers[('AAA', '1m')]
+        refreshed = buffer.last_update
+        feed.bars = {} # Upstream now returns nothing, as _download_bars does on errors
+        await cache.poll_once()
+        return buffer.last_update == refreshed
+
+    assert asyncio.run(scenario())
+
+def test_ring_buffer_rejects_non_positive_capacity():
+    with pytest.raises(ValueError):
+        BarRingBuffer(0)
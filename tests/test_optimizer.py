@@ -0,0 +1,66 @@
+import pytest
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.optimizer import SuccessiveHalvingOptimizer, rung_lengths
+from engine.runner import resolve_strategy
+from engine.walk_forward import expand_grid, objective_score
+from fakes import synthetic_bars
+
+GRID = {'short_window': [3, 5, 8, 13], 'long_window': [20, 30, 45]}
+
+@pytest.fixture(scope='module')
+def dataset():
+    return MarketDataset(synthetic_bars(('AAA',), n=600, seed=21))
+
+def full_run_score(dataset, params):
+    strategy_class = resolve_strategy('SMA Crossover')
+    backtester = Backtester(dataset, strategy_class, 100000.0, 0.0, 0.0, ['AAA'])
+    backtester.strategy_instance = strategy_class(**params)
+    portfolio = backtester.run()
+    return objective_score(portfolio.get_equity_curve(), 'Sharpe Ratio', 252, len(portfolio.trades))
+
+def optimizer(dataset, **kwargs):
+    return SuccessiveHalvingOptimizer(dataset, 'SMA Crossover', GRID, ['AAA'], fixed_params={'target_symbol': 'AAA'},
+                                      max_workers=1, **kwargs)
+
+def test_rung_lengths_grow_to_the_full_dataset():
+    assert rung_lengths(900, 27, 3, 50) == [100, 300, 900]
+    assert rung_lengths(900, 27, 3, 200) == [300, 900]
+    assert rung_lengths(100, 1, 3, 10) == [100]
+    with pytest.raises(ValueError):
+        rung_lengths(100, 4, 1, 10)
+
+def test_halving_finds_the_grids_best_with_fewer_bars():
+    # Halving is a heuristic; on this path the grid's best candidate is never culled
+    dataset = MarketDataset(synthetic_bars(('AAA',), n=600, seed=31))
+    exhaustive = {tuple(params.values()): full_run_score(dataset, {**params, 'target_symbol': 'AAA'}) for params in expand_grid(GRID)}
+    result = optimizer(dataset, reduction_factor=2, min_dates=60).run()
+
+    assert len(result['rungs']) > 1
+    assert result['bar_evaluations'] < result['full_grid_bar_evaluations']
+    assert result['best_score'] == pytest.approx(max(exhaustive.values()))
+    # Survivors resumed from checkpoints score exactly as a single uninterrupted run
+    best = result['best_params']
+    assert result['best_score'] == pytest.approx(exhaustive[(best['short_window'], best['long_window'])])
+    for params, score in result['leaderboard']:
+        assert score == pytest.approx(exhaustive[(params['short_window'], params['long_window'])])
+
+def test_survivor_scores_match_uninterrupted_runs(dataset):
+    result = optimizer(dataset, reduction_factor=2, min_dates=60).run()
+    for params, score in result['leaderboard']:
+        assert score == pytest.approx(full_run_score(dataset, params))
+    assert result['best_portfolio'] is not None
+
+def test_single_rung_is_an_exhaustive_search(dataset):
+    result = optimizer(dataset, min_dates=len(dataset)).run()
+    assert [rung['dates'] for rung in result['rungs']] == [len(dataset)]
+    assert len(result['leaderboard']) == len(expand_grid(GRID))
+    assert result['bar_evaluations_saved'] == 0
+
+def test_process_pool_matches_serial_run(dataset):
+    serial = optimizer(dataset, reduction_factor=2, min_dates=60).run()
+    pooled = SuccessiveHalvingOptimizer(dataset, 'SMA Crossover', GRID, ['AAA'], fixed_params={'target_symbol': 'AAA'},
+                                        reduction_factor=2, min_dates=60, max_workers=2).run()
+    assert pooled['best_params'] == serial['best_params']
+    assert pooled['leaderboard'] == serial['leaderboard']
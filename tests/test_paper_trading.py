@@ -0,0 +1,112 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.paper_trading import BarFeed, LiveBarFeed, PaperTrader, ReplayFeed, run_paper_trading
+from engine.runner import resolve_strategy
+from fakes import FakeBarFeed, synthetic_bars
+from utils.live_data import LiveBarCache
+
+PARAMETERS = {'short_window': 5, 'long_window': 20, 'target_symbol': 'AAA'}
+
+def test_replay_matches_backtester():
+    dataset = MarketDataset(synthetic_bars(('AAA', 'BBB'), n=400, seed=11))
+    strategy_class = resolve_strategy('SMA Crossover')
+    backtester = Backtester(dataset, strategy_class, 100000.0, 0.01, 2.0, ['AAA', 'BBB'])
+    backtester.strategy_instance = strategy_class(**PARAMETERS)
+    portfolio = backtester.run()
+    assert portfolio.trades
+
+    trader = PaperTrader(strategy_class(**PARAMETERS), 100000.0, commission_per_share=0.01, slippage_bps=2.0)
+    asyncio.run(run_paper_trading(ReplayFeed(dataset), [trader]))
+
+    assert trader.bars_processed == len(dataset)
+    assert trader.portfolio.equity_curve_data == portfolio.equity_curve_data
+    assert [{key: value for key, value in fill.items() if key != 'latency'} for fill in trader.fills] == portfolio.trades
+    assert all(fill['latency'] >= 0 for fill in trader.fills)
+    assert trader.summary()['Total Return(%)'] == pytest.approx(backtester.summary()['Total Return(%)'])
+
+def test_replay_feed_rejects_negative_speed():
+    with pytest.raises(ValueError):
+        ReplayFeed(synthetic_bars(('AAA',), n=10), speed=-1)
+
+def minute_bars(n):
+    bars = synthetic_bars(('AAA', 'BBB'), n=n, seed=4, start='2024-01-02 09:30', freq='1min')
+    return {symbol: bars.xs(symbol, level='Symbol').reset_index() for symbol in ('AAA', 'BBB')}
+
+def test_live_feed_publishes_closed_bars_as_they_arrive():
+    upstream = FakeBarFeed(minute_bars(60), visible=20)
+    dates = upstream.bars['AAA']['Date']
+    cache = LiveBarCache(upstream, capacity=200, poll_interval=0.01)
+    feed = LiveBarFeed(cache, ['AAA', 'BBB'], '1m', poll_interval=0.01, history_bars=5, max_bars=15)
+
+    async def scenario():
+        queue = feed.subscribe()
+        run = asyncio.create_task(feed.run())
+        events = []
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            events.append(event)
+            if len(events) == 5:
+                # Ten more bars close upstream; the newest visible bar is still forming
+                upstream.advance(11)
+        await run
+        await cache.stop()
+        return events
+
+    events = asyncio.run(scenario())
+    assert [timestamp for timestamp, _, _ in events] == list(dates.iloc[14:29])
+    for timestamp, bars, _ in events:
+        assert sorted(bars.index) == ['AAA', 'BBB']
+        assert bars.loc['AAA', 'Close'] == upstream.bars['AAA'].set_index('Date').at[timestamp, 'Close']
+        assert 'Mark' in bars.columns
+
+def test_paper_trader_runs_on_live_feed():
+    upstream = FakeBarFeed(minute_bars(200), visible=200)
+    cache = LiveBarCache(upstream, capacity=500, poll_interval=0.01)
+    feed = LiveBarFeed(cache, ['AAA', 'BBB'], '1m', poll_interval=0.01, history_bars=150, max_bars=150)
+    trader = PaperTrader(resolve_strategy('SMA Crossover')(**PARAMETERS), 100000.0)
+
+    async def scenario():
+        await run_paper_trading(feed, [trader])
+        await cache.stop()
+
+    asyncio.run(scenario())
+    assert trader.bars_processed == 150
+    replay = PaperTrader(resolve_strategy('SMA Crossover')(**PARAMETERS), 100000.0)
+    bars = synthetic_bars(('AAA', 'BBB'), n=200, seed=4, start='2024-01-02 09:30', freq='1min')
+    dates = bars.index.get_level_values('Date').unique()
+    asyncio.run(run_paper_trading(ReplayFeed(bars.loc[dates[49]:dates[198]]), [replay]))
+    np.testing.assert_allclose([equity for _, equity in trader.portfolio.equity_curve_data],
+                               [equity for _, equity in replay.portfolio.equity_curve_data])
+    assert len(trader.fills) == len(replay.fills)
+
+def test_live_feed_stops_on_request():
+    upstream = FakeBarFeed(minute_bars(30), visible=30)
+    cache = LiveBarCache(upstream, capacity=100, poll_interval=0.01)
+    feed = LiveBarFeed(cache, ['AAA'], '1m', poll_interval=0.01)
+
+    async def scenario():
+        queue = feed.subscribe()
+        run = asyncio.create_task(feed.run())
+        await asyncio.sleep(0.05)
+        feed.stop()
+        await run
+        await cache.stop()
+        return await queue.get()
+
+    # history_bars=0 publishes nothing that closed before the feed started
+    assert asyncio.run(scenario()) is None
+    assert feed.bars_published == 0
+
+def test_feed_without_run_cannot_be_constructed():
+    class Incomplete(BarFeed):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
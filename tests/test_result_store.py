@@ -0,0 +1,56 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import utils.result_store as result_store
+from engine.runner import resolve_strategy
+from utils.result_store import ResultStore, canonical_config, result_key
+
+@pytest.fixture
+def strategy_class():
+    return resolve_strategy('SMA Crossover')
+
+def store_result(store, strategy_class, name):
+    config = canonical_config(['AAA'], '2024-01-01', '2024-02-01', '1d', 0.0, 0.0, 100000.0, 'SMA Crossover', {'name': name})
+    key = result_key(config, 'v1', strategy_class)
+    curve = pd.Series([100000.0, 101000.0], index=pd.to_datetime(['2024-01-02', '2024-01-03']), name='Equity')
+    store.put(key, strategy_class, {'Total Return(%)': 1.0}, curve, [])
+    return key
+
+def test_put_and_get_round_trip(tmp_path, strategy_class):
+    store = ResultStore(str(tmp_path))
+    key = store_result(store, strategy_class, 'a')
+    result = store.get(key)
+    assert result['summary'] == {'Total Return(%)': 1.0}
+    assert result['equity_curve'].tolist() == [100000.0, 101000.0]
+    assert store.get('missing') is None
+    assert (store.hits, store.misses) == (1, 1)
+
+def test_put_does_not_rescan_strategy_files(tmp_path, strategy_class, monkeypatch):
+    store = ResultStore(str(tmp_path))
+    calls = []
+    monkeypatch.setattr(result_store, 'file_hash', lambda path: calls.append(path) or '')
+    for name in 'abc':
+        store_result(store, strategy_class, name)
+    assert calls == []
+
+def test_stale_entries_are_purged_when_opened(tmp_path, strategy_class):
+    store = ResultStore(str(tmp_path))
+    stale = store_result(store, strategy_class, 'stale')
+    fresh = store_result(store, strategy_class, 'fresh')
+    with sqlite3.connect(str(tmp_path / 'index.sqlite')) as conn:
+        conn.execute("UPDATE results SET strategy_hash = 'edited' WHERE key = ?", (stale,))
+    reopened = ResultStore(str(tmp_path))
+    assert reopened.get(stale) is None
+    assert reopened.get(fresh) is not None
+    assert not (tmp_path / f"{stale}.equity.parquet").exists()
+
+def test_least_recently_used_entries_are_evicted(tmp_path, strategy_class):
+    store = ResultStore(str(tmp_path), max_entries=2)
+    first = store_result(store, strategy_class, 'first')
+    second = store_result(store, strategy_class, 'second')
+    store.get(first)
+    store_result(store, strategy_class, 'third')
+    assert store.get(second) is None
+    assert store.get(first) is not None
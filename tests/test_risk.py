@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.risk import holdings_matrix, return_matrix, risk_report, rolling_beta, rolling_covariance, rolling_volatility
+from fakes import synthetic_bars
+
+@pytest.fixture(scope='module')
+def returns():
+    bars = synthetic_bars(('AAA', 'BBB', 'CCC'), n=400, seed=17)
+    # CCC misses a stretch of bars, so windows overlapping it have no value for it
+    dates = bars.index.get_level_values('Date')
+    missing = (bars.index.get_level_values('Symbol') == 'CCC') & (dates >= dates.unique()[150]) & (dates < dates.unique()[160])
+    return return_matrix(bars[~missing])
+
+def test_return_matrix_has_nan_around_missing_bars(returns):
+    assert returns.shape == (400, 3)
+    assert returns['CCC'].isna().sum() == 1 + 11
+    assert returns['AAA'].iloc[1:].notna().all()
+
+def test_rolling_volatility_matches_pandas(returns):
+    volatility = rolling_volatility(returns, window=21, annualization_factor=252)
+    expected = returns.rolling(21).std() * np.sqrt(252)
+    pd.testing.assert_frame_equal(volatility, expected, rtol=1e-9, atol=1e-12)
+
+def test_rolling_beta_matches_pandas(returns):
+    benchmark = returns['AAA']
+    beta = rolling_beta(returns[['BBB', 'CCC']], benchmark, window=30)
+    for column in ('BBB', 'CCC'):
+        expected = returns[column].rolling(30).cov(benchmark) / benchmark.where(returns[column].notna()).rolling(30).var()
+        np.testing.assert_allclose(beta[column].to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(rolling_beta(returns[['AAA']], benchmark, window=30)['AAA'].iloc[30:], 1.0)
+
+def test_rolling_covariance_matches_pandas(returns):
+    result = rolling_covariance(returns, window=40, step=7)
+    assert result['dates'][-1] == returns.index[-1]
+    assert np.all(np.diff(returns.index.get_indexer(result['dates'])) <= 7)
+    for date, covariance, correlation in zip(result['dates'], result['covariance'], result['correlation']):
+        window = returns.loc[:date].iloc[-40:]
+        complete = window.notna().all()
+        expected = window.loc[:, complete]
+        index = np.flatnonzero(complete.to_numpy())
+        np.testing.assert_allclose(covariance[np.ix_(index, index)], expected.cov().to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(correlation[np.ix_(index, index)], expected.corr().to_numpy(), rtol=1e-9)
+        assert np.isnan(covariance[~complete.to_numpy()]).all()
+
+def test_holdings_and_report_from_a_trade_log():
+    bars = synthetic_bars(('AAA', 'BBB'), n=100, seed=2)
+    dates = bars.index.get_level_values('Date').unique()
+    trades = [{'timestamp': dates[10], 'symbol': 'AAA', 'type': 'BUY', 'quantity': 10.0, 'price': 100.0},
+              {'timestamp': dates[20], 'symbol': 'AAA', 'type': 'SELL', 'quantity': 4.0, 'price': 100.0}]
+    holdings = holdings_matrix(trades, dates, ['AAA', 'BBB'])
+    assert holdings['AAA'].iloc[[9, 10, 19, 20, 99]].tolist() == [0.0, 10.0, 10.0, 6.0, 6.0]
+    assert (holdings['BBB'] == 0).all()
+
+    equity = pd.Series(100000.0, index=dates)
+    report = risk_report(bars, trades, equity, benchmark='BBB', window=20)
+    assert report['turnover'].loc[dates[10]] == pytest.approx(1000.0 / 100000.0)
+    assert report['summary']['Avg Gross Exposure (%)'] > 0
+    assert list(report['beta'].columns) == ['AAA', 'BBB', 'Portfolio']
+    with pytest.raises(ValueError):
+        risk_report(bars, trades, equity, benchmark='SPY')
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import engine.robustness as robustness
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.metrics import Metrics
+from engine.robustness import block_bootstrap_indices, robustness_report, summarize_paths
+from engine.runner import resolve_strategy
+from fakes import synthetic_bars
+
+@pytest.fixture(scope='module')
+def portfolio():
+    dataset = MarketDataset(synthetic_bars(('AAA',), n=500, seed=12))
+    strategy_class = resolve_strategy('SMA Crossover')
+    backtester = Backtester(dataset, strategy_class, 100000.0, 0.01, 1.0, ['AAA'])
+    backtester.strategy_instance = strategy_class(short_window=5, long_window=30, target_symbol='AAA')
+    portfolio = backtester.run()
+    assert len(portfolio.trades) > 4
+    return portfolio
+
+def test_block_bootstrap_draws_circular_blocks():
+    indices = block_bootstrap_indices(10, 50, 4, np.random.default_rng(0))
+    assert indices.shape == (50, 10)
+    for row in indices:
+        for block in (row[0:4], row[4:8], row[8:10]):
+            assert ((np.diff(block) % 10) == 1).all()
+
+def test_summarize_paths_matches_performance_summary():
+    equity = pd.Series(100000 * np.cumprod(1 + np.random.default_rng(1).normal(0.0005, 0.01, 300)),
+                       index=pd.date_range('2020-01-01', periods=300, freq='B'))
+    returns = (equity.to_numpy()[1:] / equity.to_numpy()[:-1] - 1)[None, :]
+    years = (equity.index[-1] - equity.index[0]).days / 365.25
+    paths = summarize_paths(returns, equity.iloc[0], years)
+    for key, expected in Metrics.performance_summary(equity).items():
+        if key != 'Trade Count':
+            assert paths[key][0] == pytest.approx(expected)
+
+def test_report_is_reproducible_under_a_fixed_seed(portfolio, monkeypatch):
+    monkeypatch.setattr(robustness, 'CHUNK_SIZE', 64)
+    first = robustness_report(portfolio, n_resamples=200, seed=7)
+    assert first['block_bootstrap'] and first['trade_shuffle'] and first['slippage']
+    assert robustness_report(portfolio, n_resamples=200, seed=7) == first
+    # Chunks draw from their own spawned seeds, so a process pool reproduces the serial run
+    assert robustness_report(portfolio, n_resamples=200, seed=7, n_jobs=2) == first
+    assert robustness_report(portfolio, n_resamples=200, seed=8)['block_bootstrap'] != first['block_bootstrap']
+
+def test_slippage_only_lowers_returns(portfolio):
+    report = robustness_report(portfolio, n_resamples=300, slippage_sigma_bps=20.0, seed=3)
+    total_return = report['slippage']['Total Return(%)']
+    assert total_return['upper'] <= total_return['observed']
+    assert total_return['lower'] < total_return['upper']
+
+def test_report_rejects_bad_arguments(portfolio):
+    with pytest.raises(ValueError):
+        robustness_report(portfolio, n_resamples=0)
+    with pytest.raises(ValueError):
+        robustness_report(portfolio, confidence=1.5)
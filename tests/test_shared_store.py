@@ -0,0 +1,53 @@
+import fcntl
+import os
+import threading
+
+import pytest
+
+from fakes import synthetic_bars
+from utils.shared_store import SharedBarStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = SharedBarStore(max_bytes=10 * 1024 * 1024, registry_dir=str(tmp_path))
+    yield store
+    store.clear()
+
+def put_bars(store, symbol):
+    bars = synthetic_bars((symbol,), n=50)
+    dates = bars.index.get_level_values('Date')
+    return store.put(symbol, '1d', dates[0], dates[-1], bars)
+
+def test_stats_reads_without_rewriting_the_registry(store, tmp_path):
+    _, key = put_bars(store, 'AAA')
+    put_bars(store, 'BBB')
+    store.release(key)
+    registry = tmp_path / 'registry.json'
+    before = (registry.stat().st_ino, registry.stat().st_mtime_ns)
+
+    stats = store.stats()
+    assert stats['entries'] == 2
+    assert stats['referenced_entries'] == 1
+    assert stats['bytes'] == 2 * 50 * 8 * 6
+    assert (registry.stat().st_ino, registry.stat().st_mtime_ns) == before
+
+def test_stats_runs_alongside_other_readers(store, tmp_path):
+    put_bars(store, 'AAA')
+    with open(tmp_path / 'registry.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_SH)
+        scraped = []
+        scrape = threading.Thread(target=lambda: scraped.append(store.stats()), daemon=True)
+        scrape.start()
+        scrape.join(5)
+        fcntl.flock(lock, fcntl.LOCK_UN)
+    assert scraped and scraped[0]['entries'] == 1
+
+def test_references_of_exited_processes_are_not_counted(store):
+    _, key = put_bars(store, 'AAA')
+    store.release(key)
+    pid = os.fork()
+    if pid == 0:
+        put_bars(store, 'AAA') # The child takes a reference and exits without releasing it
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert store.stats()['referenced_entries'] == 0
@@ -0,0 +1,74 @@
+import asyncio
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.signal_hub import SignalHub, json_safe
+from engine.runner import resolve_strategy
+from fakes import synthetic_bars
+
+class StaticBarCache:
+    """Serves the same bars on every request, counting requests."""
+    def __init__(self, bars: pd.DataFrame):
+        self.bars = bars
+        self.requests = 0
+
+    async def get_history(self, symbols, interval, lookback_period):
+        self.requests += 1
+        return self.bars[self.bars.index.get_level_values('Symbol').isin(symbols)]
+
+class RecordingSubscriber:
+    def __init__(self):
+        self.messages = []
+
+    async def send_json(self, message):
+        # Mirrors Starlette's send_json, but rejects NaN so invalid JSON fails the test
+        self.messages.append(json.loads(json.dumps(message, allow_nan=False)))
+
+def test_subscribers_share_one_evaluation():
+    cache = StaticBarCache(synthetic_bars(('AAA', 'BBB'), n=300))
+    hub = SignalHub(cache, resolve_strategy)
+    first, second = RecordingSubscriber(), RecordingSubscriber()
+
+    async def scenario():
+        params = {'short_window': 5, 'long_window': 20}
+        key = await hub.subscribe(first, 'SMA Crossover', params, ['AAA', 'BBB'], '1d', 100)
+        assert await hub.subscribe(second, 'SMA Crossover', params, ['BBB', 'AAA'], '1d', 100) == key
+        await hub.tick() # No new bars, nothing is re-sent
+        return key
+
+    key = asyncio.run(scenario())
+    assert list(hub.subscriptions) == [key]
+    assert cache.requests == 2
+    assert first.messages == second.messages
+    assert len(first.messages) == 1
+    assert {signal['symbol'] for signal in first.messages[0]['signals']} == {'AAA', 'BBB'}
+
+def test_failed_first_evaluation_registers_nothing():
+    hub = SignalHub(StaticBarCache(synthetic_bars(('AAA',), n=300)), resolve_strategy)
+    subscriber = RecordingSubscriber()
+
+    async def scenario():
+        with pytest.raises(ValueError):
+            await hub.subscribe(subscriber, 'SMA Crossover', {'short_window': 50, 'long_window': 20}, ['AAA'], '1d', 100)
+        with pytest.raises(ValueError):
+            await hub.subscribe(subscriber, 'NoSuchStrategy', {}, ['AAA'], '1d', 100)
+
+    asyncio.run(scenario())
+    assert hub.subscriptions == {}
+    assert subscriber.messages == []
+
+def test_non_finite_prices_are_sent_as_null():
+    bars = synthetic_bars(('AAA',), n=300)
+    bars.iloc[-1, bars.columns.get_loc('Close')] = np.nan
+    hub = SignalHub(StaticBarCache(bars), resolve_strategy)
+    subscriber = RecordingSubscriber()
+    asyncio.run(hub.subscribe(subscriber, 'SMA Crossover', {'short_window': 5, 'long_window': 20}, ['AAA'], '1d', 100))
+    assert len(subscriber.messages) == 1
+
+def test_json_safe_converts_numpy_and_non_finite_values():
+    signal = json_safe({'symbol': 'AAA', 'current_price': np.float64('nan'), 'strategy_position': np.int64(1), 'other': float('inf')})
+    assert signal == {'symbol': 'AAA', 'current_price': None, 'strategy_position': 1, 'other': None}
+    assert type(signal['strategy_position']) is int
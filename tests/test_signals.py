@@ -0,0 +1,30 @@
+import pytest
+
+from engine.runner import resolve_strategy
+from engine.signals import replay_signal, vectorized_signals
+from fakes import synthetic_bars
+
+SYMBOLS = ['AAA', 'BBB', 'CCC']
+
+@pytest.mark.parametrize('strategy_name, parameters', [
+    ('RSI', {'period': 14.0, 'oversold_threshold': 45.0, 'overbought_threshold': 55.0}),
+    ('SMA Crossover', {'short_window': 5.0, 'long_window': 20.0}),
+])
+def test_float_parameters_take_the_vectorized_path(strategy_name, parameters):
+    history = synthetic_bars(tuple(SYMBOLS), n=120, seed=6)
+    strategy_class = resolve_strategy(strategy_name)
+    signals = vectorized_signals(history, strategy_class, parameters, SYMBOLS, 50)
+    assert signals is not None
+    for symbol, signal in zip(SYMBOLS, signals):
+        replayed = replay_signal(history.xs(symbol, level='Symbol', drop_level=False), strategy_class, parameters, symbol, 50)
+        assert (signal['symbol'], signal['timestamp'], signal['signal']) == (replayed['symbol'], replayed['timestamp'], replayed['signal'])
+        assert signal['current_price'] == replayed['current_price']
+
+def test_rsi_float_period_positions_match_integer_period():
+    close = synthetic_bars(tuple(SYMBOLS), n=200, seed=9)['Close'].unstack('Symbol')
+    rsi = resolve_strategy('RSI')
+    expected = rsi(period=14, oversold_threshold=45, overbought_threshold=55).vectorized_positions(close)
+    assert expected.to_numpy().any()
+    assert rsi(period=14.0, oversold_threshold=45, overbought_threshold=55).vectorized_positions(close).equals(expected)
+    # A fractional period has no vectorized form; the caller replays per symbol instead
+    assert rsi(period=14.5).vectorized_positions(close) is None
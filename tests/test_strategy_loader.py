@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+import utils.strategy_loader as strategy_loader
+from engine.runner import resolve_strategy
+
+PROBE = '''
+from strategies.base import BaseStrategy
+
+class ProbeStrategy(BaseStrategy):
+    name = "Probe"
+    version = {version}
+
+    def on_data(self, current_timestamp, data, portfolio, broker):
+        pass
+'''
+
+def write_probe(directory, version):
+    path = directory / 'probe.py'
+    path.write_text(PROBE.format(version=version))
+    # Distinct mtimes even where the filesystem clock is too coarse to tell the writes apart
+    os.utime(path, ns=(version * 10**9, version * 10**9))
+
+@pytest.fixture
+def strategy_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(strategy_loader, 'get_available_strategies', lambda: strategy_loader.cached_strategies_from_directory(str(tmp_path)))
+    return tmp_path
+
+def test_resolve_strategy_picks_up_edits(strategy_dir):
+    write_probe(strategy_dir, 1)
+    assert resolve_strategy('Probe').version == 1
+    hits = strategy_loader.cache_stats['hits']
+    assert resolve_strategy('Probe').version == 1
+    assert strategy_loader.cache_stats['hits'] == hits + 1
+
+    write_probe(strategy_dir, 22)
+    assert resolve_strategy('Probe').version == 22
+
+def test_resolve_strategy_forgets_removed_files(strategy_dir):
+    write_probe(strategy_dir, 1)
+    assert resolve_strategy('Probe').version == 1
+    (strategy_dir / 'probe.py').unlink()
+    with pytest.raises(ValueError):
+        resolve_strategy('Probe')
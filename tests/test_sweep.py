@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.backtester import Backtester
+from engine.dataset import MarketDataset
+from engine.runner import resolve_strategy
+from engine.sweep import SMACrossoverSweep, crossover_positions, rolling_means, settle_pair_ties
+from engine.vectorized import exact_means
+from fakes import synthetic_bars
+
+def test_rolling_means_are_within_their_error_of_exact_window_means():
+    values = 100 + np.cumsum(np.random.default_rng(2).normal(0, 1, 10000))
+    means = rolling_means(values, [1, 7, 50, 5000])
+    series = pd.Series(values)
+    for window, (mean, error) in means.items():
+        assert np.isnan(mean[:window - 1]).all()
+        ends = np.arange(window - 1, len(values), 97)
+        expected = np.array([series.iloc[i - window + 1:i + 1].mean() for i in ends])
+        assert np.all(np.abs(mean[ends] - expected) <= error[ends])
+        assert exact_means(values, ends, window).tolist() == expected.tolist()
+
+def tied_closes(n=400):
+    # A period-5 pattern makes the 5- and 10-bar SMAs equal on paper, so rounding decides every comparison
+    pattern = np.tile([101.3, 99.7, 100.1, 102.9, 98.3], n // 5)
+    return pattern + np.repeat(np.random.default_rng(3).normal(0, 2, n // 50), 50)
+
+def sweep_positions(values, pairs):
+    means = rolling_means(values, [w for pair in pairs for w in pair])
+    short_sma = np.vstack([means[s][0] for s, _ in pairs])
+    long_sma = np.vstack([means[l][0] for _, l in pairs])
+    settle_pair_ties(values, pairs, short_sma, np.vstack([means[s][1] for s, _ in pairs]),
+                     long_sma, np.vstack([means[l][1] for _, l in pairs]))
+    return crossover_positions(short_sma, long_sma)
+
+def test_sweep_positions_match_strategy():
+    dataset = MarketDataset(synthetic_bars(('AAA',), n=600, seed=8))
+    close = dataset.frame['Close'].unstack('Symbol')
+    pairs = [(5, 40), (10, 80)]
+    positions = sweep_positions(close['AAA'].to_numpy(), pairs)
+    strategy_class = resolve_strategy('SMA Crossover')
+    for (short, long), sweep_position in zip(pairs, positions):
+        strategy = strategy_class(short_window=short, long_window=long, target_symbol='AAA')
+        np.testing.assert_array_equal(sweep_position, strategy.vectorized_positions(close)['AAA'].to_numpy())
+
+def test_near_ties_cross_on_the_strategys_bars():
+    bars = synthetic_bars(('AAA',), n=400, seed=8)
+    bars['Close'] = tied_closes(len(bars))
+    dataset = MarketDataset(bars)
+    close = dataset.frame['Close'].unstack('Symbol')
+    strategy_class = resolve_strategy('SMA Crossover')
+    strategy = strategy_class(short_window=5, long_window=10, target_symbol='AAA')
+    np.testing.assert_array_equal(sweep_positions(close['AAA'].to_numpy(), [(5, 10)])[0],
+                                  strategy.vectorized_positions(close)['AAA'].to_numpy())
+
+    backtester = Backtester(dataset, strategy_class, 100000.0, 0.0, 0.0, ['AAA'])
+    backtester.strategy_instance = strategy_class(short_window=5, long_window=10, target_symbol='AAA')
+    trades = backtester.run().trades
+    assert trades
+    assert SMACrossoverSweep(dataset, 'AAA', [5], [10]).run().loc[0, 'Trade Count'] == len(trades)
+
+def test_sweep_trade_counts_match_backtester():
+    dataset = MarketDataset(synthetic_bars(('AAA',), n=600, seed=8))
+    results = SMACrossoverSweep(dataset, 'AAA', [5, 10], [40, 80]).run()
+    assert len(results) == 4
+    strategy_class = resolve_strategy('SMA Crossover')
+    for _, row in results.iterrows():
+        backtester = Backtester(dataset, strategy_class, 100000.0, 0.0, 0.0, ['AAA'])
+        backtester.strategy_instance = strategy_class(short_window=int(row['short_window']), long_window=int(row['long_window']), target_symbol='AAA')
+        assert row['Trade Count'] == len(backtester.run().trades)
+
+def test_sweep_rejects_grid_without_valid_pairs():
+    with pytest.raises(ValueError):
+        SMACrossoverSweep(synthetic_bars(('AAA',), n=50), 'AAA', [20], [10])
@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+from utils.telemetry import InstrumentedThreadPool
+
+def test_pool_counts_queued_and_running_tasks():
+    pool = InstrumentedThreadPool(max_workers=2)
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def blocked():
+        started.release()
+        release.wait(5)
+        return threading.current_thread().name
+
+    futures = [pool.submit(blocked) for _ in range(5)]
+    started.acquire(timeout=5)
+    started.acquire(timeout=5)
+    assert pool.stats() == {'queued': 3, 'running': 2}
+    release.set()
+    assert all(future.result(timeout=5) for future in futures)
+    assert pool.stats() == {'queued': 0, 'running': 0}
+    pool.shutdown()
+
+def test_pool_reports_failures_and_serves_to_thread():
+    pool = InstrumentedThreadPool(max_workers=1, thread_name_prefix='probe')
+    assert pool.max_workers == 1
+    assert isinstance(pool.submit(lambda: 1 / 0).exception(timeout=5), ZeroDivisionError)
+    assert pool.stats() == {'queued': 0, 'running': 0}
+
+    async def scenario():
+        asyncio.get_running_loop().set_default_executor(pool)
+        return await asyncio.to_thread(lambda: threading.current_thread().name)
+
+    assert asyncio.run(scenario()).startswith('probe')
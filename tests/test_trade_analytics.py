@@ -0,0 +1,103 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.trade_analytics import ROUND_TRIP_COLUMNS, round_trips, trade_statistics
+from fakes import synthetic_bars
+
+def random_trade_log(bars, seed):
+    """Long-only fills at random bars: every sell closes part or all of what is held."""
+    rng = np.random.default_rng(seed)
+    trades = []
+    for symbol in bars.index.get_level_values('Symbol').unique():
+        symbol_bars = bars.xs(symbol, level='Symbol')
+        held = 0.0
+        for date in sorted(rng.choice(symbol_bars.index, size=40, replace=False)):
+            price = symbol_bars.at[date, 'Close']
+            if held > 0 and rng.random() < 0.5:
+                quantity = held if rng.random() < 0.4 else round(held * rng.uniform(0.1, 0.9), 3)
+                trade_type = 'SELL'
+                held -= quantity
+            else:
+                quantity = float(rng.integers(1, 50))
+                trade_type = 'BUY'
+                held += quantity
+            trades.append({'timestamp': date, 'symbol': symbol, 'type': trade_type, 'quantity': quantity,
+                           'price': price, 'commission': 0.01 * quantity})
+    return sorted(trades, key=lambda trade: trade['timestamp'])
+
+def brute_force_round_trips(trades, bars):
+    """FIFO lot matching one fill at a time, with excursions scanned bar by bar."""
+    rows = []
+    for symbol in sorted({trade['symbol'] for trade in trades}):
+        symbol_bars = bars.xs(symbol, level='Symbol')
+        lots = deque()
+        for trade in (t for t in trades if t['symbol'] == symbol):
+            if trade['type'] == 'BUY':
+                lots.append([trade, trade['quantity']])
+                continue
+            remaining = trade['quantity']
+            while remaining > 1e-9 and lots:
+                lot = lots[0]
+                quantity = min(lot[1], remaining)
+                entry, exit_ = lot[0], trade
+                held = symbol_bars[(symbol_bars.index > entry['timestamp']) & (symbol_bars.index <= exit_['timestamp'])]
+                worst = min([exit_['price']] + list(held['Low']))
+                best = max([exit_['price']] + list(held['High']))
+                commission = entry['commission'] * quantity / entry['quantity'] + exit_['commission'] * quantity / exit_['quantity']
+                rows.append({
+                    'symbol': symbol, 'entry_time': entry['timestamp'], 'exit_time': exit_['timestamp'], 'quantity': quantity,
+                    'entry_price': entry['price'], 'exit_price': exit_['price'], 'commission': commission,
+                    'pnl': (exit_['price'] - entry['price']) * quantity - commission,
+                    'holding_bars': len(held),
+                    'mae': min(worst - entry['price'], 0.0) * quantity,
+                    'mfe': max(best - entry['price'], 0.0) * quantity,
+                })
+                lot[1] -= quantity
+                remaining -= quantity
+                if lot[1] <= 1e-9:
+                    lots.popleft()
+    return pd.DataFrame(rows)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_round_trips_match_brute_force(seed):
+    bars = synthetic_bars(('AAA', 'BBB'), n=300, seed=seed)
+    trades = random_trade_log(bars, seed)
+    trips = round_trips(trades, bars)
+    expected = brute_force_round_trips(trades, bars)
+
+    assert list(trips.columns) == ROUND_TRIP_COLUMNS
+    assert len(trips) == len(expected)
+    assert trips['symbol'].tolist() == expected['symbol'].tolist()
+    assert trips['entry_time'].tolist() == expected['entry_time'].tolist()
+    assert trips['exit_time'].tolist() == expected['exit_time'].tolist()
+    assert trips['holding_bars'].tolist() == expected['holding_bars'].tolist()
+    for column in ('quantity', 'entry_price', 'exit_price', 'commission', 'pnl', 'mae', 'mfe'):
+        np.testing.assert_allclose(trips[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float), rtol=1e-9, atol=1e-9)
+
+def test_open_positions_and_unmatched_logs():
+    trades = [
+        {'timestamp': pd.Timestamp('2024-01-02'), 'symbol': 'AAA', 'type': 'BUY', 'quantity': 10, 'price': 100.0, 'commission': 1.0},
+        {'timestamp': pd.Timestamp('2024-01-03'), 'symbol': 'AAA', 'type': 'SELL', 'quantity': 4, 'price': 110.0, 'commission': 1.0},
+        {'timestamp': pd.Timestamp('2024-01-03'), 'symbol': 'BBB', 'type': 'BUY', 'quantity': 5, 'price': 50.0, 'commission': 0.0},
+    ]
+    trips = round_trips(trades)
+    assert len(trips) == 1
+    assert trips.loc[0, 'pnl'] == pytest.approx(10 * 4 - 0.4 - 1.0)
+    assert trips[['holding_bars', 'mae', 'mfe']].isna().all().all()
+    assert round_trips([]).empty
+
+def test_trade_statistics():
+    trips = pd.DataFrame({'pnl': [10.0, -5.0, 20.0, -5.0], 'holding_period': pd.to_timedelta([1, 2, 3, 4], unit='D'),
+                          'mae_pct': [-1.0, -2.0, 0.0, -3.0], 'mfe_pct': [2.0, 0.0, 4.0, 1.0]})
+    stats = trade_statistics(trips)
+    assert stats['Round Trips'] == 4
+    assert stats['Win Rate (%)'] == 50.0
+    assert stats['Profit Factor'] == 3.0
+    assert stats['Expectancy'] == 5.0
+    assert stats['Avg Holding Period (days)'] == 2.5
+    assert stats['Avg MAE (%)'] == -1.5
+    assert stats['Avg MFE (%)'] == 1.75
+    assert np.isnan(trade_statistics(trips.iloc[0:0])['Win Rate (%)'])
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from engine.dataset import MarketDataset
+from engine.walk_forward import WalkForwardOptimizer, generate_windows
+from fakes import synthetic_bars
+
+@pytest.fixture(scope='module')
+def dataset():
+    return MarketDataset(synthetic_bars(('AAA',), n=700, seed=5))
+
+def optimizer(dataset, **kwargs):
+    settings = dict(strategy_name='SMA Crossover', param_grid={'short_window': [5, 10], 'long_window': [40, 60]}, symbols=['AAA'],
+                    train_size=200, test_size=30, fixed_params={'target_symbol': 'AAA'}, max_workers=1)
+    settings.update(kwargs)
+    return WalkForwardOptimizer(dataset, **settings)
+
+def test_generate_windows_tiles_out_of_sample():
+    windows = generate_windows(100, 40, 20)
+    assert windows == [(0, 40, 40, 60), (20, 60, 60, 80), (40, 80, 80, 100)]
+    assert generate_windows(100, 40, 20, anchored=True)[-1] == (0, 80, 80, 100)
+    with pytest.raises(ValueError):
+        generate_windows(100, 0, 20)
+
+def test_out_of_sample_windows_shorter_than_indicator_still_trade(dataset):
+    # Every OOS window (30 bars) is shorter than any long_window, so only the warm-up lets the SMAs form
+    cold = optimizer(dataset, warmup_bars=0).run()
+    warm = optimizer(dataset).run()
+    assert sum(window['trade_count'] for window in cold['windows']) == 0
+    assert sum(window['trade_count'] for window in warm['windows']) > 0
+    assert not warm['oos_equity_curve'].equals(cold['oos_equity_curve'])
+
+def test_out_of_sample_curve_covers_only_test_windows(dataset):
+    result = optimizer(dataset).run()
+    curve = result['oos_equity_curve']
+    assert curve.index[0] == result['windows'][0]['test_start']
+    assert curve.index[-1] == result['windows'][-1]['test_end']
+    assert len(curve) == 30 * len(result['windows'])
+    assert curve.index.is_monotonic_increasing
+
+def test_window_without_valid_candidates_is_skipped(dataset):
+    # short_window >= long_window is rejected by the strategy, so no candidate scores
+    result = optimizer(dataset, param_grid={'short_window': [60], 'long_window': [40]}).run()
+    assert all(window['best_params'] is None for window in result['windows'])
+    assert all(np.isnan(window['out_of_sample_score']) for window in result['windows'])
+    assert result['oos_equity_curve'].empty
+
+def test_negative_warmup_is_rejected(dataset):
+    with pytest.raises(ValueError):
+        optimizer(dataset, warmup_bars=-1)
@@ -1,37 +1,299 @@
-import yfinance as yf
+import logging
 import pandas as pd
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
-def load_historical_data(tickers:list[str], start_date, end_date, interval:str = "1d"):
+from utils.event_log import emit
+from utils.shared_store import get_shared_store
+
+# yfinance interval -> (pandas offset alias, bucket offset). Intraday US bars start on the half hour,
+# so hourly buckets are shifted by 30 minutes to line up with the bars yfinance itself returns.
+INTERVAL_RULES: Dict[str, Tuple[str, Optional[str]]] = {
+    '1m': ('1min', None),
+    '2m': ('2min', None),
+    '5m': ('5min', None),
+    '15m': ('15min', None),
+    '30m': ('30min', None),
+    '60m': ('60min', '30min'),
+    '1h': ('60min', '30min'),
+    '90m': ('90min', '30min'),
+    '1d': ('1D', None),
+    '5d': ('5D', None),
+    '1wk': ('W-MON', None),
+    '1mo': ('MS', None),
+}
+
+# Downloaded bars per (ticker, interval): (start, end, bars, fetched_at) for the [start, end) range they cover.
+# Both caches are kept in least-recently-used order and evict from the front.
+_bar_cache: "OrderedDict[Tuple[str, str], Tuple[pd.Timestamp, pd.Timestamp, pd.DataFrame, float]]" = OrderedDict()
+# Resampled bars per (ticker, base interval, target interval, start, end)
+_resampled_cache: "OrderedDict[Tuple[str, str, str, pd.Timestamp, pd.Timestamp], pd.DataFrame]" = OrderedDict()
+
+# Loads run concurrently on worker threads and the event loop; every read-modify-write of the
+# caches (LRU reordering, eviction, iteration) happens under this lock. Reentrant because
+# _shared_bars stores what it pulls in.
+_cache_lock = threading.RLock()
+
+# Shared-store entry key backing each (ticker, interval) in _bar_cache, released when the entry leaves it
+_shared_keys: Dict[Tuple[str, str], str] = {}
+
+# Lookups served from the cache (downloaded or resampled) vs. those that needed a download
+cache_stats = {'hits': 0, 'misses': 0}
+
+DATA_CACHE_MAX_ENTRIES = int(os.environ.get('RETROSPECT_DATA_CACHE_ENTRIES', '256'))
+# Every distinct requested range resamples into its own entry, so these are bounded separately
+RESAMPLED_CACHE_MAX_ENTRIES = int(os.environ.get('RETROSPECT_RESAMPLED_CACHE_ENTRIES', '256'))
+# Ranges reaching into the current day can still change, so they are only reused for this many seconds
+DATA_CACHE_TTL_SECONDS = float(os.environ.get('RETROSPECT_DATA_CACHE_TTL_SECONDS', '900'))
+
+def _is_fresh(end: pd.Timestamp, fetched_at: float) -> bool:
+    return end < pd.Timestamp.now().normalize() or time.time() - fetched_at < DATA_CACHE_TTL_SECONDS
+
+def interval_timedelta(interval: str) -> pd.Timedelta:
+    rule = INTERVAL_RULES[interval][0]
+    if rule in ('W-MON',):
+        return pd.Timedelta(weeks=1)
+    if rule == 'MS':
+        return pd.Timedelta(days=31)
+    return pd.Timedelta(pd.tseries.frequencies.to_offset(rule))
+
+def can_resample(base_interval: str, target_interval: str) -> bool:
+    """True if target bars can be built exactly from base bars (base is finer and divides target)."""
+    if base_interval not in INTERVAL_RULES or target_interval not in INTERVAL_RULES or base_interval == target_interval:
+        return False
+    base, target = interval_timedelta(base_interval), interval_timedelta(target_interval)
+    if target_interval in ('1wk', '1mo', '5d'):
+        return base <= pd.Timedelta(days=1)
+    if target_interval == '1d':
+        return base < target
+    return base < target and (target % base) == pd.Timedelta(0)
+
+def resample_ohlcv(data: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Builds coarser OHLCV bars from a (Date, Symbol) MultiIndex frame in one grouped pass:
+    open=first, high=max, low=min, close=last, volume=sum. Bars are labelled by the start
+    of their bucket and empty buckets (nights, weekends) are dropped.
+    """
+    if data.empty:
+        return data
+    rule, offset = INTERVAL_RULES[interval]
+    grouper = pd.Grouper(level='Date', freq=rule, offset=offset, label='left', closed='left') if offset else pd.Grouper(level='Date', freq=rule, label='left', closed='left')
+    resampled = data.groupby([grouper, pd.Grouper(level='Symbol')]).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+    )
+    resampled = resampled.dropna(subset=['Open'])
+    resampled.sort_index(inplace=True)
+    return resampled
+
+def quality_columns(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds the per-bar columns the engine and strategies read instead of re-checking prices on
+    every bar: Valid (the close is present and positive) and Mark (the symbol's last valid
+    close, forward-filled; NaN before its first one), used to value positions.
+    """
+    close = data['Close']
+    valid = close.notna() & (close > 0)
+    mark = close.where(valid).groupby(level='Symbol', sort=False).ffill()
+    return data.assign(Valid=valid.to_numpy(), Mark=mark.to_numpy())
+
+def data_quality_report(data: pd.DataFrame, duplicates_dropped: int = 0) -> Dict:
+    """
+    Counts of problem bars in a sorted (Date, Symbol) frame carrying quality_columns, overall
+    and per symbol. The trading calendar is the set of timestamps any symbol has a bar at;
+    a symbol's missing bars are the calendar sessions between its first and last bar where
+    it has none.
+    """
+    dates = data.index.get_level_values('Date')
+    calendar = dates.unique()
+    per_bar = pd.DataFrame({
+        'session': calendar.searchsorted(dates),
+        'invalid_closes': ~data['Valid'].to_numpy(dtype=bool),
+        'zero_volume_bars': (data['Volume'] == 0).to_numpy(),
+    }, index=data.index.get_level_values('Symbol'))
+    by_symbol = per_bar.groupby(level=0).agg(first=('session', 'min'), last=('session', 'max'), bars=('session', 'size'),
+                                             invalid_closes=('invalid_closes', 'sum'), zero_volume_bars=('zero_volume_bars', 'sum'))
+    by_symbol['missing_bars'] = by_symbol['last'] - by_symbol['first'] + 1 - by_symbol['bars']
+    by_symbol = by_symbol[['bars', 'invalid_closes', 'zero_volume_bars', 'missing_bars']].astype(int)
+    return {
+        'rows': len(data),
+        'symbols': len(by_symbol),
+        'sessions': len(calendar),
+        'start': calendar[0].isoformat() if len(calendar) else None,
+        'end': calendar[-1].isoformat() if len(calendar) else None,
+        'duplicates_dropped': int(duplicates_dropped),
+        'invalid_closes': int(by_symbol['invalid_closes'].sum()),
+        'zero_volume_bars': int(by_symbol['zero_volume_bars'].sum()),
+        'missing_bars': int(by_symbol['missing_bars'].sum()),
+        'by_symbol': by_symbol.to_dict(orient='index'),
+    }
+
+def clean_bars(data: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+    """
+    The load-time validation pass, vectorized over every symbol at once: drops duplicate
+    (Date, Symbol) rows keeping the last, sorts, adds quality_columns and returns
+    (bars, data_quality_report). Bad bars are kept and flagged, not removed, so every
+    symbol keeps the timestamps it traded at.
+    """
+    duplicated = data.index.duplicated(keep='last')
+    if duplicated.any():
+        data = data[~duplicated]
+    if not data.index.is_monotonic_increasing:
+        data = data.sort_index()
+    data = quality_columns(data)
+    return data, data_quality_report(data, int(duplicated.sum()))
+
+def _download(ticker: str, start_date, end_date, interval: str) -> pd.DataFrame:
+    import yfinance as yf # Deferred: slow to import and only needed on a cache miss
+    df = yf.download(ticker, start=start_date, end=end_date, interval=interval, progress=False)
+    if df.empty:
+        return pd.DataFrame()
+    df.reset_index(inplace=True)
+    if 'Datetime' in df.columns:
+        df.rename(columns={'Datetime': 'Date'}, inplace=True)
+    df['Symbol'] = ticker
+    df.columns = [col[0] for col in df.columns]
+    df = df[['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    return df.set_index(['Date', 'Symbol']).sort_index()
+
+def _cached_bars(ticker: str, interval: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[pd.DataFrame]:
+    """
+    Bars for ticker/interval in [start, end) from the cache: downloaded directly (by this
+    process or, via the shared store, another one) or resampled from a finer interval.
+    """
+    with _cache_lock:
+        entry = _bar_cache.get((ticker, interval))
+        if entry is not None and entry[0] <= start and entry[1] >= end and _is_fresh(entry[1], entry[3]):
+            _bar_cache.move_to_end((ticker, interval))
+            return _slice_dates(entry[2], start, end)
+        if _shared_bars(ticker, interval, start, end):
+            return _slice_dates(_bar_cache[(ticker, interval)][2], start, end)
+
+        base = next(((base_interval, bars) for (cached_ticker, base_interval), (cached_start, cached_end, bars, fetched_at) in list(_bar_cache.items())
+                     if cached_ticker == ticker and can_resample(base_interval, interval)
+                     and cached_start <= start and cached_end >= end and _is_fresh(cached_end, fetched_at)), None)
+        if base is None:
+            return None
+        base_interval, base_bars = base
+        _bar_cache.move_to_end((ticker, base_interval))
+        key = (ticker, base_interval, interval, start, end)
+        resampled = _resampled_cache.get(key)
+        if resampled is not None:
+            _resampled_cache.move_to_end(key)
+            return resampled
+    # Resample outside the lock; a concurrent load of the same range just resamples it twice
+    resampled = resample_ohlcv(_slice_dates(base_bars, start, end), interval)
+    with _cache_lock:
+        _resampled_cache[key] = resampled
+        _resampled_cache.move_to_end(key)
+        while len(_resampled_cache) > RESAMPLED_CACHE_MAX_ENTRIES:
+            _resampled_cache.popitem(last=False)
+    return resampled
+
+def _forget_bars(ticker: str, interval: str):
+    with _cache_lock:
+        _bar_cache.pop((ticker, interval), None)
+        for key in [key for key in _resampled_cache if key[0] == ticker and key[1] == interval]:
+            del _resampled_cache[key]
+        shared_key = _shared_keys.pop((ticker, interval), None)
+    if shared_key is not None:
+        get_shared_store().release(shared_key)
+
+def _store_bars(ticker: str, interval: str, start: pd.Timestamp, end: pd.Timestamp, bars: pd.DataFrame,
+                fetched_at: Optional[float] = None, shared_key: Optional[str] = None) -> pd.DataFrame:
+    """
+    Caches downloaded bars and returns the cached frame. With the shared store enabled, freshly
+    downloaded bars are moved into it and the cache keeps the shared view, so other processes
+    can attach to the same copy.
+    """
+    _forget_bars(ticker, interval)
+    fetched_at = fetched_at if fetched_at is not None else time.time()
+    store = get_shared_store()
+    if store is not None and shared_key is None:
+        shared = store.put(ticker, interval, start, end, bars, fetched_at)
+        if shared is not None:
+            bars, shared_key = shared
+    with _cache_lock:
+        _bar_cache[(ticker, interval)] = (start, end, bars, fetched_at)
+        if shared_key is not None:
+            _shared_keys[(ticker, interval)] = shared_key
+        while len(_bar_cache) > DATA_CACHE_MAX_ENTRIES:
+            _forget_bars(*next(iter(_bar_cache)))
+    return bars
+
+def _shared_bars(ticker: str, interval: str, start: pd.Timestamp, end: pd.Timestamp) -> bool:
+    """Pulls a covering, fresh entry for ticker/interval from the shared store into the local cache."""
+    store = get_shared_store()
+    if store is None:
+        return False
+    shared = store.get(ticker, interval, start, end)
+    if shared is None:
+        return False
+    shared_key, shared_start, shared_end, bars, fetched_at = shared
+    if not _is_fresh(shared_end, fetched_at):
+        store.release(shared_key)
+        return False
+    _store_bars(ticker, interval, shared_start, shared_end, bars, fetched_at, shared_key)
+    return True
+
+def _slice_dates(bars: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    dates = bars.index.get_level_values('Date')
+    if dates.tz is not None:
+        start, end = start.tz_localize(dates.tz) if start.tz is None else start, end.tz_localize(dates.tz) if end.tz is None else end
+    return bars[(dates >= start) & (dates < end)]
+
+def load_historical_data(tickers:list[str], start_date, end_date, interval:str = "1d", base_interval: Optional[str] = None):
+    """
+    Loads (Date, Symbol) OHLCV bars. Bars are cached per process: a request is served from an
+    earlier download of the same interval, or resampled locally from any cached finer interval
+    covering the range, before falling back to yfinance. Pass base_interval to download the
+    finer interval up front so later coarse requests need no downloads at all. The combined
+    bars go through clean_bars, so they carry the Valid and Mark columns.
+    """
+    start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
     data = []
     for ticker in tickers:
         try:
-            df = yf.download(ticker, start=start_date, end=end_date, interval=interval, progress=False)
-            if df.empty:
+            bars = _cached_bars(ticker, interval, start, end)
+            with _cache_lock:
+                cache_stats['hits' if bars is not None else 'misses'] += 1
+            if bars is None:
+                fetch_intervals = [base_interval, interval] if base_interval and can_resample(base_interval, interval) else [interval]
+                # yfinance limits how far back fine intervals go; without base bars, download the requested interval itself
+                for fetch_interval in fetch_intervals:
+                    downloaded = _download(ticker, start_date, end_date, fetch_interval)
+                    if not downloaded.empty:
+                        # Taken from what was stored, not looked up again: concurrent loads may already have evicted it
+                        bars = _slice_dates(_store_bars(ticker, fetch_interval, start, end, downloaded), start, end)
+                        if fetch_interval != interval:
+                            bars = resample_ohlcv(bars, interval)
+                        break
+            if bars is None or bars.empty:
                 print(f"Warning: No data found for {ticker} from {start_date} to {end_date}.")
                 continue
-            df.reset_index(inplace=True)
-            if 'Datetime' in df.columns:
-                df.rename(columns={'Datetime': 'Date'}, inplace=True)
-            df['Symbol'] = ticker
-            df.columns = [col[0] for col in df.columns]
-            data.append(df)
+            data.append(bars)
         except Exception as e:
             print(f"Error downloading data for {ticker}: {e}")
-    
+
     if not data:
             return pd.DataFrame()
-    combined_data = pd.concat(data,ignore_index=True)
-    combined_data = combined_data[['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']]
-    combined_data.set_index(['Date','Symbol'], inplace=True)
-    combined_data.sort_index(inplace=True)
+    combined_data, report = clean_bars(pd.concat(data))
+    if report['duplicates_dropped'] or report['invalid_closes'] or report['missing_bars']:
+        emit(logging.WARNING, 'data_quality', f"Loaded bars have {report['duplicates_dropped']} duplicate, {report['invalid_closes']} invalid-close "
+             f"and {report['missing_bars']} missing bars; invalid bars are flagged in the Valid column.",
+             **{key: report[key] for key in ('duplicates_dropped', 'invalid_closes', 'zero_volume_bars', 'missing_bars')})
     return combined_data
 
-
+def clear_data_cache():
+    with _cache_lock:
+        for ticker, interval in list(_bar_cache):
+            _forget_bars(ticker, interval)
+        _resampled_cache.clear()
 
 def load_csv_data(file_path):
     data = pd.read_csv(file_path, parse_dates=True, index_col='Date')
     if('Symbol' not in data.columns):
         pass
     return data
-
@@ -0,0 +1,122 @@
+import atexit
+import contextlib
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+# Engine events are forwarded to this logger; console output happens on a background thread
+LOGGER_NAME = 'retrospect'
+DEFAULT_CAPACITY = int(os.environ.get('RETROSPECT_EVENT_LOG_CAPACITY', '1000'))
+DEFAULT_LEVEL = logging.getLevelName(os.environ.get('RETROSPECT_EVENT_LOG_LEVEL', 'INFO').upper())
+CONSOLE_LEVEL = logging.getLevelName(os.environ.get('RETROSPECT_LOG_LEVEL', 'WARNING').upper())
+
+_current_log: ContextVar[Optional["EventLog"]] = ContextVar('retrospect_event_log', default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+def get_logger() -> logging.Logger:
+    """
+    The 'retrospect' logger, writing through a QueueHandler so callers only enqueue
+    records; a QueueListener thread formats and writes them to stderr in the background.
+    """
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                records: queue.Queue = queue.Queue(-1)
+                console = logging.StreamHandler()
+                console.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+                _listener = logging.handlers.QueueListener(records, console, respect_handler_level=True)
+                _listener.start()
+                atexit.register(_listener.stop)
+                logger.addHandler(logging.handlers.QueueHandler(records))
+                logger.setLevel(CONSOLE_LEVEL)
+                logger.propagate = False
+    return logger
+
+class EventLog:
+    """
+    Bounded, structured event buffer for one run.
+
+    Events are dicts with a wall-clock time, level name, event code, message and any extra
+    fields (bar timestamp, symbol, ...). Events below `level` are discarded before any
+    formatting happens; once `capacity` events are held the oldest are dropped and counted.
+    Events at or above the console level are also forwarded to the 'retrospect' logger.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, level: int = DEFAULT_LEVEL):
+        self.capacity = capacity
+        self.level = level
+        self._events: deque = deque(maxlen=capacity)
+        self.dropped = 0
+        self.counts: Dict[str, int] = {}
+
+    def log(self, level: int, event: str, message: str, **fields):
+        if level < self.level and level < CONSOLE_LEVEL:
+            return
+        self.counts[event] = self.counts.get(event, 0) + 1
+        if level >= self.level:
+            if len(self._events) == self.capacity:
+                self.dropped += 1
+            self._events.append((time.time(), level, event, message, fields))
+        if level >= CONSOLE_LEVEL:
+            get_logger().log(level, message, extra={'event': event, **{f"field_{k}": v for k, v in fields.items()}})
+
+    def debug(self, event: str, message: str, **fields):
+        self.log(logging.DEBUG, event, message, **fields)
+
+    def info(self, event: str, message: str, **fields):
+        self.log(logging.INFO, event, message, **fields)
+
+    def warning(self, event: str, message: str, **fields):
+        self.log(logging.WARNING, event, message, **fields)
+
+    def error(self, event: str, message: str, **fields):
+        self.log(logging.ERROR, event, message, **fields)
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def to_list(self, min_level: int = logging.NOTSET) -> List[Dict[str, Any]]:
+        """JSON-friendly events, oldest first. Timestamps and other non-primitive fields become strings."""
+        events = []
+        for created, level, event, message, fields in self._events:
+            if level < min_level:
+                continue
+            events.append({
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(created)) + f".{int(created % 1 * 1000):03d}",
+                'level': logging.getLevelName(level),
+                'event': event,
+                'message': message,
+                **{key: value if isinstance(value, (int, float, str, bool)) or value is None else str(value) for key, value in fields.items()},
+            })
+        return events
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the log that emit() writes to for the current thread or async task."""
+        token = _current_log.set(self)
+        try:
+            yield self
+        finally:
+            _current_log.reset(token)
+
+def current_event_log() -> Optional[EventLog]:
+    return _current_log.get()
+
+def emit(level: int, event: str, message: str, **fields):
+    """
+    Records an event in the active run's EventLog, or sends it straight to the logger when
+    no run is active. Hot paths call this instead of print().
+    """
+    event_log = _current_log.get()
+    if event_log is not None:
+        event_log.log(level, event, message, **fields)
+    elif level >= CONSOLE_LEVEL:
+        get_logger().log(level, message, extra={'event': event})
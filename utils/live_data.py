@@ -1,40 +1,250 @@
-import yfinance as yf
+import asyncio
+import logging
+import time
 import pandas as pd
 import numpy as np # For np.nan handling
 from datetime import datetime, timedelta
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
-def get_recent_history(symbols:List[str],interval:str = "1d",lookback_period:int=200) ->pd.DataFrame:
-    if not symbols:
-        return pd.DataFrame()
-        
+from utils.event_log import emit
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _history_period(interval: str, lookback_period: int) -> str:
     if interval == '1m':
-        period = '7d' # Max period for 1m interval
+        return '7d' # Max period for 1m interval
     elif interval in ['5m', '15m', '30m', '1h']:
-        period = '60d' # Max period for these intraday intervals
-    else: # Daily, weekly, monthly intervals
-        period = f"{lookback_period*2}d" if lookback_period*2 > 7 else "7d"
-    
+        return '60d' # Max period for these intraday intervals
+    # Daily, weekly, monthly intervals
+    return f"{lookback_period*2}d" if lookback_period*2 > 7 else "7d"
+
+def _latest_period(interval: str) -> str:
+    """Smallest yfinance period that still covers the newest bars for an interval."""
+    return '1d' if interval in ['1m', '2m', '5m', '15m', '30m', '1h'] else '5d'
+
+def _download_bars(ticker: str, interval: str, period: str) -> pd.DataFrame:
+    """Downloads bars for one ticker as a frame with a 'Date' column followed by OHLCV columns."""
+    import yfinance as yf # Deferred until the first download, see utils.data_loader
+    try:
+        df = yf.download(ticker, period = period,interval = interval, progress=False, auto_adjust=True)
+        if df.empty:
+            emit(logging.WARNING, 'live_data_empty', f"No data found for {ticker} for the interval and period.", symbol=ticker, interval=interval)
+            return pd.DataFrame()
+        df.reset_index(inplace=True)
+        if 'Datetime' in df.columns:
+            df.rename(columns={'Datetime': 'Date'}, inplace=True)
+        df.columns = [col[0] if isinstance(col, tuple) else col for col in df.columns]
+        return df[['Date'] + OHLCV_COLUMNS]
+    except Exception as e:
+        emit(logging.ERROR, 'live_data_download_failed', f"Error downloading data for {ticker}: {e}", symbol=ticker, interval=interval)
+        return pd.DataFrame()
+
+def _combine(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
     data = []
-    for ticker in symbols:
-        try:
-            df = yf.download(ticker, period = period,interval = interval, progress=False, auto_adjust=True)
-            if df.empty:
-                print(f"Warning: No data found for {ticker} for the interval and period.")
-                continue
-            df.reset_index(inplace=True)
-            if 'Datetime' in df.columns:
-                df.rename(columns={'Datetime': 'Date'}, inplace=True)
-            df['Symbol'] = ticker
-            df.columns = [col[0] for col in df.columns]
-            data.append(df)
-        except Exception as e:
-            print(f"Error downloading data for {ticker}: {e}")
-    
+    for ticker, df in frames.items():
+        if df.empty:
+            continue
+        df = df.copy()
+        df['Symbol'] = ticker
+        data.append(df)
     if not data:
             return pd.DataFrame()
     combined_data = pd.concat(data,ignore_index=True)
     combined_data = combined_data[['Date', 'Symbol', 'Open', 'High', 'Low', 'Close', 'Volume']]
     combined_data.set_index(['Date','Symbol'], inplace=True)
     combined_data.sort_index(inplace=True)
-    return combined_data
\ No newline at end of file
+    return combined_data
+
+def get_recent_history(symbols:List[str],interval:str = "1d",lookback_period:int=200) ->pd.DataFrame:
+    if not symbols:
+        return pd.DataFrame()
+    period = _history_period(interval, lookback_period)
+    return _combine({ticker: _download_bars(ticker, interval, period) for ticker in symbols})
+
+class BarRingBuffer:
+    """
+    Fixed-size buffer of the most recent bars for one (symbol, interval).
+
+    Timestamps and OHLCV values live in preallocated NumPy arrays; once full, new bars
+    overwrite the oldest ones. A bar with the same timestamp as the newest buffered bar
+    replaces it, since the latest bar keeps changing until its interval closes. Timestamps
+    are held as UTC nanoseconds and returned in the timezone of the bars that were added.
+    """
+    def __init__(self, capacity: int, tz=None):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive.")
+        self.capacity = capacity
+        self.tz = tz
+        self._timestamps = np.zeros(capacity, dtype='int64')
+        self._values = np.zeros((capacity, len(OHLCV_COLUMNS)), dtype=float)
+        self._start = 0
+        self._count = 0
+        self.last_update = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        if self._count == 0:
+            return None
+        timestamp = pd.Timestamp(self._timestamps[(self._start + self._count - 1) % self.capacity])
+        return timestamp.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else timestamp
+
+    def extend(self, bars: pd.DataFrame) -> int:
+        """
+        Adds bars (a frame with 'Date' and OHLCV columns) newer than or equal to the newest bar
+        and returns the number added. last_update only moves when bars arrive, so a feed that
+        keeps failing shows up as stale.
+        """
+        if bars.empty:
+            return 0
+        self.last_update = time.monotonic()
+        dates = pd.DatetimeIndex(bars['Date'])
+        if self.tz is None and dates.tz is not None:
+            self.tz = dates.tz
+        # asi8 of a tz-aware index is UTC, so bars from any timezone order correctly
+        timestamps = dates.asi8
+        values = bars[OHLCV_COLUMNS].to_numpy(dtype=float)
+        added = 0
+        for ts, row in zip(timestamps, values):
+            if self._count:
+                newest = (self._start + self._count - 1) % self.capacity
+                if ts < self._timestamps[newest]:
+                    continue
+                if ts == self._timestamps[newest]:
+                    self._values[newest] = row
+                    continue
+            slot = (self._start + self._count) % self.capacity
+            self._timestamps[slot] = ts
+            self._values[slot] = row
+            if self._count < self.capacity:
+                self._count += 1
+            else:
+                self._start = (self._start + 1) % self.capacity
+            added += 1
+        return added
+
+    def to_frame(self) -> pd.DataFrame:
+        order = (self._start + np.arange(self._count)) % self.capacity
+        frame = pd.DataFrame(self._values[order], columns=OHLCV_COLUMNS)
+        dates = pd.to_datetime(self._timestamps[order])
+        frame.insert(0, 'Date', dates.tz_localize('UTC').tz_convert(self.tz) if self.tz is not None else dates)
+        return frame
+
+class YFinanceBarFeed:
+    """Upstream bar source backed by yfinance. fetch() blocks and is run in a worker thread."""
+    def fetch(self, symbol: str, interval: str, period: str) -> pd.DataFrame:
+        return _download_bars(symbol, interval, period)
+
+class LiveBarCache:
+    """
+    In-memory cache of recent bars per (symbol, interval), kept fresh by a background poller.
+
+    The first request for a key seeds its ring buffer with a full lookback download; after
+    that the poller only fetches the newest bars on a schedule and signal requests read
+    from memory. Concurrent fetches for the same key are coalesced into one upstream call.
+    A key nobody has requested for idle_ttl seconds is dropped rather than polled forever,
+    and a symbol whose first download returns nothing is never buffered.
+    """
+    def __init__(self, feed=None, capacity: int = 1000, poll_interval: float = 60.0, idle_ttl: float = 900.0):
+        self.feed = feed or YFinanceBarFeed()
+        self.capacity = capacity
+        self.poll_interval = poll_interval
+        self.idle_ttl = idle_ttl
+        self.buffers: Dict[Tuple[str, str], BarRingBuffer] = {}
+        self.last_access: Dict[Tuple[str, str], float] = {}
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    async def _single_flight(self, key: tuple, fetch: Callable[[], Awaitable[pd.DataFrame]]) -> pd.DataFrame:
+        """Runs fetch() once per key at a time; callers arriving while it runs share its result."""
+        if key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await fetch()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited is not reported as unhandled
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _fetch(self, symbol: str, interval: str, period: str) -> pd.DataFrame:
+        return await self._single_flight((symbol, interval, period), lambda: asyncio.to_thread(self.feed.fetch, symbol, interval, period))
+
+    async def refresh(self, symbol: str, interval: str, lookback_period: Optional[int] = None):
+        """Fetches the full lookback (if given) or just the newest bars and merges them into the buffer."""
+        period = _history_period(interval, lookback_period) if lookback_period is not None else _latest_period(interval)
+        bars = await self._fetch(symbol, interval, period)
+        key = (symbol, interval)
+        needed = max(self.capacity, 2 * lookback_period) if lookback_period is not None else self.capacity
+        buffer = self.buffers.get(key)
+        if buffer is None and bars.empty:
+            return
+        if buffer is None or buffer.capacity < needed:
+            old_bars = buffer.to_frame() if buffer is not None else None
+            buffer = BarRingBuffer(needed, tz=buffer.tz if buffer is not None else None)
+            if old_bars is not None:
+                buffer.extend(old_bars)
+            self.buffers[key] = buffer
+            self.last_access.setdefault(key, time.monotonic())
+        buffer.extend(bars)
+
+    async def get_history(self, symbols: List[str], interval: str = "1d", lookback_period: int = 200) -> pd.DataFrame:
+        """Same shape as get_recent_history (the last lookback_period bars per symbol), served from the ring buffers where possible."""
+        now = time.monotonic()
+        for symbol in symbols:
+            self.last_access[(symbol, interval)] = now
+
+        async def ensure(symbol: str):
+            buffer = self.buffers.get((symbol, interval))
+            if buffer is None or len(buffer) < lookback_period:
+                await self.refresh(symbol, interval, lookback_period)
+            elif time.monotonic() - buffer.last_update > 2 * self.poll_interval:
+                # Poller is behind (or not running); top up inline rather than serve stale bars
+                await self.refresh(symbol, interval)
+
+        await asyncio.gather(*(ensure(symbol) for symbol in symbols))
+        return _combine({symbol: self.buffers[(symbol, interval)].to_frame().tail(lookback_period)
+                         for symbol in symbols if (symbol, interval) in self.buffers})
+
+    def evict_idle(self) -> List[Tuple[str, str]]:
+        """Drops the buffers of keys not requested for idle_ttl seconds; returns the dropped keys."""
+        cutoff = time.monotonic() - self.idle_ttl
+        idle = [key for key, accessed in self.last_access.items() if accessed < cutoff]
+        for key in idle:
+            del self.last_access[key]
+            self.buffers.pop(key, None)
+        return idle
+
+    async def poll_once(self):
+        self.evict_idle()
+        keys = list(self.buffers.keys())
+        results = await asyncio.gather(*(self.refresh(symbol, interval) for symbol, interval in keys), return_exceptions=True)
+        for (symbol, interval), result in zip(keys, results):
+            if isinstance(result, Exception):
+                emit(logging.ERROR, 'live_data_poll_failed', f"Error polling bars for {symbol} ({interval}): {result}", symbol=symbol, interval=interval)
+
+    async def _run_poller(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            await self.poll_once()
+
+    def start(self):
+        if self._poller is None:
+            self._poller = asyncio.get_running_loop().create_task(self._run_poller())
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
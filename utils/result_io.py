@@ -0,0 +1,121 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List
+
+TRADE_LOG_COLUMNS = ['timestamp', 'symbol', 'type', 'quantity', 'price', 'commission', 'realized_pnl']
+
+def write_equity_curve(equity_curve: pd.Series, file_path: str):
+    frame = pd.DataFrame({'Date': pd.DatetimeIndex(equity_curve.index), 'Equity': equity_curve.to_numpy(dtype=float)})
+    frame.to_parquet(file_path, index=False)
+
+def read_equity_curve(file_path: str) -> pd.Series:
+    frame = pd.read_parquet(file_path)
+    if frame.empty:
+        return pd.Series([], dtype=float)
+    return pd.Series(frame['Equity'].to_numpy(), index=pd.DatetimeIndex(frame['Date']).rename(None), name='Equity')
+
+def write_trade_log(trades: List[Dict[str, Any]], file_path: str):
+    frame = pd.DataFrame(trades, columns=TRADE_LOG_COLUMNS)
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+    frame.to_parquet(file_path, index=False)
+
+def read_trade_log(file_path: str) -> List[Dict[str, Any]]:
+    return pd.read_parquet(file_path).to_dict(orient='records')
+
+def write_drawdowns(drawdowns: pd.Series, file_path: str):
+    frame = pd.DataFrame({'Date': pd.DatetimeIndex(drawdowns.index), 'Drawdown': drawdowns.to_numpy(dtype=float)})
+    frame.to_parquet(file_path, index=False)
+
+def read_drawdowns(file_path: str) -> pd.Series:
+    frame = pd.read_parquet(file_path)
+    return pd.Series(frame['Drawdown'].to_numpy(), index=pd.DatetimeIndex(frame['Date']).rename(None), name='Drawdown')
+
+def write_risk_report(report: Dict[str, Any], experiment_dir: str):
+    """Writes an engine.risk.risk_report as risk_*.parquet files, with dates as a Date column."""
+    def write_frame(frame: pd.DataFrame, name: str):
+        frame = frame.copy()
+        frame.columns = [str(column) for column in frame.columns]
+        frame.index = pd.DatetimeIndex(frame.index, name='Date')
+        frame.reset_index().to_parquet(os.path.join(experiment_dir, name), index=False)
+
+    write_frame(report['volatility'], 'risk_volatility.parquet')
+    write_frame(report['exposure'].join(report['turnover']), 'risk_exposure.parquet')
+    if report['beta'] is not None:
+        write_frame(report['beta'], 'risk_beta.parquet')
+    covariance = report['covariance']
+    n_dates, n_symbols = len(covariance['dates']), len(covariance['symbols'])
+    pairs = pd.DataFrame({
+        'Date': np.repeat(covariance['dates'], n_symbols * n_symbols),
+        'Symbol': np.tile(np.repeat(covariance['symbols'], n_symbols), n_dates),
+        'Other': np.tile(covariance['symbols'], n_dates * n_symbols),
+        'Covariance': covariance['covariance'].reshape(-1),
+        'Correlation': covariance['correlation'].reshape(-1),
+    })
+    pairs.to_parquet(os.path.join(experiment_dir, 'risk_covariance.parquet'), index=False)
+
+def experiment_dir_name(experiment_name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', experiment_name).strip('_') or 'experiment'
+
+class ExperimentResultWriter:
+    """
+    Streams experiment results to disk as each experiment finishes.
+
+    Every experiment gets its own directory with equity.parquet, drawdowns.parquet and
+    trades.parquet, and its summary row is appended to summary.parquet as a new row group,
+    so nothing but the open file handle is kept in memory between experiments.
+    """
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.summary_path = os.path.join(output_dir, 'summary.parquet')
+        self._summary_writer = None
+        self._summary_schema = None
+        self._used_names = set()
+
+    def write_experiment(self, experiment_name: str, summary: Dict[str, Any], equity_curve: pd.Series, drawdowns: pd.Series, trades: List[Dict[str, Any]]) -> str:
+        dir_name = experiment_dir_name(experiment_name)
+        suffix = 2
+        while dir_name in self._used_names:
+            dir_name = f"{experiment_dir_name(experiment_name)}_{suffix}"
+            suffix += 1
+        self._used_names.add(dir_name)
+
+        experiment_dir = os.path.join(self.output_dir, dir_name)
+        os.makedirs(experiment_dir, exist_ok=True)
+        write_equity_curve(equity_curve, os.path.join(experiment_dir, 'equity.parquet'))
+        write_drawdowns(drawdowns, os.path.join(experiment_dir, 'drawdowns.parquet'))
+        write_trade_log(trades, os.path.join(experiment_dir, 'trades.parquet'))
+        self._append_summary({**summary, 'Experiment Name': experiment_name, 'Result Dir': dir_name})
+        return experiment_dir
+
+    def _append_summary(self, summary: Dict[str, Any]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        row = pd.DataFrame([summary])
+        if self._summary_writer is None:
+            self._summary_schema = pa.Schema.from_pandas(row, preserve_index=False)
+            self._summary_writer = pq.ParquetWriter(self.summary_path, self._summary_schema)
+        row = row.reindex(columns=self._summary_schema.names)
+        self._summary_writer.write_table(pa.Table.from_pandas(row, schema=self._summary_schema, preserve_index=False))
+
+    def close(self):
+        if self._summary_writer is not None:
+            self._summary_writer.close()
+            self._summary_writer = None
+
+def load_experiment_results(output_dir: str) -> Dict[str, Any]:
+    """Reads back what ExperimentResultWriter wrote: the summary table plus each experiment's curves and trades."""
+    summary = pd.read_parquet(os.path.join(output_dir, 'summary.parquet'))
+    experiments = {}
+    for experiment_name, dir_name in zip(summary['Experiment Name'], summary['Result Dir']):
+        experiment_dir = os.path.join(output_dir, dir_name)
+        experiments[experiment_name] = {
+            'equity_curve': read_equity_curve(os.path.join(experiment_dir, 'equity.parquet')),
+            'drawdowns': read_drawdowns(os.path.join(experiment_dir, 'drawdowns.parquet')),
+            'trades': read_trade_log(os.path.join(experiment_dir, 'trades.parquet')),
+        }
+    return {'summary': summary, 'experiments': experiments}
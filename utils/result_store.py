@@ -0,0 +1,147 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional, Type
+
+import pandas as pd
+
+from strategies.base import BaseStrategy
+from utils.event_log import emit
+from utils.result_io import read_equity_curve, read_trade_log, write_equity_curve, write_trade_log
+from utils.strategy_loader import file_hash, strategy_source_file, strategy_source_hash
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.retrospect_cache', 'results')
+
+def canonical_config(symbols: list, start_date, end_date, interval: str, commission_per_share: float, slippage_bps: float,
+                     initial_capital: float, strategy_name: str, strategy_params: Dict[str, Any]) -> Dict[str, Any]:
+    """The result-determining fields of a backtest, in the same shape for the API and the CLI."""
+    return {
+        'data': {'symbols': list(symbols), 'start_date': str(start_date), 'end_date': str(end_date), 'interval': interval},
+        'broker_settings': {'commission_per_share': float(commission_per_share), 'slippage_bps': float(slippage_bps)},
+        'portfolio_settings': {'initial_capital': float(initial_capital)},
+        'strategy': {'name': strategy_name, 'parameters': dict(strategy_params)},
+    }
+
+def result_key(config: Dict[str, Any], data_version: str, strategy_class: Type[BaseStrategy]) -> str:
+    """
+    Canonical hash of everything that determines a backtest result: the run configuration
+    (symbols, dates, interval, broker/portfolio settings, strategy name and parameters),
+    the content version of the market data and the hash of the strategy's source file.
+    """
+    payload = json.dumps({
+        'config': config,
+        'data_version': data_version,
+        'strategy_hash': strategy_source_hash(strategy_class),
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultStore:
+    """
+    Persistent cache of completed backtests.
+
+    Summaries and bookkeeping live in a SQLite index; equity curves and trade logs are
+    stored as Parquet files next to it. Entries are evicted least-recently-used first once
+    the store exceeds max_entries or max_bytes. Entries produced by a strategy file whose
+    contents have since changed are purged when the store is opened; until then they are
+    simply never hit, since the strategy's source hash is part of every key.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 500, max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = os.path.abspath(cache_dir or os.environ.get('RETROSPECT_RESULT_CACHE_DIR', DEFAULT_CACHE_DIR))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    strategy_file TEXT NOT NULL,
+                    strategy_hash TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+        self.invalidate_stale()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite'), timeout=30)
+
+    def _paths(self, key: str) -> tuple[str, str]:
+        return (os.path.join(self.cache_dir, f"{key}.equity.parquet"),
+                os.path.join(self.cache_dir, f"{key}.trades.parquet"))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns {'summary', 'equity_curve', 'trades'} for a cached run, or None on a miss."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT summary FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            equity_path, trades_path = self._paths(key)
+            try:
+                result = {
+                    'summary': json.loads(row[0]),
+                    'equity_curve': read_equity_curve(equity_path),
+                    'trades': read_trade_log(trades_path),
+                }
+            except (OSError, ValueError) as e:
+                emit(logging.WARNING, 'result_unreadable', f"Dropping unreadable cached result {key}: {e}", key=key)
+                self._delete(conn, key)
+                self.misses += 1
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return result
+
+    def put(self, key: str, strategy_class: Type[BaseStrategy], summary: Dict[str, Any], equity_curve: pd.Series, trades: list):
+        equity_path, trades_path = self._paths(key)
+        write_equity_curve(equity_curve, equity_path)
+        write_trade_log(trades, trades_path)
+        size_bytes = os.path.getsize(equity_path) + os.path.getsize(trades_path)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results (key, strategy_file, strategy_hash, summary, size_bytes, created, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, strategy_source_file(strategy_class), strategy_source_hash(strategy_class), json.dumps(summary, default=str), size_bytes, now, now)
+            )
+            self._evict(conn)
+
+    def invalidate_stale(self) -> int:
+        """Deletes entries whose strategy source file changed (or disappeared) since they were stored."""
+        removed = 0
+        with self._connect() as conn:
+            for strategy_file, strategy_hash in conn.execute("SELECT DISTINCT strategy_file, strategy_hash FROM results").fetchall():
+                if file_hash(strategy_file) != strategy_hash:
+                    keys = conn.execute("SELECT key FROM results WHERE strategy_file = ? AND strategy_hash = ?", (strategy_file, strategy_hash)).fetchall()
+                    for (key,) in keys:
+                        self._delete(conn, key)
+                    removed += len(keys)
+        return removed
+
+    def clear(self):
+        with self._connect() as conn:
+            for (key,) in conn.execute("SELECT key FROM results").fetchall():
+                self._delete(conn, key)
+
+    def _evict(self, conn: sqlite3.Connection):
+        count, total_bytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM results").fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        for key, size_bytes in conn.execute("SELECT key, size_bytes FROM results ORDER BY last_access ASC").fetchall():
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self._delete(conn, key)
+            count -= 1
+            total_bytes -= size_bytes
+
+    def _delete(self, conn: sqlite3.Connection, key: str):
+        conn.execute("DELETE FROM results WHERE key = ?", (key,))
+        for path in self._paths(key):
+            if os.path.exists(path):
+                os.remove(path)
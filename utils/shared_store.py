@@ -0,0 +1,263 @@
+import atexit
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.event_log import emit
+
+try:
+    import fcntl
+    SHARED_STORE_AVAILABLE = True
+except ImportError: # Windows: no flock, so every process keeps its own cache
+    SHARED_STORE_AVAILABLE = False
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_REGISTRY_DIR = os.path.join(tempfile.gettempdir(), 'retrospect_shared_store')
+# Total size of all shared segments; 0 (the default) disables the store
+SHARED_STORE_MAX_BYTES = int(float(os.environ.get('RETROSPECT_SHARED_STORE_MB', '0')) * 1024 * 1024)
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _untrack(segment: shared_memory.SharedMemory):
+    # The store decides when segments are unlinked; without this the resource tracker would
+    # unlink every segment a process created or attached to as soon as that process exits
+    with contextlib.suppress(Exception):
+        resource_tracker.unregister(segment._name, 'shared_memory')
+
+class SharedBarStore:
+    """
+    Cross-process store of OHLCV bars in POSIX shared memory, keyed by symbol, interval and
+    the [start, end) range they cover.
+
+    Each entry is one shared memory segment holding int64 timestamps followed by a float64
+    (rows x 5) OHLCV matrix; frames returned by get() are read-only views onto it, so every
+    process attached to an entry shares one copy of the data. A JSON registry next to a lock
+    file (flock) records each entry's shape, size, last access and per-process reference
+    counts. Once the segments exceed max_bytes, entries no live process references are
+    evicted least-recently-used first. A process holds a reference from get()/put() until it
+    calls release() or exits.
+    """
+    def __init__(self, max_bytes: int = SHARED_STORE_MAX_BYTES, registry_dir: Optional[str] = None):
+        if not SHARED_STORE_AVAILABLE:
+            raise RuntimeError("The shared bar store needs fcntl, which this platform does not provide.")
+        self.max_bytes = max_bytes
+        self.registry_dir = registry_dir or os.environ.get('RETROSPECT_SHARED_STORE_DIR', DEFAULT_REGISTRY_DIR)
+        os.makedirs(self.registry_dir, exist_ok=True)
+        self._registry_path = os.path.join(self.registry_dir, 'registry.json')
+        self._lock_path = os.path.join(self.registry_dir, 'registry.lock')
+        # Segments this process has mapped, by segment name; kept open while frames may view them
+        self._segments: Dict[str, shared_memory.SharedMemory] = {}
+        self._held: Dict[str, int] = {}
+        atexit.register(self.release_all)
+
+    @staticmethod
+    def entry_key(symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp) -> str:
+        return f"{symbol}|{interval}|{pd.Timestamp(start).isoformat()}|{pd.Timestamp(end).isoformat()}"
+
+    @staticmethod
+    def _segment_name(key: str) -> str:
+        # Unique per write, so replacing an entry never changes memory another process has mapped
+        return 'rsp_' + hashlib.sha1(f"{key}|{os.getpid()}|{time.time_ns()}".encode('utf-8')).hexdigest()[:20]
+
+    @contextlib.contextmanager
+    def _registry(self, exclusive: bool = True):
+        """
+        Access to the registry; yields the entries dict. Exclusive access writes it back on
+        exit; shared access is for readers, which run alongside each other and write nothing.
+        """
+        with open(self._lock_path, 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                try:
+                    with open(self._registry_path) as f:
+                        entries = json.load(f)
+                except (OSError, ValueError):
+                    entries = {}
+                yield entries
+                if not exclusive:
+                    return
+                fd, tmp_path = tempfile.mkstemp(dir=self.registry_dir, suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self._registry_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _attach(self, entry: Dict) -> Optional[shared_memory.SharedMemory]:
+        segment = self._segments.get(entry['segment'])
+        if segment is None:
+            try:
+                segment = shared_memory.SharedMemory(name=entry['segment'])
+            except FileNotFoundError:
+                return None
+            _untrack(segment)
+            self._segments[entry['segment']] = segment
+        return segment
+
+    def _frame(self, entry: Dict, segment: shared_memory.SharedMemory) -> pd.DataFrame:
+        rows = entry['rows']
+        timestamps = np.ndarray((rows,), dtype=np.int64, buffer=segment.buf)
+        values = np.ndarray((rows, len(OHLCV_COLUMNS)), dtype=np.float64, buffer=segment.buf, offset=rows * 8)
+        values.flags.writeable = False
+        dates = pd.DatetimeIndex(timestamps.view('M8[ns]'), name='Date')
+        if entry['tz'] is not None:
+            dates = dates.tz_localize('UTC').tz_convert(entry['tz'])
+        index = pd.MultiIndex.from_arrays([dates, np.full(rows, entry['symbol'], dtype=object)], names=['Date', 'Symbol'])
+        return pd.DataFrame(values, index=index, columns=OHLCV_COLUMNS, copy=False)
+
+    def _hold(self, entries: Dict, key: str):
+        refs = entries[key]['refs']
+        pid = str(os.getpid())
+        refs[pid] = refs.get(pid, 0) + 1
+        entries[key]['last_access'] = time.time()
+        self._held[key] = self._held.get(key, 0) + 1
+
+    def get(self, symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp) -> Optional[Tuple[str, pd.Timestamp, pd.Timestamp, pd.DataFrame, float]]:
+        """
+        The newest entry for symbol/interval whose range covers [start, end), as
+        (key, entry start, entry end, bars over the entry's whole range, fetched_at), or None.
+        Takes a reference to the entry for this process.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        with self._registry() as entries:
+            for key, entry in sorted(entries.items(), key=lambda item: item[1]['end'], reverse=True):
+                if entry['symbol'] != symbol or entry['interval'] != interval:
+                    continue
+                if pd.Timestamp(entry['start']) > start or pd.Timestamp(entry['end']) < end:
+                    continue
+                segment = self._attach(entry)
+                if segment is None:
+                    # Segment lost (e.g. /dev/shm cleared); forget the entry
+                    del entries[key]
+                    continue
+                self._hold(entries, key)
+                return key, pd.Timestamp(entry['start']), pd.Timestamp(entry['end']), self._frame(entry, segment), entry['fetched_at']
+        return None
+
+    def put(self, symbol: str, interval: str, start: pd.Timestamp, end: pd.Timestamp, bars: pd.DataFrame,
+            fetched_at: Optional[float] = None) -> Optional[Tuple[pd.DataFrame, str]]:
+        """
+        Copies one symbol's (Date, Symbol) bars into a new shared entry, replacing any entry
+        for the same range, and returns (the shared view of them, key), holding a reference
+        for this process. Returns None if the entry can't be made to fit within max_bytes.
+        """
+        key = self.entry_key(symbol, interval, start, end)
+        rows = len(bars)
+        size = max(rows * 8 * (1 + len(OHLCV_COLUMNS)), 1)
+        dates = bars.index.get_level_values('Date')
+        with self._registry() as entries:
+            replaced = entries.pop(key, None)
+            if replaced is not None:
+                # Processes still viewing the old data keep their mapping until they drop it
+                self._unlink(replaced['segment'])
+            if not self._make_room(entries, size):
+                emit(logging.DEBUG, 'shared_store_full', f"Shared bar store is full; keeping {key} local.", key=key)
+                return None
+            name = self._segment_name(key)
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _untrack(segment)
+            timestamps = np.ndarray((rows,), dtype=np.int64, buffer=segment.buf)
+            timestamps[:] = (dates.tz_convert('UTC').tz_localize(None) if dates.tz is not None else dates).asi8
+            values = np.ndarray((rows, len(OHLCV_COLUMNS)), dtype=np.float64, buffer=segment.buf, offset=rows * 8)
+            values[:] = bars[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+            self._segments[name] = segment
+            entries[key] = {
+                'segment': name, 'symbol': symbol, 'interval': interval,
+                'start': pd.Timestamp(start).isoformat(), 'end': pd.Timestamp(end).isoformat(),
+                'rows': rows, 'size': size, 'tz': str(dates.tz) if dates.tz is not None else None,
+                'fetched_at': fetched_at if fetched_at is not None else time.time(), 'refs': {},
+            }
+            self._hold(entries, key)
+            return self._frame(entries[key], segment), key
+
+    def _make_room(self, entries: Dict, size: int) -> bool:
+        """Evicts unreferenced entries, least recently used first, until size more bytes fit."""
+        for entry in entries.values():
+            entry['refs'] = {pid: count for pid, count in entry['refs'].items() if _pid_alive(int(pid))}
+        used = sum(entry['size'] for entry in entries.values())
+        for key, entry in sorted(entries.items(), key=lambda item: item[1]['last_access']):
+            if used + size <= self.max_bytes:
+                break
+            if entry['refs']:
+                continue
+            self._unlink(entry['segment'])
+            del entries[key]
+            used -= entry['size']
+        return used + size <= self.max_bytes
+
+    @staticmethod
+    def _unlink(name: str):
+        with contextlib.suppress(FileNotFoundError):
+            # Attaching registers the segment with the resource tracker and unlink() unregisters it
+            segment = shared_memory.SharedMemory(name=name)
+            segment.close()
+            segment.unlink()
+
+    def release(self, key: str):
+        """Drops one of this process's references to an entry, making it evictable once none remain."""
+        if not self._held.get(key):
+            return
+        self._held[key] -= 1
+        with self._registry() as entries:
+            entry = entries.get(key)
+            pid = str(os.getpid())
+            if entry is not None and entry['refs'].get(pid):
+                entry['refs'][pid] -= 1
+                if entry['refs'][pid] == 0:
+                    del entry['refs'][pid]
+
+    def release_all(self):
+        """Drops every reference this process holds. Mappings stay valid for frames still in use."""
+        held = {key: count for key, count in self._held.items() if count}
+        if not held:
+            return
+        self._held.clear()
+        with contextlib.suppress(OSError), self._registry() as entries:
+            pid = str(os.getpid())
+            for key in held:
+                if key in entries:
+                    entries[key]['refs'].pop(pid, None)
+
+    def clear(self):
+        """Unlinks every segment and empties the registry, regardless of references."""
+        with self._registry() as entries:
+            for entry in entries.values():
+                self._unlink(entry['segment'])
+            entries.clear()
+        self._held.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Size and reference counts of the store, read under a shared lock so scrapes don't hold up loaders."""
+        with self._registry(exclusive=False) as entries:
+            return {
+                'entries': len(entries),
+                'bytes': sum(entry['size'] for entry in entries.values()),
+                'max_bytes': self.max_bytes,
+                # References of processes that exited are only pruned by writers, so check liveness here
+                'referenced_entries': sum(1 for entry in entries.values() if any(_pid_alive(int(pid)) for pid in entry['refs'])),
+            }
+
+_shared_store: Optional[SharedBarStore] = None
+
+def get_shared_store() -> Optional[SharedBarStore]:
+    """The process's SharedBarStore, or None when RETROSPECT_SHARED_STORE_MB is unset or 0 or the platform lacks flock."""
+    global _shared_store
+    if _shared_store is None and SHARED_STORE_MAX_BYTES > 0 and SHARED_STORE_AVAILABLE:
+        _shared_store = SharedBarStore()
+    return _shared_store
@@ -1,13 +1,42 @@
 # utils/strategy_loader.py
+import hashlib
 import importlib.util
 import os
 import inspect # To check if it's a class
-from typing import Dict, Type # For type hinting
+from typing import Dict, Tuple, Type # For type hinting
 
 # Import BaseStrategy to check inheritance
 # Adjust this path based on your exact file structure
 from strategies.base import BaseStrategy 
 
+# Strategies per directory, with the (file name, mtime, size) listing they were loaded from
+_directory_cache: Dict[str, Tuple[tuple, Dict[str, Type[BaseStrategy]]]] = {}
+# Directory lookups served without re-executing modules vs. those that (re)loaded them
+cache_stats = {'hits': 0, 'misses': 0}
+
+def _directory_signature(directory: str) -> tuple:
+    entries = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith(".py") and filename != "__init__.py":
+            stat = os.stat(os.path.join(directory, filename))
+            entries.append((filename, stat.st_mtime_ns, stat.st_size))
+    return tuple(entries)
+
+def cached_strategies_from_directory(directory: str) -> Dict[str, Type[BaseStrategy]]:
+    """
+    load_strategies_from_directory, re-executing the strategy modules only when a file in the
+    directory was added, removed or modified since the last call. Checking costs one stat per file.
+    """
+    if not os.path.exists(directory):
+        return load_strategies_from_directory(directory)
+    signature = _directory_signature(directory)
+    cached = _directory_cache.get(directory)
+    cache_stats['hits' if cached is not None and cached[0] == signature else 'misses'] += 1
+    if cached is None or cached[0] != signature:
+        cached = (signature, load_strategies_from_directory(directory))
+        _directory_cache[directory] = cached
+    return dict(cached[1])
+
 def load_strategies_from_directory(directory: str) -> Dict[str, Type[BaseStrategy]]:
     """
     Scans a given directory for Python files and attempts to load classes
@@ -66,7 +95,8 @@ def load_strategies_from_directory(directory: str) -> Dict[str, Type[BaseStrateg
 
 def get_available_strategies() -> Dict[str, Type[BaseStrategy]]:
     """
-    Collects strategies from all designated strategy directories.
+    Collects strategies from all designated strategy directories. Modules are only
+    re-executed when their directory changed since the previous call.
     """
     all_strategies = {}
     # Get the path to the strategies/library directory
@@ -77,11 +107,30 @@ def get_available_strategies() -> Dict[str, Type[BaseStrategy]]:
 
     # Built-in strategies from strategies/library/
     library_path = os.path.join(project_root, 'strategies', 'library')
-    all_strategies.update(load_strategies_from_directory(library_path))
+    all_strategies.update(cached_strategies_from_directory(library_path))
 
     # User-defined strategies (optional for now, but good to plan for)
     user_defined_path = os.path.join(project_root, 'strategies', 'user_defined')
     if os.path.exists(user_defined_path): # Only try to load if directory exists
-        all_strategies.update(load_strategies_from_directory(user_defined_path))
+        all_strategies.update(cached_strategies_from_directory(user_defined_path))
+
+    return all_strategies
+
+def strategy_source_file(strategy_class: Type[BaseStrategy]) -> str:
+    """
+    Path of the file a strategy class was loaded from. Strategy modules are executed
+    from file specs without being registered in sys.modules, so inspect.getfile cannot
+    be used; the code object of on_data still records its file.
+    """
+    return strategy_class.on_data.__code__.co_filename
+
+def strategy_source_hash(strategy_class: Type[BaseStrategy]) -> str:
+    """Hash of the strategy's source file, so anything cached from it is invalidated when it changes."""
+    return file_hash(strategy_source_file(strategy_class))
 
-    return all_strategies
\ No newline at end of file
+def file_hash(file_path: str) -> str:
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except OSError:
+        return ""
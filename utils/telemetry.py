@@ -0,0 +1,219 @@
+import contextlib
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is always added
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    return repr(float(value))
+
+def gauge_lines(name: str, help_text: str, samples: Dict[Tuple[Tuple[str, str], ...], float]) -> List[str]:
+    """Prometheus text lines for a gauge; samples maps ((label, value), ...) tuples to values."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples.items():
+        lines.append(f"{name}{_format_labels([k for k, _ in labels], [v for _, v in labels])} {_format_value(value)}")
+    return lines
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with a fixed set of label names. Only per-bucket counts,
+    the sum and the count are kept, so memory does not grow with the number of observations.
+    """
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [non-cumulative bucket counts (last is +Inf), sum, count]
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names + ('le',), key + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class StageTimer:
+    """
+    Times the named stages of one request. Each stage is observed in the stage histogram
+    and kept for the request's Server-Timing header.
+    """
+    def __init__(self, histogram: Histogram, route: str):
+        self.histogram = histogram
+        self.route = route
+        self.timings: List[Tuple[str, float]] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings.append((name, elapsed))
+            self.histogram.observe(elapsed, route=self.route, stage=name)
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. 'data_fetch;dur=12.5, backtest;dur=80.1' (milliseconds)."""
+        return ', '.join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.timings)
+
+class Telemetry:
+    """
+    Process-wide operational metrics in Prometheus text format: request latency per route,
+    per-stage latency, backtest throughput, and any gauges produced by registered collectors
+    (cache hit rates, queue depths) which are evaluated only when /metrics is scraped.
+    """
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.request_latency = Histogram('retrospect_request_duration_seconds', 'HTTP request latency by route.',
+                                         ('method', 'route', 'status'), buckets)
+        self.stage_latency = Histogram('retrospect_stage_duration_seconds', 'Latency of request stages (data fetch, backtest, metrics, serialization).',
+                                       ('route', 'stage'), buckets)
+        self.requests_in_progress: Dict[str, int] = {}
+        self.bars_processed = Counter('retrospect_bars_processed_total', 'Bars processed by backtests.')
+        self.backtest_seconds = Counter('retrospect_backtest_seconds_total', 'Time spent running backtests.')
+        self.last_bars_per_second: Optional[float] = None
+        self._collectors: List[Callable[[], List[str]]] = []
+        self._lock = threading.Lock()
+
+    def stage_timer(self, route: str) -> StageTimer:
+        return StageTimer(self.stage_latency, route)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float):
+        self.request_latency.observe(seconds, method=method, route=route, status=str(status))
+
+    def track_in_progress(self, route: str, delta: int):
+        with self._lock:
+            self.requests_in_progress[route] = self.requests_in_progress.get(route, 0) + delta
+
+    def observe_backtest(self, bars: int, seconds: float):
+        self.bars_processed.inc(bars)
+        self.backtest_seconds.inc(seconds)
+        if seconds > 0:
+            self.last_bars_per_second = bars / seconds
+
+    def register_collector(self, collector: Callable[[], List[str]]):
+        """Adds a callable returning Prometheus text lines, evaluated on every scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = self.request_latency.render() + self.stage_latency.render()
+        with self._lock:
+            in_progress = {(('route', route),): count for route, count in sorted(self.requests_in_progress.items())}
+        lines += gauge_lines('retrospect_requests_in_progress', 'Requests currently being handled, by route.', in_progress)
+        lines += self.bars_processed.render() + self.backtest_seconds.render()
+        if self.last_bars_per_second is not None:
+            lines += gauge_lines('retrospect_bars_per_second', 'Throughput of the most recent backtest.', {(): self.last_bars_per_second})
+        for collector in self._collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+def cache_lines(stats: Dict[str, Tuple[int, int]]) -> List[str]:
+    """Request counters and hit ratios for caches given as {cache name: (hits, misses)}."""
+    lines = ["# HELP retrospect_cache_requests_total Cache lookups by cache and result.",
+             "# TYPE retrospect_cache_requests_total counter"]
+    ratios = {}
+    for cache, (hits, misses) in stats.items():
+        lines.append(f'retrospect_cache_requests_total{{cache="{cache}",result="hit"}} {hits}')
+        lines.append(f'retrospect_cache_requests_total{{cache="{cache}",result="miss"}} {misses}')
+        if hits + misses:
+            ratios[(('cache', cache),)] = hits / (hits + misses)
+    return lines + gauge_lines('retrospect_cache_hit_ratio', 'Fraction of cache lookups that were hits.', ratios)
+
+class InstrumentedThreadPool(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that counts its queued and running tasks, for exporting as gauges
+    without reaching into the executor's private attributes. Installed as the event loop's
+    default executor it also covers asyncio.to_thread and run_in_executor(None, ...).
+    """
+    def __init__(self, max_workers: Optional[int] = None, thread_name_prefix: str = ''):
+        # ThreadPoolExecutor's own default, kept here so it can be reported
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        super().__init__(max_workers=self.max_workers, thread_name_prefix=thread_name_prefix)
+        self.queued = 0
+        self.running = 0
+        self._stats_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        with self._stats_lock:
+            self.queued += 1
+        try:
+            return super().submit(self._tracked, fn, args, kwargs)
+        except BaseException:
+            with self._stats_lock:
+                self.queued -= 1
+            raise
+
+    def _tracked(self, fn, args, kwargs):
+        with self._stats_lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._stats_lock:
+                self.running -= 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {'queued': self.queued, 'running': self.running}
@@ -0,0 +1,191 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TASK_STATES = ('pending', 'running', 'done', 'failed')
+
+def task_id(payload: Dict[str, Any]) -> str:
+    """Content hash of a task payload, so the same work enqueued twice is one task."""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:24]
+
+class DirectoryWorkQueue:
+    """
+    Work queue kept as JSON files in a directory that every host can reach (a local path for
+    worker processes on one machine, an NFS/SMB share across hosts); no server is involved.
+
+    A task file moves pending/ -> running/ -> done/ or failed/. Every transition is an atomic
+    rename, and results are published with link() (an exclusive create where the share has
+    no hard links), so exactly one worker claims a task and exactly one result is kept per
+    task id; a result still being written reads as absent until it is complete. A worker renews its lease by touching its running file; a task whose lease is
+    older than lease_seconds (its worker died or hung) goes back to pending/, and a task
+    that has failed max_attempts times goes to failed/. A task run twice because its lease
+    expired while the worker was still alive only keeps the first result to arrive.
+    """
+    def __init__(self, queue_dir: str, lease_seconds: float = 300.0, max_attempts: int = 3):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        self.queue_dir = os.path.abspath(queue_dir)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in TASK_STATES + ('claims',):
+            os.makedirs(os.path.join(self.queue_dir, state), exist_ok=True)
+
+    def _path(self, state: str, task: str) -> str:
+        return os.path.join(self.queue_dir, state, f"{task}.json")
+
+    def _write(self, path: str, record: Dict[str, Any]):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _ids(self, state: str) -> List[str]:
+        return sorted(os.path.basename(path)[:-len('.json')] for path in glob.glob(os.path.join(self.queue_dir, state, '*.json')))
+
+    def put(self, payload: Dict[str, Any]) -> Tuple[str, bool]:
+        """Enqueues a task; returns (task id, False) without enqueueing if it is already pending, running or done."""
+        task = task_id(payload)
+        # A task that ran out of attempts earlier gets a fresh set when it is enqueued again
+        self._remove(self._path('failed', task))
+        if any(os.path.exists(self._path(state, task)) for state in ('pending', 'running', 'done')):
+            return task, False
+        self._write(self._path('pending', task), {'id': task, 'payload': payload, 'attempts': 0, 'errors': []})
+        return task, True
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Takes the oldest pending task for a worker, or returns None when nothing is pending."""
+        for task in self._ids('pending'):
+            running_path = self._path('running', task)
+            try:
+                os.rename(self._path('pending', task), running_path)
+            except FileNotFoundError:
+                continue # Another worker claimed it first
+            if os.path.exists(self._path('done', task)):
+                # Finished by a worker whose lease had expired; nothing left to do
+                self._remove(running_path)
+                continue
+            os.utime(running_path)
+            record = self._read(running_path)
+            if record is None:
+                continue
+            record['worker'] = worker
+            return record
+        return None
+
+    def heartbeat(self, task: str) -> bool:
+        """Renews the lease on a running task; False if the task is no longer running."""
+        try:
+            os.utime(self._path('running', task))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, task: str, result: Dict[str, Any]) -> bool:
+        """Stores a task's result; returns False if a result for it was already stored (the duplicate is dropped)."""
+        done_path = self._path('done', task)
+        content = json.dumps({'id': task, 'result': result, 'completed_at': time.time()}, default=str).encode('utf-8')
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(done_path), prefix='.', suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        try:
+            # link() fails if the target exists, so the first result wins
+            os.link(tmp_path, done_path)
+            stored = True
+        except FileExistsError:
+            stored = False
+        except OSError:
+            # No hard links (SMB/CIFS shares): an exclusive create also lets only the first result in
+            stored = self._create_exclusive(done_path, content)
+        finally:
+            os.remove(tmp_path)
+        self._remove(self._path('running', task))
+        return stored
+
+    @staticmethod
+    def _create_exclusive(path: str, content: bytes) -> bool:
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        return True
+
+    def fail(self, task: str, error: str) -> Optional[str]:
+        """Records a failed attempt; the task goes back to pending/ or, out of attempts, to failed/. Returns the new state."""
+        claim_path = os.path.join(self.queue_dir, 'claims', f"{task}.{os.getpid()}.{time.time_ns()}.json")
+        try:
+            # Whoever renames the running file first handles the failure
+            os.rename(self._path('running', task), claim_path)
+        except FileNotFoundError:
+            return None
+        record = self._read(claim_path) or {'id': task, 'payload': None, 'attempts': 0, 'errors': []}
+        record['attempts'] += 1
+        record['errors'].append(error)
+        if os.path.exists(self._path('done', task)):
+            state = 'done' # Another run of the task already succeeded
+        else:
+            state = 'pending' if record['attempts'] < self.max_attempts else 'failed'
+            self._write(self._path(state, task), record)
+        self._remove(claim_path)
+        return state
+
+    def requeue_expired(self) -> List[str]:
+        """Fails every running task whose lease has expired; returns their ids."""
+        expired = []
+        now = time.time()
+        for task in self._ids('running'):
+            try:
+                age = now - os.path.getmtime(self._path('running', task))
+            except FileNotFoundError:
+                continue
+            if age > self.lease_seconds and self.fail(task, f"Lease expired after {age:.0f}s") is not None:
+                expired.append(task)
+        return expired
+
+    def results(self, seen: Optional[set] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(task id, result) of every finished task not in seen; seen is updated as results are yielded."""
+        seen = seen if seen is not None else set()
+        for task in self._ids('done'):
+            if task in seen:
+                continue
+            record = self._read(self._path('done', task))
+            if record is not None:
+                seen.add(task)
+                yield task, record['result']
+
+    def failures(self) -> Dict[str, Dict[str, Any]]:
+        return {task: self._read(self._path('failed', task)) for task in self._ids('failed')}
+
+    def counts(self) -> Dict[str, int]:
+        return {state: len(self._ids(state)) for state in TASK_STATES}
+
+    def close(self):
+        """Marks the queue finished so idle workers exit."""
+        open(os.path.join(self.queue_dir, 'closed'), 'w').close()
+
+    def reopen(self):
+        self._remove(os.path.join(self.queue_dir, 'closed'))
+
+    @property
+    def closed(self) -> bool:
+        return os.path.exists(os.path.join(self.queue_dir, 'closed'))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass